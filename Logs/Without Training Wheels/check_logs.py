@@ -1,57 +1,230 @@
+"""
+* Checks the logs of a run, i.e. the *Master.log* and all the
+*Worker_<N>.log* files in the run's folder
+* The logs are scanned in parallel and in bounded memory (see
+*Logs/log_scan.py*), and the number of times every task was dispatched by the
+master, received by a worker, sent back by a worker and received back by the
+master are reconciled. A task which does not go through each of these steps
+exactly once is flagged as lost or duplicated
+* Usage:
+
+```bash
+$ python3 check_logs.py <Run_TestNumber_Scheduling Algorithm>
+$ python3 check_logs.py Run_10_LL --processes 4 --show-order
+```
+
+* The exit status is 1 if any task was lost or duplicated
+"""
+import argparse
+import glob
+import json
 import os
+import re
 import sys
-import json
+from collections import Counter
+
 import colored as TC
 
+# The helpers are in the Logs folder
+sys.path.insert(0,
+                os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from log_scan import CHUNK_SIZE, iter_lines, remove_prefix, \
+    scan_in_parallel, task_ids  # noqa: E402
+
+SELECTED_PREFIX = "Selected tuple:"
+DISPATCH_PREFIX = "Sending task to worker:"
+UPDATE_PREFIX = "Received worker update at master:"
+CLIENT_PREFIX = "Total number of tasks sent by the client are:"
+WORKER_RECEIVED_PREFIX = "Task received at worker:"
+WORKER_SENT_PREFIX = "Task sent:"
+
+# The steps every task goes through, in order
+STEPS = ["dispatched", "received by worker", "sent by worker",
+         "update received"]
+
+# The counts of the steps of a task are packed into a single integer, so that
+# only one small entry is kept per task. Every step has STEP_BITS bits, which
+# is enough for a step to be logged up to a million times
+STEP_BITS = 20
+STEP_MASK = (1 << STEP_BITS) - 1
+STEP_UNIT = {step: 1 << (STEP_BITS * index)
+             for index, step in enumerate(STEPS)}
+
+
+def count_tasks(counts, source, step, message):
+    """
+    * Counts the *step* of every task in the logged *message*, both for the
+    task, under the key *"<job_id>:<task_id>"*, and for the log file given
+    by *source*, under the key *(source, step)*
+    """
+    for job_id, task_id in task_ids(message):
+        counts[f"{job_id}:{task_id}"] += STEP_UNIT[step]
+        counts[(source, step)] += 1
+
+
+def scan_master_log(path, start, end):
+    """
+    * Counts the selected tasks, and the dispatches and updates of every task
+    in a chunk of the master's log
+    """
+    counts = Counter()
+    for line in iter_lines(path, start, end):
+        if line.startswith(SELECTED_PREFIX):
+            counts[("master", "selected")] += 1
+        elif line.startswith(DISPATCH_PREFIX):
+            count_tasks(counts, "master", "dispatched",
+                        remove_prefix(line, DISPATCH_PREFIX))
+        elif line.startswith(UPDATE_PREFIX):
+            count_tasks(counts, "master", "update received",
+                        remove_prefix(line, UPDATE_PREFIX))
+        elif line.startswith(CLIENT_PREFIX):
+            counts[("master", "client tasks")] += \
+                int(remove_prefix(line, CLIENT_PREFIX).strip())
+    return counts
+
+
+def scan_worker_log(path, start, end):
+    """
+    * Counts the tasks received and sent back by the worker, for every task,
+    in a chunk of a worker's log
+    """
+    counts = Counter()
+    source = os.path.basename(path)
+    for line in iter_lines(path, start, end):
+        if line.startswith(WORKER_RECEIVED_PREFIX):
+            count_tasks(counts, source, "received by worker",
+                        remove_prefix(line, WORKER_RECEIVED_PREFIX))
+        elif line.startswith(WORKER_SENT_PREFIX):
+            count_tasks(counts, source, "sent by worker",
+                        remove_prefix(line, WORKER_SENT_PREFIX))
+    return counts
+
+
+def find_worker_logs(log_name):
+    """
+    * Returns the *Worker_<N>.log* files of the run, ordered by worker number
+    """
+    def worker_number(path):
+        return int(re.search(r"Worker_(\d+)\.log$", path).group(1))
+    return sorted(glob.glob(os.path.join(glob.escape(log_name),
+                                         "Worker_*.log")),
+                  key=worker_number)
+
+
+def reconcile(counts, max_listed):
+    """
+    * Goes through the steps of every task, and returns the summary of the
+    tasks which did not go through every step exactly once
+    """
+    task_count = 0
+    lost_count = 0
+    duplicated_count = 0
+    lost = []
+    duplicated = []
+    for key, packed in counts.items():
+        if not isinstance(key, str):
+            continue
+        task_count += 1
+        steps = [(packed >> (STEP_BITS * index)) & STEP_MASK
+                 for index in range(len(STEPS))]
+        if min(steps) == 0:
+            lost_count += 1
+            listed = lost
+        elif max(steps) > 1:
+            duplicated_count += 1
+            listed = duplicated
+        else:
+            continue
+        if len(listed) < max_listed:
+            job_id, task_id = key.split(":", 1)
+            listed.append({"job_id": job_id, "task_id": task_id,
+                           **dict(zip(STEPS, steps))})
+
+    return {
+        "task count": task_count,
+        "lost task count": lost_count,
+        "duplicated task count": duplicated_count,
+        "lost tasks": lost,
+        "duplicated tasks": duplicated
+    }
+
+
+def print_dispatch_order(log_name):
+    """
+    * Prints the *job_id : task_id* of the tasks, in the order in which the
+    master sent them to the workers, while reading the master's log
+    """
+    print((f"The {TC.attr(1)}job_id : task_id{TC.attr(0)}, sent by the master "
+           "to the workers are:"))
+    path = os.path.join(log_name, "Master.log")
+    for line in iter_lines(path, 0, os.path.getsize(path)):
+        if line.startswith(DISPATCH_PREFIX):
+            for job_id, task_id in task_ids(remove_prefix(line,
+                                                          DISPATCH_PREFIX)):
+                print(f"{job_id} : {task_id}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check the logs of a run")
+    parser.add_argument("LOG_NAME", help="Folder holding the logs of the run")
+    parser.add_argument("--processes", type=int, default=None,
+                        help="Number of processes (default: CPU count)")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE,
+                        help="Bytes of a log scanned by a process at once")
+    parser.add_argument("--max-listed", type=int, default=20,
+                        help="Number of lost and duplicated tasks to list")
+    parser.add_argument("--show-order", action="store_true",
+                        help="Print the order the tasks were dispatched in")
+    cmdArgs = parser.parse_args()
+    log_name = cmdArgs.LOG_NAME
+
+    worker_logs = find_worker_logs(log_name)
+    # The counts of all the logs are added up together
+    scans = [("run", os.path.join(log_name, "Master.log"), scan_master_log)]
+    scans += [("run", path, scan_worker_log) for path in worker_logs]
+    counts = scan_in_parallel(scans, cmdArgs.processes,
+                              cmdArgs.chunk_size)["run"]
+
+    masterStats = {
+        "selected tuple count": counts[("master", "selected")],
+        "tasks sent to worker count": counts[("master", "dispatched")],
+        "updates received from worker count":
+            counts[("master", "update received")]
+    }
+    client_tasks = counts[("master", "client tasks")]
+    if client_tasks:
+        masterStats["tasks sent by client count"] = client_tasks
+    print(json.dumps(masterStats, indent=4))
+
+    for path in worker_logs:
+        source = os.path.basename(path)
+        workerStat = {
+            "tasks received": counts[(source, "received by worker")],
+            "tasks sent": counts[(source, "sent by worker")]
+        }
+        print(f"{source[:-len('.log')]} Stats:",
+              json.dumps(workerStat, indent=4), sep='\n')
+
+    print()
+    print('-'*80)
+    print()
+
+    summary = reconcile(counts, cmdArgs.max_listed)
+    if client_tasks:
+        summary["task count matches client"] = \
+            summary["task count"] == client_tasks
+    print(json.dumps(summary, indent=4))
+
+    if cmdArgs.show_order:
+        print()
+        print('-'*80)
+        print()
+        print_dispatch_order(log_name)
+
+    if summary["lost task count"] or summary["duplicated task count"] or \
+       not summary.get("task count matches client", True):
+        sys.exit(1)
+
 
-logName = sys.argv[1]
-
-masterStats = {
-               "selected tuple count": 0,
-               "tasks sent to worker count": 0,
-               "updates received from worker count": 0
-               }
-orderOfTasksSentByMaster = []
-with open(os.path.join(logName, "Master.log")) as f:
-    for line in f:
-        if line.startswith("Selected tuple:"):
-            masterStats["selected tuple count"] += 1
-        if line.startswith("Sending task to worker:"):
-            _temp = json.loads(line.lstrip("Sending task to worker:").strip())
-            masterStats["tasks sent to worker count"] += 1
-            orderOfTasksSentByMaster.append((f'{_temp["job_id"]} : '
-                                             f'{_temp["task"]["task_id"]}'))
-        if line.startswith("Received worker update at master:"):
-            _temp = line.lstrip("Received worker update at master:").strip()
-            masterStats["updates received from worker count"] += \
-                len(json.loads(_temp))
-
-print(json.dumps(masterStats, indent=4))
-
-
-workerStats = [
-                {"tasks received": 0, "tasks sent": 0},
-                {"tasks received": 0, "tasks sent": 0},
-                {"tasks received": 0, "tasks sent": 0}
-               ]
-workerFileList = ["Worker_1.log", "Worker_2.log", "Worker_3.log"]
-for ind, workerFile in enumerate(workerFileList):
-    with open(os.path.join(logName, workerFile)) as f:
-        for line in f:
-            if line.startswith("Task sent:"):
-                workerStats[ind]["tasks sent"] += 1
-            if line.startswith("Task received at worker:"):
-                _temp = line.lstrip("Task received at worker:").strip()
-                workerStats[ind]["tasks received"] += len(json.loads(_temp))
-
-for ind, workerStat in enumerate(workerStats, start=1):
-    print(f"Worker-{ind} Stats:", json.dumps(workerStat, indent=4), sep='\n')
-
-print()
-print('-'*80)
-print()
-
-print((f"The {TC.attr(1)}job_id : task_id{TC.attr(0)}, sent by the master to "
-       "the workers are:"))
-for dispatch in orderOfTasksSentByMaster:
-    print(dispatch)
+if __name__ == "__main__":
+    main()
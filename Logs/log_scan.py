@@ -0,0 +1,89 @@
+"""
+* Helpers shared by the log analysis scripts, to scan large log files in
+parallel and in bounded memory
+* Every log file is split into chunks of about *chunk_size* bytes, and the
+chunks of all the files are scanned by a pool of processes. A chunk holds the
+lines which start inside of it, so no line is lost or counted twice
+* The scanning function of a chunk returns a *Counter*, and the counters of
+the chunks are added up as they complete, so the memory used depends on the
+number of distinct keys counted, and not on the size of the logs
+"""
+import os
+import re
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+CHUNK_SIZE = 64 * 1024 * 1024
+
+# Matches the job ID and the task ID of every message in a logged message or
+# list of messages, printed as JSON by the master or the workers, e.g.
+# {"worker_id": 1, "job_id": "0", "task_family": "map",
+#  "task": {"task_id": "0_M0", ...}}
+TASK_PATTERN = re.compile(r'"job_id": ("[^"]*"|[^,]*),.*?'
+                          r'"task_id": ("[^"]*"|[^,}]*)')
+
+
+def task_ids(message):
+    """
+    * Returns the *(job_id, task_id)* of every message in *message*, the part
+    of a log line after its prefix
+    """
+    return [(job_id.strip('"'), task_id.strip('"'))
+            for job_id, task_id in TASK_PATTERN.findall(message)]
+
+
+def remove_prefix(line, prefix):
+    """
+    * Returns *line* without *prefix*, if it starts with it. Unlike
+    *str.lstrip*, which strips any of the prefix's characters, this only
+    removes the prefix itself
+    """
+    return line[len(prefix):] if line.startswith(prefix) else line
+
+
+def chunk_ranges(path, chunk_size=CHUNK_SIZE):
+    """
+    * Splits the file at *path* into *(start, end)* byte ranges of about
+    *chunk_size* bytes each
+    """
+    size = os.path.getsize(path)
+    return [(start, min(start + chunk_size, size))
+            for start in range(0, max(size, 1), chunk_size)]
+
+
+def iter_lines(path, start, end):
+    """
+    * Yields the lines of the file at *path* which start at a byte offset in
+    *[start, end)*, without their line endings
+    """
+    with open(path, "rb") as fHandler:
+        if start > 0:
+            # Skip the line which started in the previous chunk, unless this
+            # chunk starts right after a line ending
+            fHandler.seek(start - 1)
+            fHandler.readline()
+        while fHandler.tell() < end:
+            line = fHandler.readline()
+            if not line:
+                break
+            yield line.decode(errors="replace").rstrip("\r\n")
+
+
+def scan_in_parallel(scans, processes=None, chunk_size=CHUNK_SIZE):
+    """
+    * Runs every scan of *scans*, i.e. a *(key, path, function)* tuple, on
+    all the chunks of the file at *path* using a pool of *processes*
+    processes, where *function(path, start, end)* returns a *Counter*
+    * The *function* has to be defined at the top level of a module, so that
+    it can be sent to the processes
+    * Returns the total *Counter* of every scan, by *key*
+    """
+    totals = {key: Counter() for key, _, _ in scans}
+    with ProcessPoolExecutor(processes) as pool:
+        futures = {pool.submit(function, path, start, end): key
+                   for key, path, function in scans
+                   for start, end in chunk_ranges(path, chunk_size)}
+        for future in as_completed(futures):
+            # Drop the future, so that its result is freed once added up
+            totals[futures.pop(future)].update(future.result())
+    return totals
@@ -1,15 +1,118 @@
-import sys
+"""
+* Prints the *task_family : task_id* of the tasks, in the order in which the
+master sent them to the workers, for any number of master logs
+* The order is printed while reading each log, and the dispatches of every
+task and task family are counted in parallel and in bounded memory (see
+*Logs/log_scan.py*), so that the tasks dispatched more than once are flagged
+* Usage:
+
+```bash
+$ python3 task_order.py run.log
+$ python3 task_order.py run_6_LL.log run_9_LL.log --no-order
+```
+
+* The exit status is 1 if any task was dispatched more than once
+"""
+import argparse
 import json
+import os
+import re
+import sys
+from collections import Counter
+
+# The helpers are in the Logs folder
+sys.path.insert(0,
+                os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from log_scan import CHUNK_SIZE, iter_lines, remove_prefix, \
+    scan_in_parallel, task_ids  # noqa: E402
+
+DISPATCH_PREFIX = "Sending task to worker: "
+
+# Older logs call the field "task family" instead of "task_family"
+FAMILY_PATTERN = re.compile(r'"task[ _]family": "([^"]*)"')
+
+
+def dispatched_tasks(line):
+    """
+    * Returns the *(task_family, job_id, task_id)* of the task dispatched in
+    the *line*, or an empty list if the line is not a dispatch
+    """
+    if not line.startswith(DISPATCH_PREFIX):
+        return []
+    message = remove_prefix(line, DISPATCH_PREFIX)
+    return [(family, job_id, task_id)
+            for family, (job_id, task_id) in
+            zip(FAMILY_PATTERN.findall(message), task_ids(message))]
+
+
+def scan_dispatches(path, start, end):
+    """
+    * Counts the dispatches of every task family and of every task, in a
+    chunk of the master's log
+    """
+    counts = Counter()
+    for line in iter_lines(path, start, end):
+        for family, job_id, task_id in dispatched_tasks(line):
+            counts[("family", family)] += 1
+            counts[f"{job_id}:{task_id}"] += 1
+    return counts
+
+
+def print_task_order(path):
+    """
+    * Prints the *task_family : task_id* of the tasks, in the order in which
+    they were dispatched, while reading the log at *path*
+    """
+    for line in iter_lines(path, 0, os.path.getsize(path)):
+        for family, _, task_id in dispatched_tasks(line):
+            print(f"{family} : {task_id}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=("Print the order the tasks "
+                                                  "were dispatched in"))
+    parser.add_argument("LOGS", nargs="+", help="Logs of the master")
+    parser.add_argument("--no-order", action="store_true",
+                        help="Only print the counts of the dispatched tasks")
+    parser.add_argument("--processes", type=int, default=None,
+                        help="Number of processes (default: CPU count)")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE,
+                        help="Bytes of a log scanned by a process at once")
+    parser.add_argument("--max-listed", type=int, default=20,
+                        help="Number of duplicated tasks to list per log")
+    cmdArgs = parser.parse_args()
+
+    totals = scan_in_parallel([(path, path, scan_dispatches)
+                               for path in cmdArgs.LOGS],
+                              cmdArgs.processes, cmdArgs.chunk_size)
+
+    isDuplicated = False
+    for path in cmdArgs.LOGS:
+        if not cmdArgs.no_order:
+            print_task_order(path)
+            print("-"*80)
+
+        counts = totals[path]
+        families = {key[1]: count for key, count in counts.items()
+                    if not isinstance(key, str)}
+        duplicated = [key for key, count in counts.items()
+                      if isinstance(key, str) and count > 1]
+        isDuplicated = isDuplicated or bool(duplicated)
+        print(json.dumps({
+            "log": path,
+            "TOTAL_TASK_COUNT": sum(families.values()),
+            "task family counts": families,
+            "duplicated task count": len(duplicated),
+            "duplicated tasks": [
+                {"job_id": key.split(":", 1)[0],
+                 "task_id": key.split(":", 1)[1],
+                 "dispatched": counts[key]}
+                for key in duplicated[:cmdArgs.max_listed]]
+        }, indent=4))
 
-TOTAL_TASK_COUNT = 0
+    if isDuplicated:
+        sys.exit(1)
 
-with open(sys.argv[1]) as fhandler:
-    for line in fhandler:
-        if line.startswith("Sending task to worker:"):
-            _temp: str = line.lstrip("Sending task to worker: ").strip()
-            _temp = json.loads(_temp)
-            print(f"{_temp['task family']} : {_temp['task']['task_id']}")
-            TOTAL_TASK_COUNT += 1
 
-print("-"*80)
-print(f"{TOTAL_TASK_COUNT=}")
+if __name__ == "__main__":
+    main()
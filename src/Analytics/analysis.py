@@ -5,96 +5,101 @@ import numpy as np
 import seaborn as sns
 import math
 
+from columnar import load_frame
 
-def get_heatmap(df, ax, title):
+
+def occupancy(start_times, end_times, sample_times):
+    """
+    * Counts the number of tasks running at each of the *sample_times*, where
+    a task is running from its start time up to its end time, both included
+    * This is an event sweep, i.e. a +1 at the start of every task and a -1
+    just after its end, whose cumulative sum is read at the sample times. The
+    cumulative sums are read from the sorted start and end times using binary
+    search, so this is O((tasks + samples) log tasks)
+    """
+    starts = np.sort(np.asarray(start_times, dtype=np.float64))
+    ends = np.sort(np.asarray(end_times, dtype=np.float64))
+    started = np.searchsorted(starts, sample_times, side="right")
+    ended = np.searchsorted(ends, sample_times, side="left")
+    return started - ended
+
+
+def worker_occupancy(df, first_bin, bin_width=1):
+    """
+    * This function takes in the *workers.csv* of an algorithm, and returns
+    the number of tasks running on each worker at every *bin_width* seconds
+    * The times are relative to the start of the first task, and go from the
+    bin *first_bin* up to the end of the worker's last logged task
+    * The given DataFrame is not modified
+    * Returns a list of *(worker_id, times, task_counts)* tuples
+    """
+    s_time = df["start_time"].min()
+    result = []
+    for worker_id, tasks in df.groupby("WorkerID"):
+        start_times = tasks["start_time"].to_numpy(dtype=np.float64) - s_time
+        end_times = tasks["end_time"].to_numpy(dtype=np.float64) - s_time
+        bins = np.arange(first_bin,
+                         math.ceil(float(end_times[-1]) / bin_width))
+        times = bins * bin_width
+        result.append((worker_id, times,
+                       occupancy(start_times, end_times, times)))
+    return result
+
+
+def get_heatmap(df, ax, title, bin_width=1):
     """
     * This function takes in the *workers.csv* for each algorithm separately
     and groups by worker id
     * For each worker, the number of tasks running at each second in a time
-    interval are calculated
+    interval are calculated, or at every *bin_width* seconds
     * There are 3 heatmap plots displayed in a window, with a plot each for a
     scheduling algorithm. The X axis has the time in seconds and the Y axis
     has the worker_id
     * In the plot, each block represents number of tasks
     """
-    s_time = min(df["start_time"])
-    df1 = pd.DataFrame()
-    df["start_time"] -= s_time
-    df["end_time"] -= s_time
-    splits1 = list(df.groupby("WorkerID"))
     task_count = []
     seconds = []
     wid = []
-    for i in range(len(splits1)):
-        a = pd.DataFrame(splits1[i][1],
-                         columns=['JobId', 'WorkerID', 'TaskId',
-                                  'start_time', 'end_time'])
-        end_time = a["end_time"].iloc[-1]
-        for m in range(1, math.ceil(float(end_time))):
-            count = 0
-            for n in range(len(a["TaskId"])):
-                if m >= a["start_time"].iloc[n] and m <= a["end_time"].iloc[n]:
-                    count = count + 1
-                else:
-                    pass
-            task_count.append(count)
-            seconds.append(m)
-            wid.append(splits1[i][0])
-
-    df1['WorkerID'] = wid
-    df1['seconds'] = seconds
-    df1['task_count'] = task_count
+    for worker_id, times, counts in worker_occupancy(df, 1, bin_width):
+        task_count.append(counts)
+        seconds.append(times)
+        wid.append(np.full(len(times), worker_id))
+
+    df1 = pd.DataFrame()
+    df1['WorkerID'] = np.concatenate(wid) if wid else []
+    df1['seconds'] = np.concatenate(seconds) if seconds else []
+    df1['task_count'] = np.concatenate(task_count) if task_count else []
     df1 = df1.pivot(index='WorkerID', columns='seconds', values='task_count')
     sns.color_palette("viridis")
     sns.heatmap(df1, annot=False, ax=ax, cmap="Reds")
     ax.set_title(title)
 
 
-def graph_plot(df, ax, title):
+def graph_plot(df, ax, title, bin_width=1):
     """
     * This function takes in the *workers.csv* for each algorithm separately
     and groups by worker id
     * For each worker, the number of tasks running at each second in a time
-    interval are calculated
+    interval are calculated, or at every *bin_width* seconds
     * There are 3 plots displayed in a window, with a plot each for a
     scheduling algorithm. The X axis has the time in seconds and the Y axis
     has the number of tasks
     * For a given scheduling algorithm, each worker is represented with a line
     of a different colour
     """
-    s_time = min(df["start_time"])
-    df["start_time"] -= s_time
-    df["end_time"] -= s_time
-    splits1 = list(df.groupby("WorkerID"))
-
-    for i in range(len(splits1)):
-        time = dict()
-        a = pd.DataFrame(splits1[i][1],
-                         columns=['JobId', 'WorkerID', 'TaskId',
-                                  'start_time', 'end_time', 'duration'])
-        end_time = a["end_time"].iloc[-1]
-        for m in range(0, math.ceil(float(end_time))):
-            count = 0
-            for n in range(len(a["TaskId"])):
-                if m >= a["start_time"].iloc[n] and m <= a["end_time"].iloc[n]:
-                    count = count + 1
-                else:
-                    pass
-            time[m] = count
-        label = "Worker" + ":"+str(splits1[i][0])
-        x = list(time.keys())
-        y = list(time.values())
+    for worker_id, times, counts in worker_occupancy(df, 0, bin_width):
+        label = "Worker" + ":"+str(worker_id)
         ax.set_xlabel('Time')
         ax.set_ylabel('Number of tasks')
-        ax.plot(x, y, marker="o", label=label)
+        ax.plot(times, counts, marker="o", label=label)
         ax.set_title(title)
         ax.legend()
 
 
-def get_analytics():
+def get_analytics(bin_width=1):
     """
     * This function reads all the log files generated for each scheduling
-    algorithm
+    algorithm, from their columnar logs if the master wrote them
     * The objective of this function is to calculate the mean task completion
     time, mean job completion time, median task completion time, median job
     completion time for each of the scheduling algorithms separately
@@ -102,7 +107,7 @@ def get_analytics():
     various scheduling algorithms
     * This function also calls the graph_plot function for each of the
     scheduling algorithms that plots the number of tasks scheduled on each
-    worker at each instance of time
+    worker at each instance of time, every *bin_width* seconds
     """
     fig1, (ax1, ax2, ax3) = plt.subplots(3, figsize=(15, 25))
     fig1.tight_layout(pad=10.0)
@@ -127,9 +132,9 @@ def get_analytics():
     '''
     if os.path.exists('Round-Robin'):
         algo = 'Round-Robin'
-        job1 = pd.read_csv(os.path.join(algo, 'jobs.csv'))
-        task1 = pd.read_csv(os.path.join(algo, 'tasks.csv'))
-        worker1 = pd.read_csv(os.path.join(algo, 'workers.csv'))
+        job1 = load_frame(algo, 'jobs')
+        task1 = load_frame(algo, 'tasks')
+        worker1 = load_frame(algo, 'workers')
 
         df1_w1 = pd.DataFrame(worker1)
         df1_j1 = pd.DataFrame(job1)
@@ -140,8 +145,10 @@ def get_analytics():
         median_salgo1_task = df1_t1["duration"].median()
         median_salgo1_job = df1_j1["duration"].median()
 
-        graph_plot(df1_w1, ax4, 'Round Robin Scheduling')
-        get_heatmap(df1_w1, ax1, 'Round Robin Scheduling')
+        graph_plot(df1_w1, ax4, 'Round Robin Scheduling',
+                   bin_width)
+        get_heatmap(df1_w1, ax1, 'Round Robin Scheduling',
+                    bin_width)
     else:
         pass
 
@@ -152,9 +159,9 @@ def get_analytics():
     '''
     if os.path.exists('Least-Loaded'):
         algo = 'Least-Loaded'
-        job2 = pd.read_csv(os.path.join(algo, 'jobs.csv'))
-        task2 = pd.read_csv(os.path.join(algo, 'tasks.csv'))
-        worker2 = pd.read_csv(os.path.join(algo, 'workers.csv'))
+        job2 = load_frame(algo, 'jobs')
+        task2 = load_frame(algo, 'tasks')
+        worker2 = load_frame(algo, 'workers')
 
         df1_w2 = pd.DataFrame(worker2)
         df1_j2 = pd.DataFrame(job2)
@@ -165,8 +172,10 @@ def get_analytics():
         median_salgo2_task = df1_t2["duration"].median()
         median_salgo2_job = df1_j2["duration"].median()
 
-        graph_plot(df1_w2, ax5, 'Least Loaded Scheduling')
-        get_heatmap(df1_w2, ax2, 'Least Loaded Scheduling')
+        graph_plot(df1_w2, ax5, 'Least Loaded Scheduling',
+                   bin_width)
+        get_heatmap(df1_w2, ax2, 'Least Loaded Scheduling',
+                    bin_width)
     else:
         pass
 
@@ -177,9 +186,9 @@ def get_analytics():
     '''
     if os.path.exists('Random'):
         algo = 'Random'
-        job3 = pd.read_csv(os.path.join(algo, 'jobs.csv'))
-        task3 = pd.read_csv(os.path.join(algo, 'tasks.csv'))
-        worker3 = pd.read_csv(os.path.join(algo, 'workers.csv'))
+        job3 = load_frame(algo, 'jobs')
+        task3 = load_frame(algo, 'tasks')
+        worker3 = load_frame(algo, 'workers')
 
         df1_w3 = pd.DataFrame(worker3)
         df1_j3 = pd.DataFrame(job3)
@@ -190,8 +199,10 @@ def get_analytics():
         median_salgo3_task = df1_t3["duration"].median()
         median_salgo3_job = df1_j3["duration"].median()
 
-        graph_plot(df1_w3, ax6, 'Random Scheduling')
-        get_heatmap(df1_w3, ax3, 'Random Scheduling')
+        graph_plot(df1_w3, ax6, 'Random Scheduling',
+                   bin_width)
+        get_heatmap(df1_w3, ax3, 'Random Scheduling',
+                    bin_width)
     else:
         pass
 
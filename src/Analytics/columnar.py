@@ -0,0 +1,58 @@
+import json
+import os
+from typing import Dict
+
+import numpy as np
+import pandas as pd
+
+
+def has_columnar_logs(folder):
+    """
+    * Checks whether the master wrote the columnar logs of the run in
+    *folder*, i.e. whether it was started with *--columnar*
+    """
+    return os.path.exists(os.path.join(folder, "columnar", "manifest.json"))
+
+
+def load_table(folder, table, mmap=True) -> Dict[str, np.ndarray]:
+    """
+    * Loads the *table* (*jobs*, *tasks* or *workers*) of the run in *folder*
+    from its columnar logs, and returns its columns by name
+    * The columns are memory-mapped. The master compacts the segments of a
+    table when it closes its logs, so the segments of a column are only copied
+    into one array while the run is still going on
+    * The IDs are unicode strings, the times are float64 and the worker IDs
+    are int32
+    """
+    columnar_folder = os.path.join(folder, "columnar")
+    with open(os.path.join(columnar_folder, "manifest.json")) as fHandler:
+        manifest = json.load(fHandler)
+    table_info = manifest["tables"][table]
+
+    columns = dict()
+    for column, dtype in table_info["columns"]:
+        segments = [np.load(os.path.join(columnar_folder,
+                                         segment["files"][column]),
+                            mmap_mode="r" if mmap else None)
+                    for segment in table_info["segments"]]
+        if not segments:
+            columns[column] = np.empty(0, dtype=str if dtype == "str"
+                                       else dtype)
+        elif len(segments) == 1:
+            columns[column] = segments[0]
+        else:
+            columns[column] = np.concatenate(segments)
+    return columns
+
+
+def load_frame(folder, table) -> pd.DataFrame:
+    """
+    * Loads the *table* of the run in *folder* as a DataFrame, with the same
+    columns as the CSV file
+    * The columnar logs are used if they exist, otherwise the CSV file is
+    read with the IDs as strings, so that no *astype(str)* is needed
+    """
+    if has_columnar_logs(folder):
+        return pd.DataFrame(load_table(folder, table), copy=False)
+    return pd.read_csv(os.path.join(folder, f"{table}.csv"),
+                       dtype={"JobID": str, "TaskID": str})
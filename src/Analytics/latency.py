@@ -0,0 +1,73 @@
+"""
+* Computes the end-to-end latency of the jobs submitted by the load generator
+(*LoadGenerator/AsyncLoadGenerator.py*), by joining the times it recorded in
+its *submits.csv* with the *jobs.csv* of the master's run
+* For every job:
+    * the *submit delay* is from its scheduled time up to its submission,
+    i.e. how far behind the load generator was
+    * the *ingest delay* is from its submission up to its arrival at the
+    master
+    * the *end-to-end latency* is from its submission up to the end of its
+    last task
+    * the *scheduled latency* is from its scheduled time up to the end of its
+    last task, which also counts the time the job waited in the load
+    generator
+* Usage, from the *Analytics* folder:
+
+```bash
+$ python3 latency.py Least-Loaded ../submits.csv --output latency.csv
+```
+
+* The master and the load generator have to run on the same machine, or on
+machines with synchronized clocks
+"""
+import argparse
+import json
+
+import pandas as pd
+
+from columnar import load_frame
+from report import summarize
+
+
+def job_latencies(folder, submits_path):
+    """
+    * Returns a DataFrame with a row per job which was both submitted and
+    completed, with its delays and latencies
+    """
+    submits = pd.read_csv(submits_path, dtype={"JobID": str})
+    jobs = load_frame(folder, "jobs")
+    merged = submits.merge(jobs, on="JobID", how="inner")
+    merged["submit_delay"] = merged["submit_time"] - merged["scheduled_time"]
+    merged["ingest_delay"] = merged["start_time"] - merged["submit_time"]
+    merged["end_to_end_latency"] = merged["end_time"] - merged["submit_time"]
+    merged["scheduled_latency"] = \
+        merged["end_time"] - merged["scheduled_time"]
+    return merged, len(submits)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=("Compute the end-to-end "
+                                                  "latency of the submitted "
+                                                  "jobs"))
+    parser.add_argument("RUN_FOLDER",
+                        help="Folder holding the log files of the run")
+    parser.add_argument("SUBMITS", help="submits.csv of the load generator")
+    parser.add_argument("--output",
+                        help="CSV file to write the latency of every job to")
+    cmdArgs = parser.parse_args()
+
+    latencies, submitted = job_latencies(cmdArgs.RUN_FOLDER, cmdArgs.SUBMITS)
+    print(json.dumps({
+        "submitted jobs": submitted,
+        "completed jobs": len(latencies),
+        **{metric: summarize(latencies[metric])
+           for metric in ["submit_delay", "ingest_delay",
+                          "end_to_end_latency", "scheduled_latency"]}
+    }, indent=4))
+    if cmdArgs.output:
+        latencies.to_csv(cmdArgs.output, index=False)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,243 @@
+"""
+* Writes a report comparing any number of runs, without needing a display
+* Every run is a folder holding the log files written by the master, e.g.
+*Analytics/Round-Robin*. The columnar logs are used if the master wrote them
+* For every run, the report holds:
+    * the p50, p90, p99 and maximum of the task and job durations
+    * the makespan, i.e. from the arrival of the first job up to the end of
+    the last one
+    * the slot utilization of every worker, i.e. the time its tasks ran for
+    over its *slots* (from the worker config file) times the makespan
+    * the queueing delay of the jobs, i.e. from their arrival up to the start
+    of their first task
+    * the map to reduce barrier wait of the jobs, i.e. from the end of their
+    last map task up to the start of their first reduce task
+* The map and reduce tasks are told apart using their task IDs, which the
+client code creates as *<job_id>_M<n>* and *<job_id>_R<n>*
+* Usage, from the *Analytics* folder:
+
+```bash
+$ python3 report.py Round-Robin Least-Loaded Random \\
+      --config "../../setup/Copy of config.json" --output report
+```
+
+* The *report* folder then holds *report.json*, *report.csv*,
+*utilization.csv*, *durations.png* and a *<run>_occupancy.png* per run
+"""
+import argparse
+import csv
+import json
+import os
+
+import matplotlib
+# Only render to files, so that no display is needed
+matplotlib.use("Agg")
+import matplotlib.pyplot as plt  # noqa: E402
+import numpy as np  # noqa: E402
+
+from analysis import worker_occupancy  # noqa: E402
+from columnar import load_frame  # noqa: E402
+
+PERCENTILES = [("p50", 50), ("p90", 90), ("p99", 99)]
+
+
+def summarize(values):
+    """
+    * Returns the count, the p50, p90 and p99 percentiles and the maximum of
+    *values*, or None for each of them if there are no values
+    """
+    values = np.asarray(values, dtype=np.float64)
+    summary = {"count": int(len(values))}
+    for name, percentile in PERCENTILES:
+        summary[name] = (float(np.percentile(values, percentile))
+                         if len(values) else None)
+    summary["max"] = float(values.max()) if len(values) else None
+    return summary
+
+
+def job_phases(tasks):
+    """
+    * Takes in the *tasks.csv* of a run, and returns a DataFrame indexed by
+    job ID with the start of the job's first task, and for the jobs with both
+    map and reduce tasks, the end of its last map task and the start of its
+    first reduce task
+    """
+    is_reduce = tasks["TaskID"].astype(str).str.contains("_R", regex=False)
+    first_start = tasks.groupby("JobID")["start_time"].min()
+    last_map_end = tasks[~is_reduce].groupby("JobID")["end_time"].max()
+    first_reduce_start = \
+        tasks[is_reduce].groupby("JobID")["start_time"].min()
+    phases = first_start.to_frame("first_start")
+    phases["last_map_end"] = last_map_end
+    phases["first_reduce_start"] = first_reduce_start
+    return phases
+
+
+def analyse_run(folder, slots):
+    """
+    * Computes the metrics of the run in *folder*, using the *slots* of every
+    worker by worker ID
+    * Returns the metrics, including a row of utilization per worker
+    """
+    jobs = load_frame(folder, "jobs")
+    tasks = load_frame(folder, "tasks")
+    workers = load_frame(folder, "workers")
+
+    makespan = (float(jobs["end_time"].max() - jobs["start_time"].min())
+                if len(jobs) else 0.0)
+
+    phases = job_phases(tasks)
+    arrivals = jobs.set_index("JobID")["start_time"]
+    queueing_delay = (phases["first_start"] -
+                      arrivals.reindex(phases.index)).dropna()
+    barrier_wait = (phases["first_reduce_start"] -
+                    phases["last_map_end"]).dropna()
+
+    busy_time = (workers["end_time"] - workers["start_time"])\
+        .groupby(workers["WorkerID"]).sum()
+    utilization = []
+    for worker_id in sorted(set(slots) | set(busy_time.index.tolist())):
+        worker_slots = slots.get(worker_id)
+        worker_busy = float(busy_time.get(worker_id, 0.0))
+        utilization.append({
+            "worker_id": int(worker_id),
+            "slots": worker_slots,
+            "busy_time": worker_busy,
+            "utilization": (worker_busy / (worker_slots * makespan)
+                            if worker_slots and makespan else None)
+        })
+
+    return {
+        "task_duration": summarize(tasks["duration"]),
+        "job_duration": summarize(jobs["duration"]),
+        "makespan": makespan,
+        "queueing_delay": summarize(queueing_delay),
+        "barrier_wait": summarize(barrier_wait),
+        "utilization": utilization
+    }
+
+
+def plot_durations(runs, path):
+    """
+    * Plots the distributions (CDFs) of the task and job durations of every
+    run, and saves the plot to *path*
+    """
+    fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(15, 5))
+    for name, folder in runs:
+        for ax, table in [(ax1, "tasks"), (ax2, "jobs")]:
+            durations = np.sort(load_frame(folder, table)["duration"]
+                                .to_numpy(dtype=np.float64))
+            ax.plot(durations,
+                    np.arange(1, len(durations) + 1) / max(len(durations), 1),
+                    label=name)
+    for ax, title in [(ax1, "Task durations"), (ax2, "Job durations")]:
+        ax.set_xlabel("Duration (s)")
+        ax.set_ylabel("Fraction of the total")
+        ax.set_title(title)
+        ax.legend()
+    fig.savefig(path, bbox_inches="tight")
+    plt.close(fig)
+
+
+def plot_occupancy(name, folder, path, bin_width):
+    """
+    * Plots the number of tasks running on every worker of the run over time,
+    and saves the plot to *path*
+    """
+    fig, ax = plt.subplots(figsize=(15, 5))
+    for worker_id, times, counts in \
+            worker_occupancy(load_frame(folder, "workers"), 0, bin_width):
+        ax.plot(times, counts, label=f"Worker:{worker_id}")
+    ax.set_xlabel("Time (s)")
+    ax.set_ylabel("Number of tasks")
+    ax.set_title(name)
+    ax.legend()
+    fig.savefig(path, bbox_inches="tight")
+    plt.close(fig)
+
+
+def flatten(metrics):
+    """
+    * Flattens the metrics of a run, without the per-worker utilization, into
+    a single CSV row
+    """
+    row = {"makespan": metrics["makespan"]}
+    for metric in ["task_duration", "job_duration", "queueing_delay",
+                   "barrier_wait"]:
+        for key, value in metrics[metric].items():
+            row[f"{metric}_{key}"] = value
+    return row
+
+
+def write_report(folders, config_path, output, bin_width=1):
+    """
+    * Writes the report of the runs in *folders* to the *output* folder, and
+    returns the metrics of every run by name
+    """
+    with open(config_path) as fHandler:
+        slots = {int(worker["worker_id"]): int(worker["slots"])
+                 for worker in json.load(fHandler)["workers"]}
+    os.makedirs(output, exist_ok=True)
+
+    # The runs are named after their folders, or after their whole paths if
+    # two of the folders have the same name
+    names = [os.path.basename(os.path.normpath(folder)) for folder in folders]
+    runs = [(name if names.count(name) == 1 else os.path.normpath(folder),
+             folder) for name, folder in zip(names, folders)]
+    report = {name: analyse_run(folder, slots) for name, folder in runs}
+
+    with open(os.path.join(output, "report.json"), "w") as fHandler:
+        json.dump(report, fHandler, indent=4)
+
+    rows = [dict(run=name, **flatten(metrics))
+            for name, metrics in report.items()]
+    with open(os.path.join(output, "report.csv"), "w", newline="") as \
+            fHandler:
+        writer = csv.DictWriter(fHandler, fieldnames=list(rows[0]))
+        writer.writeheader()
+        writer.writerows(rows)
+
+    with open(os.path.join(output, "utilization.csv"), "w", newline="") as \
+            fHandler:
+        writer = csv.DictWriter(fHandler, fieldnames=["run", "worker_id",
+                                                      "slots", "busy_time",
+                                                      "utilization"])
+        writer.writeheader()
+        for name, metrics in report.items():
+            for row in metrics["utilization"]:
+                writer.writerow(dict(run=name, **row))
+
+    plot_durations(runs, os.path.join(output, "durations.png"))
+    for name, folder in runs:
+        plot_occupancy(name, folder,
+                       os.path.join(output, "{}_occupancy.png".format(
+                           name.replace(os.sep, "_"))),
+                       bin_width)
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=("Write a report comparing "
+                                                  "the runs of the master"))
+    parser.add_argument("RUN_FOLDERS", nargs="+",
+                        help="Folders holding the log files of the runs")
+    parser.add_argument("--config", required=True,
+                        help=("Worker config file, for the slots of the "
+                              "workers"))
+    parser.add_argument("--output", default="report",
+                        help="Folder to write the report to (default: report)")
+    parser.add_argument("--bin-width", type=float, default=1,
+                        help=("Seconds between the points of the occupancy "
+                              "plots (default: 1)"))
+    cmdArgs = parser.parse_args()
+
+    report = write_report(cmdArgs.RUN_FOLDERS, cmdArgs.config, cmdArgs.output,
+                          cmdArgs.bin_width)
+    for name, metrics in report.items():
+        print(f"{name}: makespan {metrics['makespan']:.3f}s, "
+              f"task p99 {metrics['task_duration']['p99']}, "
+              f"job p99 {metrics['job_duration']['p99']}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,357 @@
+"""Runs a whole cluster on this machine for every chosen scheduler, drives a
+workload through it and compares the results against a stored baseline.
+
+For every scheduler (and master mode), a master and ```--workers``` workers
+are started in a temporary folder from a generated config, the jobs are
+submitted by the load generator (see ```LoadGenerator/```), and the
+benchmark waits for the updates of all the jobs to be logged by the master,
+after which the cluster is torn down. The results are computed from the
+master's ```jobs.csv``` and ```tasks.csv```:
+
+- the throughput, i.e. the completed jobs and tasks per second, from the
+submission of the first job up to the end of the last one
+- the dispatch latency of the tasks, i.e. from the time a task could be
+dispatched (the arrival of its job, or the end of the job's last map task
+for a reduce task) up to its start on a worker
+- the job latency, i.e. from the submission of a job up to the end of its
+last task
+- the CPU time the master used per job (Linux only)
+
+The results are compared against the baseline file, and any metric worse
+than the baseline by more than ```--tolerance``` is reported as a
+regression, in which case the exit status is 1. The baselines depend on the
+machine, so none is shipped: run with ```--update-baseline``` once, on the
+machine the comparisons are made on, to store the results as the baseline.
+The results of the runs are added to the baseline of the same workload, so
+it can be updated one scheduler at a time.
+
+Run from the ```src``` folder:
+
+```bash
+$ python3 -m Benchmarks.cluster_bench --update-baseline
+$ python3 -m Benchmarks.cluster_bench
+$ python3 -m Benchmarks.cluster_bench --algorithms LL --modes asyncio \\
+      --profile heavy-tailed --jobs 100 --rate 20
+```
+
+The workers listen on the ports after ```--base-port``` (default: 4100), and
+the master uses the ports 5000 and 5001 as usual, so make sure no other
+cluster is running.
+"""
+import argparse
+import asyncio
+import csv
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List, Optional, Tuple
+
+from Benchmarks.master_scale_bench import readProcStats, startCluster
+from LoadGenerator.AsyncLoadGenerator import AsyncLoadGenerator, percentile
+from LoadGenerator.Workloads import PROFILES, Workload, arrivalTimes
+
+DEFAULT_BASELINE: str = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "baselines",
+    "cluster_bench.json")
+
+# Whether a higher value of the metric is better, by metric
+METRICS: Dict[str, bool] = {
+    "throughput (jobs/s)": True,
+    "throughput (tasks/s)": True,
+    "dispatch latency p50 (s)": False,
+    "dispatch latency p99 (s)": False,
+    "job latency p50 (s)": False,
+    "job latency p99 (s)": False,
+    "master CPU per job (ms)": False
+}
+
+
+def readRows(path: str) -> List[dict]:
+    """```readRows``` returns the rows of the CSV file at ```path```, or no
+    rows if it does not exist yet.
+    """
+    if not os.path.exists(path):
+        return []
+    with open(path, newline="") as fHandler:
+        return list(csv.DictReader(fHandler))
+
+
+def waitForJobs(jobsPath: str, jobCount: int, timeout: float) -> bool:
+    """```waitForJobs``` waits until the master has logged ```jobCount```
+    completed jobs in ```jobsPath```, or until ```timeout``` seconds have
+    passed.
+
+    **return**: Whether all the jobs completed in time
+
+    **rtype**: bool
+    """
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if len(readRows(jobsPath)) >= jobCount:
+            return True
+        time.sleep(0.1)
+    return False
+
+
+def dispatchLatencies(jobs: List[dict], tasks: List[dict]) -> List[float]:
+    """```dispatchLatencies``` returns the time every task waited from when
+    it could be dispatched up to its start on a worker. A map task, or the
+    reduce task of a job without map tasks, can be dispatched once its job
+    arrives, and a reduce task once the last map task of its job ends.
+    """
+    arrivals = {row["JobID"]: float(row["start_time"]) for row in jobs}
+    lastMapEnds: Dict[str, float] = {}
+    for row in tasks:
+        if "_R" not in row["TaskID"]:
+            lastMapEnds[row["JobID"]] = max(
+                lastMapEnds.get(row["JobID"], 0.0), float(row["end_time"]))
+
+    latencies = []
+    for row in tasks:
+        if row["JobID"] not in arrivals:
+            continue
+        if "_R" in row["TaskID"] and row["JobID"] in lastMapEnds:
+            ready = lastMapEnds[row["JobID"]]
+        else:
+            ready = arrivals[row["JobID"]]
+        latencies.append(float(row["start_time"]) - ready)
+    return latencies
+
+
+def runCluster(folder: str, algorithm: str, use_asyncio: bool,
+               jobs: List[Tuple[float, dict]], cmdArgs) -> dict:
+    """```runCluster``` starts a cluster in ```folder```, submits the
+    ```jobs```, waits for them to complete and tears the cluster down.
+
+    **return**: The results of the run
+
+    **rtype**: dict
+    """
+    master, workers = startCluster(folder, algorithm, use_asyncio,
+                                   cmdArgs.workers, cmdArgs.slots,
+                                   cmdArgs.base_port,
+                                   ["--log-flush-interval", "0.1"],
+                                   cmdArgs.workers_per_process)
+    submitsPath = os.path.join(folder, "submits.csv")
+    try:
+        cpuBefore = readProcStats(master.pid)["cpu"] \
+            if os.path.exists("/proc") else None
+
+        async def submit(output) -> AsyncLoadGenerator:
+            loadGenerator = AsyncLoadGenerator("localhost", 5000,
+                                               cmdArgs.concurrency, output)
+            await loadGenerator.runOpenLoop(iter(jobs))
+            return loadGenerator
+
+        with open(submitsPath, "w", newline="") as output:
+            loadGenerator = asyncio.run(submit(output))
+
+        # The master logs the jobs in Analytics/<algorithm name>
+        analytics = os.path.join(folder, "Analytics")
+        jobsPath = None
+        deadline = time.monotonic() + 10
+        while jobsPath is None and time.monotonic() < deadline:
+            runs = [name for name in os.listdir(analytics)
+                    if os.path.isdir(os.path.join(analytics, name))]
+            if runs:
+                jobsPath = os.path.join(analytics, runs[0], "jobs.csv")
+            else:
+                time.sleep(0.1)
+        completed = jobsPath is not None and \
+            waitForJobs(jobsPath, loadGenerator.sentJobCount, cmdArgs.timeout)
+
+        cpuAfter = readProcStats(master.pid)["cpu"] \
+            if cpuBefore is not None else None
+    finally:
+        # Let the master write out its logs before it exits
+        master.terminate()
+        for worker in workers:
+            worker.kill()
+        try:
+            master.wait(5)
+        except subprocess.TimeoutExpired:
+            master.kill()
+            master.wait()
+        for worker in workers:
+            worker.wait()
+
+    jobRows = readRows(jobsPath) if jobsPath else []
+    taskRows = readRows(os.path.join(os.path.dirname(jobsPath), "tasks.csv")
+                        if jobsPath else "")
+    submits = {row["JobID"]: float(row["submit_time"])
+               for row in readRows(submitsPath)}
+
+    firstSubmit = min(submits.values()) if submits else 0.0
+    lastEnd = max((float(row["end_time"]) for row in jobRows),
+                  default=firstSubmit)
+    span = lastEnd - firstSubmit
+    dispatch = dispatchLatencies(jobRows, taskRows)
+    jobLatencies = [float(row["end_time"]) - submits[row["JobID"]]
+                    for row in jobRows if row["JobID"] in submits]
+
+    def rounded(value: Optional[float], digits: int = 4
+                ) -> Optional[float]:
+        return round(value, digits) if value is not None else None
+
+    return {
+        "completed": completed,
+        "sent jobs": loadGenerator.sentJobCount,
+        "failed jobs": loadGenerator.errorCount,
+        "completed jobs": len(jobRows),
+        "completed tasks": len(taskRows),
+        "throughput (jobs/s)": rounded(len(jobRows) / span if span > 0
+                                       else None, 2),
+        "throughput (tasks/s)": rounded(len(taskRows) / span if span > 0
+                                        else None, 2),
+        "dispatch latency p50 (s)": rounded(percentile(dispatch, 0.5)),
+        "dispatch latency p99 (s)": rounded(percentile(dispatch, 0.99)),
+        "job latency p50 (s)": rounded(percentile(jobLatencies, 0.5)),
+        "job latency p99 (s)": rounded(percentile(jobLatencies, 0.99)),
+        "master CPU per job (ms)": rounded(
+            1000 * (cpuAfter - cpuBefore) / len(jobRows)
+            if cpuAfter is not None and jobRows else None, 3)
+    }
+
+
+def compare(results: Dict[str, dict], baseline: Dict[str, dict],
+            tolerance: float, noiseFloor: float) -> List[str]:
+    """```compare``` returns a line for every metric of ```results``` which
+    is worse than in the ```baseline``` by more than ```tolerance```, e.g.
+    0.25 for 25%. The latencies also have to be worse by more than
+    ```noiseFloor``` seconds.
+    """
+    regressions = []
+    for run, metrics in results.items():
+        if run not in baseline:
+            print(f"There is no baseline for {run}")
+            continue
+        if not metrics["completed"]:
+            regressions.append(f"{run}: not all the jobs completed")
+        for metric, higherIsBetter in METRICS.items():
+            value = metrics.get(metric)
+            reference = baseline[run].get(metric)
+            if value is None or reference is None:
+                continue
+            if higherIsBetter:
+                isWorse = value < reference * (1 - tolerance)
+            else:
+                isWorse = value > reference * (1 + tolerance)
+                if metric.endswith("(s)"):
+                    isWorse = isWorse and value - reference > noiseFloor
+            if isWorse:
+                regressions.append(f"{run}: {metric} is {value}, the "
+                                   f"baseline is {reference}")
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=("Benchmark a local cluster "
+                                                  "and compare the results "
+                                                  "against a baseline"))
+    parser.add_argument("--algorithms", nargs="+",
+                        choices=["LL", "RR", "RANDOM"],
+                        default=["LL", "RR", "RANDOM"])
+    parser.add_argument("--modes", nargs="+",
+                        choices=["threaded", "asyncio"],
+                        default=["threaded"],
+                        help="Master modes to run (default: threaded)")
+    parser.add_argument("--workers", type=int, default=3)
+    parser.add_argument("--slots", type=int, default=4)
+    parser.add_argument("--base-port", type=int, default=4100,
+                        help="The workers listen on the ports after this")
+    parser.add_argument("--workers-per-process", type=int, default=1,
+                        help=("Run the workers this many per process, on "
+                              "one event loop each (default: 1)"))
+    parser.add_argument("--jobs", type=int, default=300)
+    parser.add_argument("--rate", type=float, default=0,
+                        help=("Average jobs per second, or 0 to submit them "
+                              "all at once (default: 0)"))
+    parser.add_argument("--arrival", choices=["poisson", "constant",
+                                              "bursty"], default="poisson")
+    parser.add_argument("--profile", choices=list(PROFILES),
+                        default="client")
+    parser.add_argument("--map-duration", default="uniform:0.01,0.05",
+                        help="Distribution of the map task durations")
+    parser.add_argument("--reduce-duration", default="uniform:0.01,0.05",
+                        help="Distribution of the reduce task durations")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--concurrency", type=int, default=32,
+                        help="Maximum number of connections to the master")
+    parser.add_argument("--timeout", type=float, default=300,
+                        help="Seconds to wait for all the jobs to complete")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE,
+                        help="Baseline file to compare against")
+    parser.add_argument("--update-baseline", action="store_true",
+                        help="Store the results as the baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help=("Relative change from the baseline reported "
+                              "as a regression (default: 0.25)"))
+    parser.add_argument("--noise-floor", type=float, default=0.01,
+                        help=("Seconds a latency has to grow by to be "
+                              "reported (default: 0.01)"))
+    cmdArgs = parser.parse_args()
+
+    # The settings which change the results, stored with the baseline
+    workloadSettings = {key: getattr(cmdArgs, key)
+                        for key in ["workers", "workers_per_process",
+                                    "slots", "jobs", "rate",
+                                    "arrival", "profile", "map_duration",
+                                    "reduce_duration", "seed"]}
+    workload = Workload.fromProfile(cmdArgs.profile, cmdArgs.seed,
+                                    map_duration=cmdArgs.map_duration,
+                                    reduce_duration=cmdArgs.reduce_duration)
+    if cmdArgs.rate:
+        arrivals = arrivalTimes(cmdArgs.arrival, cmdArgs.rate, cmdArgs.seed)
+    else:
+        arrivals = iter(lambda: 0.0, None)
+    jobs = [(arrivalTime, workload.createJobRequest(str(i)))
+            for i, arrivalTime in zip(range(cmdArgs.jobs), arrivals)]
+
+    results: Dict[str, dict] = {}
+    for algorithm in cmdArgs.algorithms:
+        for mode in cmdArgs.modes:
+            with tempfile.TemporaryDirectory() as folder:
+                results[f"{algorithm}/{mode}"] = runCluster(
+                    folder, algorithm, mode == "asyncio", jobs, cmdArgs)
+            print(f"{algorithm}/{mode}:",
+                  json.dumps(results[f"{algorithm}/{mode}"], indent=4))
+
+    isFailed = not all(metrics["completed"] for metrics in results.values())
+    if cmdArgs.update_baseline:
+        # Keep the baselines of the other runs of the same workload
+        baselineResults = {}
+        if os.path.exists(cmdArgs.baseline):
+            with open(cmdArgs.baseline) as fHandler:
+                baseline = json.load(fHandler)
+            if baseline["workload"] == workloadSettings:
+                baselineResults = baseline["results"]
+        baselineResults.update(results)
+        os.makedirs(os.path.dirname(os.path.abspath(cmdArgs.baseline)),
+                    exist_ok=True)
+        with open(cmdArgs.baseline, "w") as fHandler:
+            json.dump({"workload": workloadSettings,
+                       "results": baselineResults}, fHandler, indent=4)
+        print(f"Stored the results as the baseline in {cmdArgs.baseline}")
+    elif not os.path.exists(cmdArgs.baseline):
+        print(f"There is no baseline in {cmdArgs.baseline} to compare "
+              "against, run with --update-baseline to store one")
+    else:
+        with open(cmdArgs.baseline) as fHandler:
+            baseline = json.load(fHandler)
+        if baseline["workload"] != workloadSettings:
+            print("The baseline was run with a different workload, "
+                  f"{baseline['workload']}, so it is not compared against")
+        else:
+            regressions = compare(results, baseline["results"],
+                                  cmdArgs.tolerance, cmdArgs.noise_floor)
+            for regression in regressions:
+                print(f"REGRESSION: {regression}")
+            if not regressions:
+                print("No regressions against the baseline")
+            isFailed = isFailed or bool(regressions)
+
+    if isFailed:
+        sys.exit(1)
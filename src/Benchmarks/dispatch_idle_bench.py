@@ -0,0 +1,238 @@
+"""Measures how long worker slots stay idle while there are tasks waiting to
+be dispatched, for any of the three schedulers.
+
+The real ```jobDispatcher``` runs against a ```StateTracker``` whose worker
+sockets are replaced by in-process loopback objects. Each loopback worker
+holds a slot for the task's duration and then reports back the same way
+```workerUpdates``` does, i.e. ```updateJob``` followed by ```freeSlot```.
+
+Run from the ```src``` folder:
+
+```bash
+$ python3 -m Benchmarks.dispatch_idle_bench LL
+$ python3 -m Benchmarks.dispatch_idle_bench LL --poll-interval 1
+```
+
+The second command replaces the dispatch condition with one that ignores the
+notifications and sleeps for the given interval instead, which is how the
+dispatchers behaved before they became event driven. (The old dispatchers
+also busy-waited on an empty job queue; here that case sleeps as well.)
+"""
+import argparse
+import contextlib
+import json
+import os
+import tempfile
+import threading
+import time
+from typing import List
+
+from Communication.protocol import FrameReader
+from Communication.security import SESSIONS
+from Locks.DispatchCondition import DispatchCondition
+from MasterUtils.WorkerStateTracker import StateTracker
+from UpdateTracker.JobUpdateTracker import Tracker as JobUpdateTracker
+from Scheduler.JobRequests import JobRequestHandler
+import Scheduler.LeastLoadedScheduling as LeastLoadedScheduling
+import Scheduler.RoundRobinScheduling as RoundRobinScheduling
+import Scheduler.RandomScheduling as RandomScheduling
+
+
+class _PollingDispatchCondition(DispatchCondition):
+    """Ignores the notifications and sleeps for a fixed interval, like the
+    dispatchers used to do with ```time.sleep(1)```.
+    """
+    def __init__(self, interval: float) -> None:
+        super().__init__()
+        self.interval = interval
+
+    def waitForChange(self, generation, timeout=None) -> bool:
+        time.sleep(self.interval)
+        return True
+
+
+class _LoopbackWorker:
+    """Stands in for the worker's task socket. Every task that is sent to it
+    occupies a slot for the task's duration, after which the update is
+    applied to the master's trackers.
+    """
+    def __init__(self, workerID: int,
+                 workerStateTracker: StateTracker,
+                 jobUpdateTracker: JobUpdateTracker,
+                 onComplete) -> None:
+        self.workerID = workerID
+        self.workerStateTracker = workerStateTracker
+        self.jobUpdateTracker = jobUpdateTracker
+        self.onComplete = onComplete
+        self.frameReader = FrameReader()
+
+    def sendall(self, data: bytes) -> None:
+        start_time = time.time()
+        self.frameReader.feed(data)
+        frame = self.frameReader.nextFrame()
+        _state = self.workerStateTracker.workerState[self.workerID]
+        while frame is not None:
+            request = _state["codec"].decodeMessageToWorker(
+                _state["session"].decrypt(frame))
+            threading.Timer(request["task"]["duration"], self._complete,
+                            args=(request, start_time)).start()
+            frame = self.frameReader.nextFrame()
+
+    def _complete(self, request: dict, start_time: float) -> None:
+        end_time = time.time()
+        update = {
+            "worker_id": self.workerID,
+            "job_id": request["job_id"],
+            "task_family": request["task_family"],
+            "task": {
+                "task_id": request["task"]["task_id"],
+                "start_time": start_time,
+                "end_time": end_time
+            }
+        }
+        self.jobUpdateTracker.LOCK.acquire()
+        self.jobUpdateTracker.updateJob(update)
+        self.jobUpdateTracker.LOCK.release()
+
+        self.workerStateTracker.LOCK.acquire()
+        self.workerStateTracker.freeSlot(self.workerID)
+        self.workerStateTracker.LOCK.release()
+
+        self.onComplete(end_time - start_time)
+
+    def close(self) -> None:
+        pass
+
+
+def createJobs(job_count: int, map_count: int, reduce_count: int,
+               duration: float) -> List[dict]:
+    """```createJobs``` returns ```job_count``` job requests in the same
+    format as the ones sent by the client code.
+    """
+    jobs = []
+    for job_id in range(job_count):
+        jobs.append({
+            "job_id": str(job_id),
+            "map_tasks": [{"task_id": f"{job_id}_M{i}", "duration": duration}
+                          for i in range(map_count)],
+            "reduce_tasks": [{"task_id": f"{job_id}_R{i}",
+                              "duration": duration}
+                             for i in range(reduce_count)]
+        })
+    return jobs
+
+
+def runBenchmark(algorithm: str, worker_count: int, slots: int,
+                 jobs: List[dict], poll_interval: float = None,
+                 security_mode: str = "aead") -> dict:
+    """```runBenchmark``` dispatches all the ```jobs``` at once, waits for
+    all their tasks to complete and returns the measured statistics.
+
+    The *slot-idle time* is the total slot capacity over the run (slots x
+    makespan) minus the time the slots were actually busy.
+    """
+    conf = {"workers": [{"worker_id": i, "slots": slots, "port": 0}
+                        for i in range(1, worker_count + 1)]}
+    workerStateTracker = StateTracker(conf, connect=False)
+    jobUpdateTracker = JobUpdateTracker(tempfile.mkdtemp())
+    requestHandler = JobRequestHandler(jobUpdateTracker)
+
+    total_tasks = sum(len(job["map_tasks"]) + len(job["reduce_tasks"])
+                      for job in jobs)
+    busy_times: List[float] = []
+    finished = threading.Event()
+    busy_lock = threading.Lock()
+
+    def onComplete(busy_time: float) -> None:
+        busy_lock.acquire()
+        busy_times.append(busy_time)
+        if len(busy_times) == total_tasks:
+            finished.set()
+        busy_lock.release()
+
+    for workerID in workerStateTracker.workerIDs:
+        session = SESSIONS[security_mode]
+        workerStateTracker.workerState[workerID]["session"] = \
+            session(session.generateKey())
+        workerStateTracker.workerState[workerID]["socket"] = \
+            _LoopbackWorker(workerID, workerStateTracker, jobUpdateTracker,
+                            onComplete)
+        workerStateTracker.startWorkerSender(workerID)
+
+    modules = {
+        "LL": LeastLoadedScheduling,
+        "RR": RoundRobinScheduling,
+        "RANDOM": RandomScheduling
+    }
+    if poll_interval is not None:
+        modules[algorithm].dispatch = _PollingDispatchCondition(poll_interval)
+
+    if algorithm == "LL":
+        target = LeastLoadedScheduling.LeastLoadedScheduler.jobDispatcher
+        args = (requestHandler, workerStateTracker)
+    elif algorithm == "RR":
+        target = RoundRobinScheduling.RoundRobinScheduler.jobDispatcher
+        args = (requestHandler, workerStateTracker, worker_count)
+    else:
+        target = RandomScheduling.RandomScheduler.jobDispatcher
+        args = (requestHandler, workerStateTracker)
+
+    dispatcher = threading.Thread(name="Benchmark Job Dispatcher",
+                                  target=target, args=args)
+    dispatcher.daemon = True
+
+    cpu_start = time.process_time()
+    wall_start = time.time()
+    for job in jobs:
+        jobUpdateTracker.LOCK.acquire()
+        jobUpdateTracker.addJobRequest(job)
+        jobUpdateTracker.LOCK.release()
+
+        requestHandler.LOCK.acquire()
+        requestHandler.addJobRequest(job)
+        requestHandler.LOCK.release()
+    dispatcher.start()
+    finished.wait()
+    makespan = time.time() - wall_start
+    cpu_time = time.process_time() - cpu_start
+
+    capacity = makespan * worker_count * slots
+    busy = sum(busy_times)
+    return {
+        "algorithm": algorithm,
+        "mode": ("event" if poll_interval is None
+                 else f"poll every {poll_interval}s"),
+        "tasks": total_tasks,
+        "makespan (s)": round(makespan, 4),
+        "slot-idle time (s)": round(capacity - busy, 4),
+        "slot-idle fraction": round((capacity - busy) / capacity, 4),
+        "master CPU time (s)": round(cpu_time, 4)
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=("Measure the slot-idle "
+                                                  "time of a scheduler"))
+    parser.add_argument("algorithm", choices=["LL", "RR", "RANDOM"])
+    parser.add_argument("--workers", type=int, default=3)
+    parser.add_argument("--slots", type=int, default=2)
+    parser.add_argument("--jobs", type=int, default=20)
+    parser.add_argument("--maps", type=int, default=3)
+    parser.add_argument("--reduces", type=int, default=1)
+    parser.add_argument("--duration", type=float, default=0.2)
+    parser.add_argument("--poll-interval", type=float, default=None,
+                        help=("Emulate the old sleep based dispatcher with "
+                              "this polling interval"))
+    parser.add_argument("--security", choices=list(SESSIONS), default="aead")
+    cmdArgs = parser.parse_args()
+
+    # Silence the master's debug output, it is not what is being measured
+    with open(os.devnull, "w") as devnull:
+        with contextlib.redirect_stdout(devnull):
+            result = runBenchmark(cmdArgs.algorithm, cmdArgs.workers,
+                                  cmdArgs.slots,
+                                  createJobs(cmdArgs.jobs, cmdArgs.maps,
+                                             cmdArgs.reduces,
+                                             cmdArgs.duration),
+                                  cmdArgs.poll_interval, cmdArgs.security)
+    print(json.dumps(result, indent=4))
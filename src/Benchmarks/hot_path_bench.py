@@ -0,0 +1,316 @@
+"""Microbenchmarks for the code the master runs for every task, to find out
+which stage caps the dispatch rate.
+
+The stages are, in the order a task goes through them:
+
+| Benchmark | Operation | Parameters |
+|:-:|:-:|:-:|
+| ```getWaitingTask``` | Takes the next task to dispatch | jobs, tasks |
+| ```getLeastLoadedWorkerID``` | Picks the least loaded worker, allocates \
+a slot on it and frees one on a busy worker | workers |
+| ```slots``` | ```isWorkerFree```, ```allocateSlot``` and ```freeSlot``` \
+on the next worker | workers |
+| ```createMessageToWorker``` | Creates the JSON message of a task | |
+| ```encrypt``` | Encrypts the encoded message of a task | |
+| ```decrypt``` | Decrypts the encoded message of a task | |
+| ```worker update``` | Reads a frame of updates from a worker, decrypts \
+it, splits the batch and decodes the update | batch |
+| ```updateJob``` | Records the update of a task, and writes its rows to \
+the CSV files | jobs, tasks |
+
+Every benchmark is run for each combination of the values of its
+parameters: the number of jobs waiting or in flight, the number of map
+tasks per job, the number of workers and the number of updates per frame
+sent by a worker. For each, it reports:
+
+- the mean time per operation, in nanoseconds, without the overhead of the
+benchmark loop
+- the memory allocated per operation, i.e. the mean peak of the memory
+allocated while the operation runs, traced by ```tracemalloc```
+- the memory retained per operation, e.g. by the records of the tasks
+
+The master's output is written to ```os.devnull```, and the CSV files of
+```updateJob``` are written inline, without the logging thread, into a
+temporary folder.
+
+Run from the ```src``` folder:
+
+```bash
+$ python3 -m Benchmarks.hot_path_bench
+$ python3 -m Benchmarks.hot_path_bench --benchmarks getWaitingTask \\
+      updateJob --jobs 10000 --tasks 1 10 100
+$ python3 -m Benchmarks.hot_path_bench --security-mode aead --codec binary
+```
+"""
+import argparse
+import contextlib
+import itertools
+import json
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+from typing import Callable, Dict, List, Tuple
+
+from Communication.codec import CODECS
+from Communication.protocol import FrameReader, YACS_Protocol
+from Communication.security import SESSIONS
+from MasterUtils.WorkerStateTracker import StateTracker
+from Scheduler.JobRequests import JobRequestHandler
+from UpdateTracker.JobUpdateTracker import Tracker as JobUpdateTracker
+
+# The operation, and the number of times it can be run
+operationType = Tuple[Callable[[], object], int]
+
+
+def createJobRequests(job_count: int, task_count: int) -> List[dict]:
+    """```createJobRequests``` returns ```job_count``` job requests, in the
+    format of the client code, with ```task_count``` map tasks each.
+    """
+    return [{"job_id": str(job),
+             "map_tasks": [{"task_id": f"{job}_M{task}", "duration": 1}
+                           for task in range(task_count)],
+             "reduce_tasks": []}
+            for job in range(job_count)]
+
+
+def createStateTracker(worker_count: int) -> StateTracker:
+    """```createStateTracker``` returns the state tracker of
+    ```worker_count``` workers with 1 to 8 slots, loaded to about half of
+    their capacity.
+    """
+    random.seed(worker_count)
+    conf = {"workers": [{"worker_id": i, "slots": random.randint(1, 8),
+                         "port": 0}
+                        for i in range(1, worker_count + 1)]}
+    workerStateTracker = StateTracker(conf, connect=False)
+    for workerID in workerStateTracker.workerIDs:
+        workerStateTracker.allocateSlot(
+            workerID, workerStateTracker.workerState[workerID]["slots"] // 2)
+    return workerStateTracker
+
+
+def getWaitingTask(params: dict, operations: int) -> operationType:
+    """Takes every map task of the waiting jobs."""
+    jobRequestHandler = JobRequestHandler(
+        JobUpdateTracker("Benchmark", threadedLog=False))
+    for jobRequest in createJobRequests(params["jobs"], params["tasks"]):
+        jobRequestHandler.addJobRequest(jobRequest)
+    return (jobRequestHandler.getWaitingTask,
+            params["jobs"] * params["tasks"])
+
+
+def getLeastLoadedWorkerID(params: dict, operations: int) -> operationType:
+    """Picks the least loaded worker, as the Least-Loaded scheduler does."""
+    workerStateTracker = createStateTracker(params["workers"])
+    busy = [workerID for workerID in workerStateTracker.workerIDs
+            for _ in range(workerStateTracker.workerState[workerID]["slots"]
+                           // 2)]
+
+    def operation() -> None:
+        workerID = workerStateTracker.getLeastLoadedWorkerID()
+        workerStateTracker.allocateSlot(workerID)
+        busy.append(workerID)
+
+        _index = random.randrange(len(busy))
+        busy[_index], busy[-1] = busy[-1], busy[_index]
+        workerStateTracker.freeSlot(busy.pop())
+    return (operation, operations)
+
+
+def slots(params: dict, operations: int) -> operationType:
+    """Checks for, allocates and frees a slot on each worker in turn, as the
+    Round-Robin scheduler and the worker updates do.
+    """
+    workerStateTracker = createStateTracker(params["workers"])
+    workerIDs = itertools.cycle(workerStateTracker.workerIDs)
+
+    def operation() -> None:
+        workerID = next(workerIDs)
+        if workerStateTracker.isWorkerFree(workerID):
+            workerStateTracker.allocateSlot(workerID)
+            workerStateTracker.freeSlot(workerID)
+    return (operation, operations)
+
+
+def createMessageToWorker(params: dict, operations: int) -> operationType:
+    """Creates the message sent to a worker for a task."""
+    return (lambda: YACS_Protocol.createMessageToWorker("1042", "map",
+                                                        "1042_M3", 4, 2),
+            operations)
+
+
+def encrypt(params: dict, operations: int) -> operationType:
+    """Encrypts the message of a task, as the master does before sending
+    it.
+    """
+    session = SESSIONS[params["security mode"]](
+        SESSIONS[params["security mode"]].generateKey())
+    payload = CODECS[params["codec"]].encodeMessageToWorker("1042", "map",
+                                                            "1042_M3", 4, 2)
+    return (lambda: session.encrypt(payload), operations)
+
+
+def decrypt(params: dict, operations: int) -> operationType:
+    """Decrypts the message of a task, as the worker does once it receives
+    it.
+    """
+    session = SESSIONS[params["security mode"]](
+        SESSIONS[params["security mode"]].generateKey())
+    token = session.encrypt(CODECS[params["codec"]].encodeMessageToWorker(
+        "1042", "map", "1042_M3", 4, 2))
+    return (lambda: session.decrypt(token), operations)
+
+
+def workerUpdate(params: dict, operations: int) -> operationType:
+    """Reads the updates sent by a worker, as the master's listener does.
+    An operation is one update, i.e. a frame is read every ```batch```
+    operations.
+    """
+    codec = CODECS[params["codec"]]
+    session = SESSIONS[params["security mode"]](
+        SESSIONS[params["security mode"]].generateKey())
+    frame = YACS_Protocol.createFrame(session.encrypt(
+        YACS_Protocol.createBatch([
+            codec.encodeMessageToMaster("1042", "map", f"1042_M{task}",
+                                        1607398876.0560403,
+                                        1607398880.0674996, 2)
+            for task in range(params["batch"])])))
+    frameReader = FrameReader()
+    decoded: List[dict] = []
+
+    def operation() -> None:
+        if not decoded:
+            frameReader.feed(frame)
+            decoded.extend(codec.decodeMessageToMaster(message)
+                           for payload in frameReader.nextFrames()
+                           for message in YACS_Protocol.splitBatch(
+                               session.decrypt(payload)))
+        decoded.pop()
+    return (operation, operations)
+
+
+def updateJob(params: dict, operations: int) -> operationType:
+    """Records the update of every map task of the jobs in flight."""
+    jobUpdateTracker = JobUpdateTracker("Benchmark", threadedLog=False)
+    jobRequests = createJobRequests(params["jobs"], params["tasks"])
+    for jobRequest in jobRequests:
+        jobUpdateTracker.addJobRequest(jobRequest)
+    updates = iter([{"worker_id": 1, "job_id": jobRequest["job_id"],
+                     "task_family": "map",
+                     "task": {"task_id": task["task_id"],
+                              "start_time": 1607398876.0560403,
+                              "end_time": 1607398880.0674996}}
+                    for jobRequest in jobRequests
+                    for task in jobRequest["map_tasks"]])
+    return (lambda: jobUpdateTracker.updateJob(next(updates)),
+            params["jobs"] * params["tasks"])
+
+
+# The benchmarks, and the parameters that they depend on
+BENCHMARKS: Dict[str, Tuple[Callable[[dict, int], operationType],
+                            Tuple[str, ...]]] = {
+    "getWaitingTask": (getWaitingTask, ("jobs", "tasks")),
+    "getLeastLoadedWorkerID": (getLeastLoadedWorkerID, ("workers",)),
+    "slots": (slots, ("workers",)),
+    "createMessageToWorker": (createMessageToWorker, ()),
+    "encrypt": (encrypt, ("security mode", "codec")),
+    "decrypt": (decrypt, ("security mode", "codec")),
+    "worker update": (workerUpdate, ("security mode", "codec", "batch")),
+    "updateJob": (updateJob, ("jobs", "tasks"))
+}
+
+
+def loopOverhead(operations: int) -> float:
+    """```loopOverhead``` returns the time in nanoseconds taken by the
+    benchmark loop to call an operation which does nothing.
+    """
+    def operation() -> None:
+        pass
+
+    start = time.perf_counter_ns()
+    for _ in range(operations):
+        operation()
+    return (time.perf_counter_ns() - start) / operations
+
+
+def benchmark(setup: Callable[[dict, int], operationType], params: dict,
+              operations: int, overhead: float) -> dict:
+    """```benchmark``` times the operation created by ```setup```, and then
+    traces the memory it allocates, using a new operation, as tracing slows
+    it down.
+
+    **return**: The time and memory per operation
+
+    **rtype**: dict
+    """
+    operation, count = setup(params, operations)
+    start = time.perf_counter_ns()
+    for _ in range(count):
+        operation()
+    elapsed = time.perf_counter_ns() - start
+
+    operation, count = setup(params, operations)
+    allocated = 0
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    for _ in range(count):
+        current, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        operation()
+        allocated += tracemalloc.get_traced_memory()[1] - current
+    retained = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+
+    return {
+        "ns/op": round(max(elapsed / count - overhead, 0)),
+        "allocated (B/op)": round(allocated / count),
+        "retained (B/op)": round(retained / count)
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=("Benchmark the master's "
+                                                  "code for every task"))
+    parser.add_argument("--benchmarks", nargs="+", choices=list(BENCHMARKS),
+                        default=list(BENCHMARKS))
+    parser.add_argument("--jobs", type=int, nargs="+", default=[100, 10000],
+                        help="Numbers of jobs waiting or in flight")
+    parser.add_argument("--tasks", type=int, nargs="+", default=[1, 10],
+                        help="Numbers of map tasks per job")
+    parser.add_argument("--workers", type=int, nargs="+",
+                        default=[3, 1000], help="Numbers of workers")
+    parser.add_argument("--batch", type=int, nargs="+", default=[1, 16],
+                        help="Numbers of updates per frame from a worker")
+    parser.add_argument("--security-mode", choices=list(SESSIONS),
+                        default="fernet")
+    parser.add_argument("--codec", choices=list(CODECS), default="json")
+    parser.add_argument("--operations", type=int, default=20000,
+                        help=("Operations per run, for the benchmarks which "
+                              "do not depend on the number of jobs"))
+    cmdArgs = parser.parse_args()
+
+    values = {"jobs": cmdArgs.jobs, "tasks": cmdArgs.tasks,
+              "workers": cmdArgs.workers, "batch": cmdArgs.batch,
+              "security mode": [cmdArgs.security_mode],
+              "codec": [cmdArgs.codec]}
+    overhead = loopOverhead(cmdArgs.operations)
+
+    results = []
+    with tempfile.TemporaryDirectory() as folder, \
+            open(os.devnull, "w") as devnull:
+        # The job update tracker writes to ./Analytics/<algorithm>
+        os.chdir(folder)
+        os.mkdir("Analytics")
+        for name in cmdArgs.benchmarks:
+            setup, paramNames = BENCHMARKS[name]
+            for combination in itertools.product(*[values[paramName]
+                                                   for paramName
+                                                   in paramNames]):
+                params = dict(zip(paramNames, combination))
+                with contextlib.redirect_stdout(devnull):
+                    result = benchmark(setup, params, cmdArgs.operations,
+                                       overhead)
+                results.append({"benchmark": name, **params, **result})
+    print(json.dumps(results, indent=4))
@@ -0,0 +1,93 @@
+"""Microbenchmark for picking the least loaded worker, as the Least-Loaded
+scheduler does for every dispatched task.
+
+Each operation picks the least loaded worker, allocates a slot on it and
+frees a slot on a random busy worker, which keeps the cluster partially
+loaded. The heap based ```StateTracker.getLeastLoadedWorkerID``` is compared
+against the linear scan over all the workers that it replaced.
+
+Run from the ```src``` folder:
+
+```bash
+$ python3 -m Benchmarks.least_loaded_bench
+$ python3 -m Benchmarks.least_loaded_bench --workers 10 1000 10000
+```
+"""
+import argparse
+import json
+import random
+import time
+from typing import List, Optional
+
+from MasterUtils.WorkerStateTracker import StateTracker
+
+
+def linearScanLeastLoaded(workerStateTracker: StateTracker) -> Optional[int]:
+    """The linear scan that ```getLeastLoadedWorkerID``` used to do."""
+    _least_loaded_workerID = None
+    _least_loaded_workerFreeSlots = 0
+
+    for workerID in workerStateTracker.workerIDs:
+        _free_slot_count = \
+            workerStateTracker.workerState[workerID]["free slots"]
+        if _free_slot_count > _least_loaded_workerFreeSlots:
+            _least_loaded_workerID = workerID
+            _least_loaded_workerFreeSlots = _free_slot_count
+
+    return _least_loaded_workerID
+
+
+def benchmark(worker_count: int, operations: int, pick) -> float:
+    """```benchmark``` returns the mean time in nanoseconds taken by one
+    *pick, allocate and free* operation, using ```pick``` to select the least
+    loaded worker.
+    """
+    random.seed(worker_count)
+    conf = {"workers": [{"worker_id": i, "slots": random.randint(1, 8),
+                         "port": 0}
+                        for i in range(1, worker_count + 1)]}
+    workerStateTracker = StateTracker(conf, connect=False)
+
+    # Load the cluster to about half of its capacity
+    busy: List[int] = []
+    for workerID in workerStateTracker.workerIDs:
+        for _ in range(workerStateTracker.workerState[workerID]["slots"] // 2):
+            workerStateTracker.allocateSlot(workerID)
+            busy.append(workerID)
+
+    start = time.perf_counter_ns()
+    for _ in range(operations):
+        workerID = pick(workerStateTracker)
+        workerStateTracker.allocateSlot(workerID)
+        busy.append(workerID)
+
+        _index = random.randrange(len(busy))
+        busy[_index], busy[-1] = busy[-1], busy[_index]
+        workerStateTracker.freeSlot(busy.pop())
+    return (time.perf_counter_ns() - start) / operations
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=("Benchmark the least "
+                                                  "loaded worker selection"))
+    parser.add_argument("--workers", type=int, nargs="+",
+                        default=[10, 1000, 10000])
+    parser.add_argument("--operations", type=int, default=20000)
+    cmdArgs = parser.parse_args()
+
+    results = []
+    for worker_count in cmdArgs.workers:
+        # The linear scan is far too slow for large clusters, so fewer
+        # operations are run for it
+        _scan_operations = max(100, cmdArgs.operations * 10 // worker_count)
+        results.append({
+            "workers": worker_count,
+            "heap (ns/op)": round(benchmark(worker_count, cmdArgs.operations,
+                                            StateTracker
+                                            .getLeastLoadedWorkerID)),
+            "linear scan (ns/op)": round(benchmark(worker_count,
+                                                   min(_scan_operations,
+                                                       cmdArgs.operations),
+                                                   linearScanLeastLoaded))
+        })
+    print(json.dumps(results, indent=4))
@@ -0,0 +1,213 @@
+"""Measures the CPU time and memory used by the master while it holds a large
+number of concurrent jobs, for both the threaded master and the asyncio
+master (```master.py --asyncio```).
+
+The master and its workers are started as separate processes, in a
+temporary folder. All the jobs are submitted at once, and their tasks last
+long enough for all of them to still be in flight while the master is
+measured. The measurements are read from ```/proc```, hence this only runs
+on Linux.
+
+Run from the ```src``` folder:
+
+```bash
+$ python3 -m Benchmarks.master_scale_bench
+$ python3 -m Benchmarks.master_scale_bench --jobs 1000 --window 5
+$ python3 -m Benchmarks.master_scale_bench --workers 500 \\
+      --workers-per-process 100
+```
+"""
+import argparse
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from typing import List, Sequence, Tuple
+
+SRC_DIR: str = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CLOCK_TICKS: int = os.sysconf("SC_CLK_TCK")
+
+
+def readProcStats(pid: int) -> dict:
+    """```readProcStats``` returns the CPU time (in seconds), the current and
+    peak resident memory (in MiB) and the thread count of the process.
+    """
+    with open(f"/proc/{pid}/stat") as fHandler:
+        # The fields after the process name, which may contain spaces
+        fields = fHandler.read().rsplit(")", 1)[1].split()
+    status = {}
+    with open(f"/proc/{pid}/status") as fHandler:
+        for line in fHandler:
+            key, _, value = line.partition(":")
+            status[key] = value.strip()
+    return {
+        "cpu": (int(fields[11]) + int(fields[12])) / CLOCK_TICKS,
+        "rss": int(status["VmRSS"].split()[0]) / 1024,
+        "peak rss": int(status["VmHWM"].split()[0]) / 1024,
+        "threads": int(status["Threads"])
+    }
+
+
+def startCluster(folder: str, algorithm: str, use_asyncio: bool,
+                 worker_count: int, slots: int, base_port: int,
+                 master_args: Sequence[str] = (),
+                 workers_per_process: int = 1,
+                 timeout: float = 60
+                 ) -> Tuple[subprocess.Popen, List[subprocess.Popen]]:
+    """```startCluster``` starts the workers and the master, with their
+    output discarded, and waits until the master accepts job requests, i.e.
+    all the workers have connected back to it. The master is given the
+    ```master_args``` as well. If ```workers_per_process``` is more than 1,
+    the workers are run that many per process by ```worker.py --count```.
+    """
+    config_path = os.path.join(folder, "config.json")
+    with open(config_path, "w") as fHandler:
+        json.dump({"workers": [{"worker_id": i, "slots": slots,
+                                "port": base_port + i}
+                               for i in range(1, worker_count + 1)]},
+                  fHandler)
+    os.makedirs(os.path.join(folder, "Analytics"), exist_ok=True)
+
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(
+        [SRC_DIR] + [path for path in [env.get("PYTHONPATH")] if path])
+
+    workers = [subprocess.Popen([sys.executable,
+                                 os.path.join(SRC_DIR, "worker.py"),
+                                 str(base_port + i), str(i)] +
+                                (["--count", str(min(workers_per_process,
+                                                     worker_count - i + 1))]
+                                 if workers_per_process > 1 else []),
+                                cwd=folder, env=env,
+                                stdout=subprocess.DEVNULL,
+                                stderr=subprocess.DEVNULL)
+               for i in range(1, worker_count + 1, workers_per_process)]
+
+    # The master keeps retrying the workers until they are listening
+    master = subprocess.Popen([sys.executable,
+                               os.path.join(SRC_DIR, "master.py"),
+                               config_path, algorithm] +
+                              (["--asyncio"] if use_asyncio else []) +
+                              list(master_args),
+                              cwd=folder, env=env,
+                              stdout=subprocess.DEVNULL,
+                              stderr=subprocess.DEVNULL)
+    waitForMaster(master, timeout)
+    return master, workers
+
+
+def waitForMaster(master: subprocess.Popen, timeout: float) -> None:
+    """```waitForMaster``` waits until the master listens for job requests,
+    which it only does once the quorum of workers have connected back. The
+    master ignores the empty connections used to check that.
+    """
+    deadline = time.monotonic() + timeout
+    while True:
+        if master.poll() is not None:
+            raise RuntimeError("The master exited with code "
+                               f"{master.returncode} before accepting job "
+                               "requests")
+        try:
+            with socket.create_connection(("localhost", 5000)):
+                return
+        except OSError:
+            if time.monotonic() > deadline:
+                raise RuntimeError("The master did not accept job requests "
+                                   f"within {timeout:g}s")
+            time.sleep(0.1)
+
+
+def submitJobs(job_count: int, duration: float) -> None:
+    """```submitJobs``` sends ```job_count``` job requests, of one map and
+    one reduce task each, the same way as the client code does.
+    """
+    for job_id in range(job_count):
+        request = {
+            "job_id": str(job_id),
+            "map_tasks": [{"task_id": f"{job_id}_M0", "duration": duration}],
+            "reduce_tasks": [{"task_id": f"{job_id}_R0",
+                              "duration": duration}]
+        }
+        with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+            sock.connect(("localhost", 5000))
+            sock.sendall(json.dumps(request).encode())
+
+
+def runBenchmark(algorithm: str, use_asyncio: bool, job_count: int,
+                 worker_count: int, slots: int, duration: float,
+                 window: float, base_port: int,
+                 workers_per_process: int = 1) -> dict:
+    """```runBenchmark``` submits the jobs to a new cluster, and measures the
+    master while the jobs are in flight.
+    """
+    with tempfile.TemporaryDirectory() as folder:
+        master, workers = startCluster(folder, algorithm, use_asyncio,
+                                       worker_count, slots, base_port,
+                                       workers_per_process=(
+                                           workers_per_process))
+        try:
+            before = readProcStats(master.pid)
+            submit_start = time.time()
+            submitJobs(job_count, duration)
+            submit_time = time.time() - submit_start
+            submitted = readProcStats(master.pid)
+
+            time.sleep(window)
+            after = readProcStats(master.pid)
+        finally:
+            master.kill()
+            for worker in workers:
+                worker.kill()
+            master.wait()
+            for worker in workers:
+                worker.wait()
+
+    return {
+        "master": "asyncio" if use_asyncio else "threaded",
+        "jobs": job_count,
+        "submission time (s)": round(submit_time, 3),
+        "master CPU during submission (s)": round(submitted["cpu"] -
+                                                  before["cpu"], 3),
+        "master CPU while in flight (s per s)": round((after["cpu"] -
+                                                       submitted["cpu"]) /
+                                                      window, 3),
+        "master threads": after["threads"],
+        "master RSS (MiB)": round(after["rss"], 1),
+        "master peak RSS (MiB)": round(after["peak rss"], 1)
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=("Measure the master's CPU "
+                                                  "and memory with many "
+                                                  "concurrent jobs"))
+    parser.add_argument("--algorithm", choices=["LL", "RR", "RANDOM"],
+                        default="LL")
+    parser.add_argument("--jobs", type=int, default=10000)
+    parser.add_argument("--workers", type=int, default=3)
+    parser.add_argument("--slots", type=int, default=10)
+    parser.add_argument("--duration", type=float, default=5,
+                        help="Duration of every task, in seconds")
+    parser.add_argument("--window", type=float, default=10,
+                        help=("Seconds to measure the master for, once the "
+                              "jobs have been submitted"))
+    parser.add_argument("--base-port", type=int, default=4100,
+                        help="The workers listen on the ports after this")
+    parser.add_argument("--mode", choices=["threaded", "asyncio", "both"],
+                        default="both")
+    parser.add_argument("--workers-per-process", type=int, default=1,
+                        help=("Run the workers this many per process, on "
+                              "one event loop each (default: 1)"))
+    cmdArgs = parser.parse_args()
+
+    modes = {"threaded": [False], "asyncio": [True],
+             "both": [False, True]}[cmdArgs.mode]
+    print(json.dumps([runBenchmark(cmdArgs.algorithm, use_asyncio,
+                                   cmdArgs.jobs, cmdArgs.workers,
+                                   cmdArgs.slots, cmdArgs.duration,
+                                   cmdArgs.window, cmdArgs.base_port,
+                                   cmdArgs.workers_per_process)
+                      for use_asyncio in modes], indent=4))
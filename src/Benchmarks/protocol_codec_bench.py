@@ -0,0 +1,67 @@
+"""Microbenchmark comparing the codecs for the task messages between the
+master and the workers (see ```Communication/codec.py```).
+
+For every codec, it reports the size of the encoded messages and the time
+taken to encode and decode them, for both the message to the worker and the
+message to the master.
+
+Run from the ```src``` folder:
+
+```bash
+$ python3 -m Benchmarks.protocol_codec_bench
+```
+"""
+import argparse
+import json
+import time
+
+from Communication.codec import CODECS
+
+
+def timePerCall(function, args, repeat: int) -> float:
+    """```timePerCall``` returns the mean time in nanoseconds taken by one
+    call of ```function(*args)```.
+    """
+    start = time.perf_counter_ns()
+    for _ in range(repeat):
+        function(*args)
+    return (time.perf_counter_ns() - start) / repeat
+
+
+def benchmarkCodec(codec, repeat: int) -> dict:
+    """```benchmarkCodec``` returns the sizes of, and time taken to encode
+    and decode, a typical message in either direction using ```codec```.
+    """
+    to_worker = ("1042", "map", "1042_M3", 4, 2)
+    to_master = ("1042", "reduce", "1042_R1", 1607398876.0560403,
+                 1607398881.0674996, 2)
+
+    worker_payload = codec.encodeMessageToWorker(*to_worker)
+    master_payload = codec.encodeMessageToMaster(*to_master)
+    return {
+        "codec": codec.NAME,
+        "message to worker (bytes)": len(worker_payload),
+        "encode message to worker (ns)":
+            round(timePerCall(codec.encodeMessageToWorker, to_worker,
+                              repeat)),
+        "decode message to worker (ns)":
+            round(timePerCall(codec.decodeMessageToWorker, (worker_payload,),
+                              repeat)),
+        "message to master (bytes)": len(master_payload),
+        "encode message to master (ns)":
+            round(timePerCall(codec.encodeMessageToMaster, to_master,
+                              repeat)),
+        "decode message to master (ns)":
+            round(timePerCall(codec.decodeMessageToMaster, (master_payload,),
+                              repeat))
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=("Compare the codecs for "
+                                                  "the task messages"))
+    parser.add_argument("--repeat", type=int, default=100000)
+    cmdArgs = parser.parse_args()
+
+    print(json.dumps([benchmarkCodec(codec, cmdArgs.repeat)
+                      for codec in CODECS.values()], indent=4))
@@ -0,0 +1,99 @@
+"""Measures the CPU time spent per task on securing the frames between the
+master and the workers, for every security mode (see
+```Communication/security.py```).
+
+For each task, the master encodes, encrypts and frames the message to the
+worker, and the worker reads the frame, decrypts and decodes it; the update
+sent back to the master goes through the same steps. The *fernet (cipher per
+dispatch)* row creates a new ```Fernet``` object for every message sent by
+the master, which is what the schedulers used to do.
+
+Run from the ```src``` folder:
+
+```bash
+$ python3 -m Benchmarks.security_bench
+$ python3 -m Benchmarks.security_bench --codec binary
+```
+"""
+import argparse
+import json
+import time
+
+from cryptography.fernet import Fernet
+
+from Communication.codec import CODECS
+from Communication.protocol import FrameReader, YACS_Protocol
+from Communication.security import SESSIONS, FernetSession
+
+
+class _FernetPerDispatchSession(FernetSession):
+    """Creates a new cipher for every encrypted message, like the schedulers
+    used to do with ```Fernet(workerState[workerID]["pri_key"])```.
+    """
+    NAME = "fernet (cipher per dispatch)"
+
+    def __init__(self, key: bytes) -> None:
+        super().__init__(key)
+        self.key = key
+
+    def encrypt(self, data: bytes) -> bytes:
+        return Fernet(self.key).encrypt(data)
+
+
+def benchmark(session_class, codec, tasks: int) -> dict:
+    """```benchmark``` sends ```tasks``` tasks to a worker and their updates
+    back to the master, using ```session_class``` and ```codec```, and
+    returns the CPU time and the bytes sent per task.
+    """
+    key = session_class.generateKey()
+    # The master and the worker each hold their own session
+    master_session = session_class(key)
+    worker_session = session_class(key)
+    worker_reader = FrameReader()
+    master_reader = FrameReader()
+    wire_bytes = 0
+
+    cpu_start = time.process_time_ns()
+    for task in range(tasks):
+        # Master -> worker
+        frame = YACS_Protocol.createFrame(master_session.encrypt(
+            codec.encodeMessageToWorker("1042", "map", f"1042_M{task}", 4, 2)
+        ))
+        wire_bytes += len(frame)
+        worker_reader.feed(frame)
+        request = codec.decodeMessageToWorker(
+            worker_session.decrypt(worker_reader.nextFrame()))
+
+        # Worker -> master
+        frame = YACS_Protocol.createFrame(worker_session.encrypt(
+            codec.encodeMessageToMaster(request["job_id"],
+                                        request["task_family"],
+                                        request["task"]["task_id"],
+                                        1607398876.0560403,
+                                        1607398880.0674996,
+                                        request["worker_id"])))
+        wire_bytes += len(frame)
+        master_reader.feed(frame)
+        codec.decodeMessageToMaster(
+            master_session.decrypt(master_reader.nextFrame()))
+    cpu_time = time.process_time_ns() - cpu_start
+
+    return {
+        "security mode": session_class.NAME,
+        "codec": codec.NAME,
+        "CPU time per task (us)": round(cpu_time / tasks / 1000, 2),
+        "bytes sent per task": round(wire_bytes / tasks)
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=("Measure the CPU cost of "
+                                                  "the security modes"))
+    parser.add_argument("--codec", choices=list(CODECS), default="json")
+    parser.add_argument("--tasks", type=int, default=20000)
+    cmdArgs = parser.parse_args()
+
+    print(json.dumps([benchmark(session_class, CODECS[cmdArgs.codec],
+                                cmdArgs.tasks)
+                      for session_class in [_FernetPerDispatchSession,
+                                            *SESSIONS.values()]], indent=4))
@@ -0,0 +1,235 @@
+import json
+import struct
+from typing import Dict, List, Tuple, Type
+
+from Communication.protocol import YACS_Protocol, messageToMasterType, \
+    messageToWorkerType
+
+
+class JSONCodec:
+    """The ```JSONCodec``` encodes the task messages between the master and
+    the worker as the JSON strings created by ```YACS_Protocol```. It is the
+    default codec, and the one used by the workers which do not take part in
+    the codec handshake.
+    """
+    NAME = "json"
+
+    @staticmethod
+    def encodeMessageToWorker(job_ID, task_family, task_ID, duration,
+                              worker_ID) -> bytes:
+        """```encodeMessageToWorker``` returns the bytes of the message
+        created by ```YACS_Protocol.createMessageToWorker()```.
+        """
+        return YACS_Protocol.createMessageToWorker(job_ID, task_family,
+                                                   task_ID, duration,
+                                                   worker_ID).encode()
+
+    @staticmethod
+    def decodeMessageToWorker(payload: bytes) -> messageToWorkerType:
+        """```decodeMessageToWorker``` parses the bytes created by
+        ```encodeMessageToWorker()```.
+        """
+        return json.loads(payload)
+
+    @staticmethod
+    def encodeMessageToMaster(job_ID, task_family, task_ID, start_time,
+                              end_time, worker_ID) -> bytes:
+        """```encodeMessageToMaster``` returns the bytes of the message
+        created by ```YACS_Protocol.createMessageToMaster()```.
+        """
+        return YACS_Protocol.createMessageToMaster(job_ID, task_family,
+                                                   task_ID, start_time,
+                                                   end_time,
+                                                   worker_ID).encode()
+
+    @staticmethod
+    def decodeMessageToMaster(payload: bytes) -> messageToMasterType:
+        """```decodeMessageToMaster``` parses the bytes created by
+        ```encodeMessageToMaster()```.
+        """
+        return json.loads(payload)
+
+    @staticmethod
+    def messageToWorkerJSON(payload: bytes) -> str:
+        """```messageToWorkerJSON``` returns the JSON string of a message
+        encoded by ```encodeMessageToWorker()```, to be printed in the logs.
+        """
+        return payload.decode()
+
+    @staticmethod
+    def messageToMasterJSON(payload: bytes) -> str:
+        """```messageToMasterJSON``` returns the JSON string of a message
+        encoded by ```encodeMessageToMaster()```, to be printed in the logs.
+        """
+        return payload.decode()
+
+
+class BinaryCodec:
+    """The ```BinaryCodec``` encodes the task messages between the master and
+    the worker as packed C structs, followed by the UTF-8 encoded
+    ```job_id``` and ```task_id```. The fields are the same as those of the
+    JSON messages, and the decoded messages are the same dictionaries, as
+    long as the ```job_id``` and the ```task_id``` are strings, which is what
+    the client code sends. Other IDs would come back as strings, and hence
+    be looked up under the wrong key, so they are refused with a
+    ```TypeError```, and the master refuses the job requests which have them
+    when it offers this codec first (see ```hasStringIDs()```).
+
+    The message to the worker is as follows:
+
+    ```
+    +-----------+-------------+----------+------------+-------------+
+    | worker_id | task_family | duration | job_id len | task_id len |
+    |  uint32   |    uint8    | float64  |   uint16   |   uint16    |
+    +-----------+-------------+----------+------------+-------------+
+    | job_id (UTF-8) | task_id (UTF-8) |
+    +----------------+-----------------+
+    ```
+
+    The message to the master has the ```start_time``` and ```end_time```
+    (both float64) in place of the ```duration```. All the numbers are in
+    network byte order, and ```task_family``` is 0 for *map* and 1 for
+    *reduce*.
+    """
+    NAME = "binary"
+
+    TO_WORKER = struct.Struct("!IBdHH")
+    TO_MASTER = struct.Struct("!IBddHH")
+    TASK_FAMILIES: List[str] = ["map", "reduce"]
+    TASK_FAMILY_CODES: Dict[str, int] = {"map": 0, "reduce": 1}
+
+    @staticmethod
+    def hasStringIDs(jobRequest: dict) -> bool:
+        """```hasStringIDs``` checks whether the IDs of the job request, and
+        of all its tasks, are strings, so that its task messages can be
+        encoded by this codec.
+
+        **param** ```jobRequest```: The job request sent by the client code
+
+        **type** ```jobRequest```: dict
+
+        **return**: True if all the IDs are strings
+
+        **rtype**: bool
+        """
+        return isinstance(jobRequest["job_id"], str) and \
+            all(isinstance(task["task_id"], str)
+                for family in ("map_tasks", "reduce_tasks")
+                for task in jobRequest[family])
+
+    @staticmethod
+    def encodeIDs(job_ID, task_ID) -> Tuple[bytes, bytes]:
+        """```encodeIDs``` returns the UTF-8 encoded ```job_ID``` and
+        ```task_ID```, and raises a ```TypeError``` if either of them is not
+        a string, as it would not be decoded as the same value.
+        """
+        if not isinstance(job_ID, str) or not isinstance(task_ID, str):
+            raise TypeError("The binary codec only encodes string IDs, not "
+                            f"the job ID {job_ID!r} and task ID "
+                            f"{task_ID!r}")
+        return job_ID.encode(), task_ID.encode()
+
+    @staticmethod
+    def encodeMessageToWorker(job_ID, task_family, task_ID, duration,
+                              worker_ID) -> bytes:
+        """```encodeMessageToWorker``` packs the fields of the message
+        created by ```YACS_Protocol.createMessageToWorker()```.
+        """
+        _job, _task = BinaryCodec.encodeIDs(job_ID, task_ID)
+        return BinaryCodec.TO_WORKER.pack(
+            worker_ID, BinaryCodec.TASK_FAMILY_CODES[task_family], duration,
+            len(_job), len(_task)) + _job + _task
+
+    @staticmethod
+    def decodeMessageToWorker(payload: bytes) -> messageToWorkerType:
+        """```decodeMessageToWorker``` unpacks the bytes created by
+        ```encodeMessageToWorker()```.
+        """
+        worker_ID, task_family, duration, job_len, task_len = \
+            BinaryCodec.TO_WORKER.unpack_from(payload)
+        _start = BinaryCodec.TO_WORKER.size
+        return {
+            "worker_id": worker_ID,
+            "job_id": payload[_start:_start + job_len].decode(),
+            "task_family": BinaryCodec.TASK_FAMILIES[task_family],
+            "task": {
+                "task_id": payload[_start + job_len:
+                                   _start + job_len + task_len].decode(),
+                # Keep whole numbers of seconds as integers, as they would
+                # be in the JSON message
+                "duration": (int(duration) if duration.is_integer()
+                             else duration)
+            }
+        }
+
+    @staticmethod
+    def encodeMessageToMaster(job_ID, task_family, task_ID, start_time,
+                              end_time, worker_ID) -> bytes:
+        """```encodeMessageToMaster``` packs the fields of the message
+        created by ```YACS_Protocol.createMessageToMaster()```.
+        """
+        _job, _task = BinaryCodec.encodeIDs(job_ID, task_ID)
+        return BinaryCodec.TO_MASTER.pack(
+            worker_ID, BinaryCodec.TASK_FAMILY_CODES[task_family], start_time,
+            end_time, len(_job), len(_task)) + _job + _task
+
+    @staticmethod
+    def decodeMessageToMaster(payload: bytes) -> messageToMasterType:
+        """```decodeMessageToMaster``` unpacks the bytes created by
+        ```encodeMessageToMaster()```.
+        """
+        worker_ID, task_family, start_time, end_time, job_len, task_len = \
+            BinaryCodec.TO_MASTER.unpack_from(payload)
+        _start = BinaryCodec.TO_MASTER.size
+        return {
+            "worker_id": worker_ID,
+            "job_id": payload[_start:_start + job_len].decode(),
+            "task_family": BinaryCodec.TASK_FAMILIES[task_family],
+            "task": {
+                "task_id": payload[_start + job_len:
+                                   _start + job_len + task_len].decode(),
+                "start_time": start_time,
+                "end_time": end_time
+            }
+        }
+
+    @staticmethod
+    def messageToWorkerJSON(payload: bytes) -> str:
+        """```messageToWorkerJSON``` returns the JSON string of a message
+        encoded by ```encodeMessageToWorker()```, to be printed in the logs.
+        """
+        return json.dumps(BinaryCodec.decodeMessageToWorker(payload))
+
+    @staticmethod
+    def messageToMasterJSON(payload: bytes) -> str:
+        """```messageToMasterJSON``` returns the JSON string of a message
+        encoded by ```encodeMessageToMaster()```, to be printed in the logs.
+        """
+        return json.dumps(BinaryCodec.decodeMessageToMaster(payload))
+
+
+# The codecs which are supported, by name. The master offers these during the
+# connect back exchange and the worker picks the first one it supports.
+CODECS: Dict[str, Type] = {
+    JSONCodec.NAME: JSONCodec,
+    BinaryCodec.NAME: BinaryCodec
+}
+
+
+def chooseCodec(offered_codecs: List[str]) -> Type:
+    """```chooseCodec``` returns the first codec in ```offered_codecs``` that
+    is supported, or the ```JSONCodec``` if none of them are.
+
+    **param** ```offered_codecs```: Names of the codecs offered by the master,
+    in order of preference
+
+    **type** ```offered_codecs```: List[str]
+
+    **return**: The chosen codec class
+
+    **rtype**: Type
+    """
+    for name in offered_codecs:
+        if name in CODECS:
+            return CODECS[name]
+    return JSONCodec
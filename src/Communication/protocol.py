@@ -1,5 +1,8 @@
+import asyncio
 import json
-from typing import TypedDict
+import socket
+import struct
+from typing import List, Optional, TypedDict
 
 # This lock is used to get access to print onto the standard output
 from Locks.MasterPrintLock import master
@@ -81,6 +84,71 @@ class YACS_Protocol:
 
         return json.dumps(msg_dict)
 
+    @staticmethod
+    def createFrame(payload: bytes) -> bytes:
+        """```createFrame``` prefixes ```payload``` with its length, so that
+        the receiver can find where the message ends in the byte stream using
+        a ```FrameReader```. Every message sent between the master and the
+        workers is sent as a frame.
+
+        The frame is as follows:
+
+        ```
+        +------------------------------+---------------------+
+        | length (4 bytes, big endian) | payload (length B)  |
+        +------------------------------+---------------------+
+        ```
+
+        **param** ```payload```: The (encrypted) message to be sent
+
+        **type** ```payload```: bytes
+
+        **return**: The frame to be sent over the socket
+
+        **rtype**: bytes
+        """
+        return FrameReader.HEADER.pack(len(payload)) + payload
+
+    @staticmethod
+    def createBatch(messages: List[bytes]) -> bytes:
+        """```createBatch``` joins the encoded ```messages``` into a single
+        payload, so that they can be encrypted and sent together in one
+        frame. Every message in the batch is prefixed with its length, the
+        same way as a frame.
+
+        **param** ```messages```: The encoded messages to be sent together
+
+        **type** ```messages```: List[bytes]
+
+        **return**: The payload holding all the ```messages```
+
+        **rtype**: bytes
+        """
+        return b"".join([FrameReader.HEADER.pack(len(message)) + message
+                         for message in messages])
+
+    @staticmethod
+    def splitBatch(payload: bytes) -> List[bytes]:
+        """```splitBatch``` returns the messages in a payload created by
+        ```createBatch()```.
+
+        **param** ```payload```: The (decrypted) payload of the batch
+
+        **type** ```payload```: bytes
+
+        **return**: The encoded messages, in the order they were added
+
+        **rtype**: List[bytes]
+        """
+        messages: List[bytes] = []
+        offset: int = 0
+        while offset < len(payload):
+            (length,) = FrameReader.HEADER.unpack_from(payload, offset)
+            offset += FrameReader.HEADER.size
+            messages.append(payload[offset:offset + length])
+            offset += length
+        return messages
+
     @staticmethod
     def prettyPrintMessageToWorker(job_ID, task_family, task_ID, duration,
                                    worker_ID):
@@ -160,14 +228,20 @@ class YACS_Protocol:
         master.PRINT_LOCK.release()
 
     @staticmethod
-    def connectBackMessage(back_off_time, public_key):
+    def connectBackMessage(back_off_time, public_key, codecs=("json",),
+                           security_modes=("fernet",), time_scale=1.0,
+                           time_epoch=None):
         """
         The final JSON string will be as follows:
 
         ```json
         {
             "back_off_time": <Time_In_Seconds>,
-            "public_key": <Public_key_for_key_sharing>
+            "public_key": <Public_key_for_key_sharing>,
+            "codecs": [<Names_of_the_offered_codecs_in_order_of_preference>],
+            "security_modes": [<Names_of_the_offered_security_modes>],
+            "time_scale": <How_many_times_faster_than_real_time_to_run>,
+            "time_epoch": <Real_time_at_which_the_simulated_time_starts>
         }
         ```
 
@@ -175,17 +249,28 @@ class YACS_Protocol:
         msg_dict = {}
         msg_dict["back_off_time"] = back_off_time
         msg_dict["public_key"] = public_key.decode()
+        msg_dict["codecs"] = list(codecs)
+        msg_dict["security_modes"] = list(security_modes)
+        msg_dict["time_scale"] = time_scale
+        msg_dict["time_epoch"] = time_epoch
         return json.dumps(msg_dict)
 
     @staticmethod
-    def prettyPrintConnectBackMessage(back_off_time, public_key):
+    def prettyPrintConnectBackMessage(back_off_time, public_key,
+                                      codecs=("json",),
+                                      security_modes=("fernet",),
+                                      time_scale=1.0, time_epoch=None):
         """
         The final JSON string will be as follows:
 
         ```json
         {
             "back_off_time": <Time_In_Seconds>,
-            "public_key": <Public_key_for_key_sharing>
+            "public_key": <Public_key_for_key_sharing>,
+            "codecs": [<Names_of_the_offered_codecs_in_order_of_preference>],
+            "security_modes": [<Names_of_the_offered_security_modes>],
+            "time_scale": <How_many_times_faster_than_real_time_to_run>,
+            "time_epoch": <Real_time_at_which_the_simulated_time_starts>
         }
         ```
 
@@ -193,6 +278,10 @@ class YACS_Protocol:
         msg_dict = {}
         msg_dict["back_off_time"] = back_off_time
         msg_dict["public_key"] = public_key.decode()
+        msg_dict["codecs"] = list(codecs)
+        msg_dict["security_modes"] = list(security_modes)
+        msg_dict["time_scale"] = time_scale
+        msg_dict["time_epoch"] = time_epoch
         master.PRINT_LOCK.acquire()
         worker.PRINT_LOCK.acquire()
         print(json.dumps(msg_dict, indent=4))
@@ -200,14 +289,18 @@ class YACS_Protocol:
         master.PRINT_LOCK.release()
 
     @staticmethod
-    def connectBackResponse(worker_id, enc_pri_key):
+    def connectBackResponse(worker_id, enc_pri_key, codec="json",
+                            security_mode="fernet", time_scale=1.0):
         """
         The final JSON string will be as follows:
 
         ```json
         {
             "worker_id": <worker_id>,
-            "enc_pri_key": <Encrypted_private_key_for_key_sharing>
+            "enc_pri_key": <Encrypted_private_key_for_key_sharing>,
+            "codec": <Name_of_the_codec_chosen_by_the_worker>,
+            "security_mode": <Name_of_the_security_mode_chosen_by_the_worker>,
+            "time_scale": <Time_scale_accepted_by_the_worker>
         }
         ```
 
@@ -215,17 +308,25 @@ class YACS_Protocol:
         msg_dict = {}
         msg_dict["worker_id"] = worker_id
         msg_dict["enc_pri_key"] = enc_pri_key.decode()
+        msg_dict["codec"] = codec
+        msg_dict["security_mode"] = security_mode
+        msg_dict["time_scale"] = time_scale
         return json.dumps(msg_dict)
 
     @staticmethod
-    def prettyPrintConnectBackResponse(worker_id, enc_pri_key):
+    def prettyPrintConnectBackResponse(worker_id, enc_pri_key, codec="json",
+                                       security_mode="fernet",
+                                       time_scale=1.0):
         """
         The final JSON string will be as follows:
 
         ```json
         {
             "worker_id": <worker_id>,
-            "enc_pri_key": <Encrypted_private_key_for_key_sharing>
+            "enc_pri_key": <Encrypted_private_key_for_key_sharing>,
+            "codec": <Name_of_the_codec_chosen_by_the_worker>,
+            "security_mode": <Name_of_the_security_mode_chosen_by_the_worker>,
+            "time_scale": <Time_scale_accepted_by_the_worker>
         }
         ```
 
@@ -233,6 +334,9 @@ class YACS_Protocol:
         msg_dict = {}
         msg_dict["worker_id"] = worker_id
         msg_dict["enc_pri_key"] = enc_pri_key.decode()
+        msg_dict["codec"] = codec
+        msg_dict["security_mode"] = security_mode
+        msg_dict["time_scale"] = time_scale
         master.PRINT_LOCK.acquire()
         worker.PRINT_LOCK.acquire()
         print(json.dumps(msg_dict, indent=4))
@@ -240,6 +344,176 @@ class YACS_Protocol:
         master.PRINT_LOCK.release()
 
 
+class FrameReader:
+    """The ```FrameReader``` class splits the byte stream received on a
+    socket into the frames created using ```YACS_Protocol.createFrame()```.
+
+    One ```FrameReader``` must be used per socket, for as long as the socket
+    is open, as it holds on to the bytes of a frame that has only been
+    partially received. Any number of frames can be received in a single
+    ```recv``` call, and every byte is looked at only once.
+    """
+    HEADER = struct.Struct("!I")
+    # Frames larger than this are treated as a corrupted byte stream
+    MAX_FRAME_SIZE: int = 16 * 1024 * 1024
+
+    def __init__(self) -> None:
+        self.buffer = bytearray()
+        # Position in the buffer of the first byte not yet returned
+        self.offset: int = 0
+        # Length of the frame at the offset, once its header has been read
+        self.frameLength: Optional[int] = None
+
+    def feed(self, data: bytes) -> None:
+        """```feed``` adds the bytes received from the socket to the
+        reader's buffer.
+
+        **param** ```data```: The bytes received from the socket
+
+        **type** ```data```: bytes
+        """
+        # Drop the bytes of the frames already returned, before growing the
+        # buffer. Only the bytes of a partial frame (if any) are moved.
+        if self.offset == len(self.buffer):
+            self.buffer.clear()
+            self.offset = 0
+        elif self.offset > len(self.buffer) // 2:
+            del self.buffer[:self.offset]
+            self.offset = 0
+        self.buffer += data
+
+    def nextFrame(self) -> Optional[bytes]:
+        """```nextFrame``` returns the payload of the next frame in the
+        buffer, or ```None``` if the next frame has not been received
+        completely yet.
+
+        **return**: Payload of the next frame, if it has been received
+
+        **rtype**: Optional[bytes]
+        """
+        if self.frameLength is None:
+            if len(self.buffer) - self.offset < FrameReader.HEADER.size:
+                return None
+            (self.frameLength,) = FrameReader.HEADER.unpack_from(self.buffer,
+                                                                 self.offset)
+            if self.frameLength > FrameReader.MAX_FRAME_SIZE:
+                raise ValueError(f"Frame of {self.frameLength} bytes is "
+                                 "larger than the maximum frame size!")
+            self.offset += FrameReader.HEADER.size
+
+        if len(self.buffer) - self.offset < self.frameLength:
+            return None
+
+        payload = bytes(self.buffer[self.offset:
+                                    self.offset + self.frameLength])
+        self.offset += self.frameLength
+        self.frameLength = None
+        return payload
+
+    def nextFrames(self) -> List[bytes]:
+        """```nextFrames``` returns the payloads of all the frames in the
+        buffer which have been received completely.
+
+        **return**: Payloads of the complete frames, which may be none
+
+        **rtype**: List[bytes]
+        """
+        frames: List[bytes] = []
+        frame = self.nextFrame()
+        while frame is not None:
+            frames.append(frame)
+            frame = self.nextFrame()
+        return frames
+
+    def readFrames(self, sock: socket.socket,
+                   bufferSize: int = 65536) -> Optional[List[bytes]]:
+        """```readFrames``` blocks until at least one complete frame is
+        available and returns the payloads of all the complete frames.
+
+        **param** ```sock```: The socket to receive the frames from
+
+        **type** ```sock```: socket.socket
+
+        **param** ```bufferSize```: The maximum amount of data to be received
+        at once, defaults to 65536
+
+        **type** ```bufferSize```: int, optional
+
+        **return**: The payloads of the received frames, or ```None``` once
+        the other end has closed the connection
+
+        **rtype**: Optional[List[bytes]]
+        """
+        frames: List[bytes] = self.nextFrames()
+        while not frames:
+            data = sock.recv(bufferSize)
+            if not data:
+                return None
+            self.feed(data)
+            frames = self.nextFrames()
+        return frames
+
+    async def readFramesFromStream(self, reader: asyncio.StreamReader,
+                                   bufferSize: int = 65536
+                                   ) -> Optional[List[bytes]]:
+        """```readFramesFromStream``` is the same as ```readFrames```, for
+        a connection opened using ```asyncio```. It waits until at least one
+        complete frame is available and returns the payloads of all the
+        complete frames.
+
+        **param** ```reader```: The stream to receive the frames from
+
+        **type** ```reader```: asyncio.StreamReader
+
+        **param** ```bufferSize```: The maximum amount of data to be received
+        at once, defaults to 65536
+
+        **type** ```bufferSize```: int, optional
+
+        **return**: The payloads of the received frames, or ```None``` once
+        the other end has closed the connection
+
+        **rtype**: Optional[List[bytes]]
+        """
+        frames: List[bytes] = self.nextFrames()
+        while not frames:
+            data = await reader.read(bufferSize)
+            if not data:
+                return None
+            self.feed(data)
+            frames = self.nextFrames()
+        return frames
+
+    def readFrame(self, sock: socket.socket,
+                  bufferSize: int = 65536) -> Optional[bytes]:
+        """```readFrame``` blocks until the next frame is available and
+        returns its payload. Any bytes received after that frame are kept for
+        the next call to ```readFrame``` or ```readFrames```.
+
+        **param** ```sock```: The socket to receive the frame from
+
+        **type** ```sock```: socket.socket
+
+        **param** ```bufferSize```: The maximum amount of data to be received
+        at once, defaults to 65536
+
+        **type** ```bufferSize```: int, optional
+
+        **return**: The payload of the frame, or ```None``` if the other end
+        closed the connection
+
+        **rtype**: Optional[bytes]
+        """
+        frame = self.nextFrame()
+        while frame is None:
+            data = sock.recv(bufferSize)
+            if not data:
+                return None
+            self.feed(data)
+            frame = self.nextFrame()
+        return frame
+
+
 class messageToWorkerTaskType(TypedDict):
     """```messageToWorkerTaskType``` class is used to help in creating the
     *type hint* for the dictionary that will contain the
@@ -0,0 +1,127 @@
+import os
+from typing import Dict, List, Type
+
+from cryptography.fernet import Fernet
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+
+
+class FernetSession:
+    """The ```FernetSession``` encrypts every frame as a Fernet token
+    (AES-CBC with an HMAC, encoded in base64). It is the mode used by the
+    workers which do not take part in the security mode handshake.
+
+    **param** ```key```: The worker's private key, created by
+    ```generateKey()```
+
+    **type** ```key```: bytes
+    """
+    NAME = "fernet"
+
+    def __init__(self, key: bytes) -> None:
+        self.cipher = Fernet(key)
+
+    @staticmethod
+    def generateKey() -> bytes:
+        """```generateKey``` returns a new private key for this mode."""
+        return Fernet.generate_key()
+
+    def encrypt(self, data: bytes) -> bytes:
+        """```encrypt``` returns the Fernet token of ```data```."""
+        return self.cipher.encrypt(data)
+
+    def decrypt(self, token: bytes) -> bytes:
+        """```decrypt``` returns the data in a token created by
+        ```encrypt()```.
+        """
+        return self.cipher.decrypt(token)
+
+
+class AEADSession:
+    """The ```AEADSession``` encrypts every frame with AES-GCM. The frame
+    holds a random 12 byte nonce followed by the raw ciphertext and its 16
+    byte tag, so unlike Fernet, it is neither base64 encoded nor does it
+    carry a timestamp or a separate HMAC.
+
+    **param** ```key```: The worker's private key, created by
+    ```generateKey()```
+
+    **type** ```key```: bytes
+    """
+    NAME = "aead"
+    NONCE_SIZE = 12
+
+    def __init__(self, key: bytes) -> None:
+        self.cipher = AESGCM(key)
+
+    @staticmethod
+    def generateKey() -> bytes:
+        """```generateKey``` returns a new private key for this mode."""
+        return AESGCM.generate_key(bit_length=128)
+
+    def encrypt(self, data: bytes) -> bytes:
+        """```encrypt``` returns the nonce followed by the ciphertext of
+        ```data```.
+        """
+        nonce = os.urandom(AEADSession.NONCE_SIZE)
+        return nonce + self.cipher.encrypt(nonce, data, None)
+
+    def decrypt(self, token: bytes) -> bytes:
+        """```decrypt``` returns the data in a token created by
+        ```encrypt()```.
+        """
+        return self.cipher.decrypt(token[:AEADSession.NONCE_SIZE],
+                                   token[AEADSession.NONCE_SIZE:], None)
+
+
+class PlainSession:
+    """The ```PlainSession``` sends the frames as they are, without any
+    encryption. It is only meant for trusted local clusters, and is only
+    used when the master is started with ```--no-encrypt```.
+    """
+    NAME = "none"
+
+    def __init__(self, key: bytes = b"") -> None:
+        pass
+
+    @staticmethod
+    def generateKey() -> bytes:
+        """```generateKey``` returns an empty key, as none is needed."""
+        return b""
+
+    def encrypt(self, data: bytes) -> bytes:
+        """```encrypt``` returns ```data``` unchanged."""
+        return data
+
+    def decrypt(self, token: bytes) -> bytes:
+        """```decrypt``` returns ```token``` unchanged."""
+        return token
+
+
+# The security modes which are supported, by name. The master offers these
+# during the connect back exchange and the worker picks the first one it
+# supports.
+SESSIONS: Dict[str, Type] = {
+    AEADSession.NAME: AEADSession,
+    FernetSession.NAME: FernetSession,
+    PlainSession.NAME: PlainSession
+}
+
+
+def chooseSession(offered_modes: List[str]) -> Type:
+    """```chooseSession``` returns the session class of the first security
+    mode in ```offered_modes``` that is supported, or the ```FernetSession```
+    if none of them are.
+
+    **param** ```offered_modes```: Names of the security modes offered by the
+    master, in order of preference
+
+    **type** ```offered_modes```: List[str]
+
+    **return**: The chosen session class
+
+    **rtype**: Type
+    """
+    for name in offered_modes:
+        if name in SESSIONS:
+            return SESSIONS[name]
+    return FernetSession
@@ -0,0 +1,51 @@
+import time
+from typing import Optional
+
+
+class TimeScale:
+    """The ```TimeScale``` class maps the real time onto the simulated time
+    of a cluster running ```factor``` times faster than real time, which the
+    master offers to the workers during the connect back exchange.
+
+    The workers complete a task of ```duration``` seconds in
+    ```duration / factor``` real seconds, and every time that is logged,
+    i.e. the start and end times of the tasks and the arrival times of the
+    jobs, is in simulated seconds: ```factor``` times further from the
+    ```epoch``` than the real time. The durations in the log files are then
+    the same as in a run in real time, so that they can be compared.
+
+    **param** ```factor```: How many times faster than real time the cluster
+    runs, defaults to 1, i.e. in real time
+
+    **type** ```factor```: float, optional
+
+    **param** ```epoch```: The real time at which the simulated and the real
+    times are the same, shared by the master and all its workers, defaults to
+    now
+
+    **type** ```epoch```: Optional[float], optional
+    """
+    def __init__(self, factor: float = 1.0,
+                 epoch: Optional[float] = None) -> None:
+        if factor <= 0:
+            raise ValueError(f"Time scale factor {factor} is not positive!")
+        self.factor = factor
+        self.epoch = time.time() if epoch is None else epoch
+
+    def toSimulated(self, realTime: float) -> float:
+        """```toSimulated``` returns the simulated time of ```realTime```
+        (from ```time.time()```).
+        """
+        if self.factor == 1:
+            return realTime
+        return self.epoch + (realTime - self.epoch) * self.factor
+
+    def toRealDuration(self, duration: float) -> float:
+        """```toRealDuration``` returns the real seconds that
+        ```duration``` simulated seconds take.
+        """
+        return duration / self.factor
+
+    def clock(self) -> float:
+        """```clock``` returns the current simulated time."""
+        return self.toSimulated(time.time())
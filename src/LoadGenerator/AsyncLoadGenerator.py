@@ -0,0 +1,363 @@
+"""Submits job requests to the master at a high rate, from a single asyncio
+event loop and over many concurrent connections.
+
+The job requests are sent in the same format as the client code
+(```Copy_of_requests.py```), one per connection, with the numbers of tasks
+and their durations drawn from a workload profile (see
+```LoadGenerator/Workloads.py```). The jobs are submitted either:
+
+- in an **open loop**, i.e. at the arrival times of a Poisson, constant or
+bursty process, whether or not the earlier jobs have completed, or
+- in a **closed loop**, where each of ```--clients``` clients submits a job,
+waits for it to complete, thinks for a while and submits the next one. The
+completions are read from the ```jobs.csv``` file of the master.
+
+The time at which every job was scheduled, submitted and sent is written to
+```--output```, so that the end-to-end latency of the jobs can be computed
+against the master's ```jobs.csv``` (see ```Analytics/latency.py```).
+
+Run from the ```src``` folder, once the master is running:
+
+```bash
+$ python3 -m LoadGenerator.AsyncLoadGenerator --rate 2000 --jobs 20000
+$ python3 -m LoadGenerator.AsyncLoadGenerator --profile heavy-tailed \\
+      --arrival bursty --rate 50 --duration 60
+$ python3 -m LoadGenerator.AsyncLoadGenerator --mode closed --clients 8 \\
+      --jobs-csv Analytics/Least-Loaded/jobs.csv
+```
+"""
+import argparse
+import asyncio
+import csv
+import itertools
+import json
+import os
+import time
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from LoadGenerator.Workloads import PROFILES, Workload, arrivalTimes
+
+
+class AsyncLoadGenerator:
+    """The ```AsyncLoadGenerator``` class sends the job requests to the
+    master, with at most ```concurrency``` connections open at once, and
+    writes a row per sent job to the ```output``` CSV file.
+
+    **param** ```host```, ```port```: The address on which the master
+    listens for job requests
+
+    **param** ```concurrency```: The maximum number of connections open at
+    once
+
+    **type** ```concurrency```: int
+
+    **param** ```output```: The CSV file to write the times of the jobs to
+
+    **type** ```output```: TextIO
+    """
+    FIELDS: List[str] = ["JobID", "map_tasks", "reduce_tasks",
+                         "scheduled_time", "submit_time", "sent_time"]
+
+    def __init__(self, host: str, port: int, concurrency: int,
+                 output) -> None:
+        self.host = host
+        self.port = port
+        self.connections = asyncio.Semaphore(concurrency)
+        self.writer = csv.writer(output)
+        self.writer.writerow(AsyncLoadGenerator.FIELDS)
+
+        self.sentJobCount: int = 0
+        self.sentTaskCount: int = 0
+        self.errorCount: int = 0
+        # Seconds between the scheduled and the actual submit times
+        self.lags: List[float] = []
+
+    async def submit(self, jobRequest: dict, scheduledTime: float) -> bool:
+        """```submit``` sends the job request over a new connection, and
+        records its times once it has been sent. It has to be called while
+        holding one of the ```connections```, which it releases.
+
+        **param** ```scheduledTime```: The time (from ```time.time()```) at
+        which the job should have been submitted
+
+        **return**: Whether the job request was sent
+
+        **rtype**: bool
+        """
+        try:
+            submitTime = time.time()
+            try:
+                _, writer = await asyncio.open_connection(self.host,
+                                                          self.port)
+                writer.write(json.dumps(jobRequest).encode())
+                await writer.drain()
+                writer.close()
+                await writer.wait_closed()
+            except OSError as error:
+                self.errorCount += 1
+                if self.errorCount == 1:
+                    print(f"Could not send job {jobRequest['job_id']}: "
+                          f"{error}")
+                return False
+            sentTime = time.time()
+        finally:
+            self.connections.release()
+
+        mapCount = len(jobRequest["map_tasks"])
+        reduceCount = len(jobRequest["reduce_tasks"])
+        self.writer.writerow([jobRequest["job_id"], mapCount, reduceCount,
+                              scheduledTime, submitTime, sentTime])
+        self.sentJobCount += 1
+        self.sentTaskCount += mapCount + reduceCount
+        self.lags.append(submitTime - scheduledTime)
+        return True
+
+    async def runOpenLoop(self, jobs: Iterator[Tuple[float, dict]]) -> None:
+        """```runOpenLoop``` submits every job at its arrival time, in
+        seconds from the start, without waiting for the earlier jobs. When
+        all the connections are in use, the jobs are submitted as soon as
+        one is free, and their lag is recorded.
+        """
+        loop = asyncio.get_running_loop()
+        loopStart = loop.time()
+        wallStart = time.time()
+        pending = set()
+        for arrivalTime, jobRequest in jobs:
+            delay = loopStart + arrivalTime - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            await self.connections.acquire()
+            task = asyncio.create_task(
+                self.submit(jobRequest, wallStart + arrivalTime))
+            pending.add(task)
+            task.add_done_callback(pending.discard)
+        if pending:
+            await asyncio.wait(pending)
+
+    async def runClosedLoop(self, jobRequests: Iterator[dict],
+                            clients: int, thinkTime: float,
+                            watcher: "JobCompletionWatcher",
+                            timeout: Optional[float]) -> None:
+        """```runClosedLoop``` runs ```clients``` clients, each of which
+        submits a job, waits for the ```watcher``` to see it complete, and
+        then waits for ```thinkTime``` seconds before the next one.
+        """
+        async def client() -> None:
+            for jobRequest in jobRequests:
+                completed = watcher.expect(jobRequest["job_id"])
+                await self.connections.acquire()
+                if await self.submit(jobRequest, time.time()):
+                    try:
+                        await asyncio.wait_for(completed, timeout)
+                    except asyncio.TimeoutError:
+                        print(f"Job {jobRequest['job_id']} did not "
+                              f"complete within {timeout} seconds")
+                watcher.forget(jobRequest["job_id"])
+                if thinkTime:
+                    await asyncio.sleep(thinkTime)
+
+        watching = asyncio.create_task(watcher.run())
+        try:
+            await asyncio.gather(*[client() for _ in range(clients)])
+        finally:
+            watching.cancel()
+
+
+class JobCompletionWatcher:
+    """The ```JobCompletionWatcher``` class follows the master's
+    ```jobs.csv``` file, and completes the future of every awaited job once
+    its row is written. The master writes the rows every
+    ```--log-flush-interval``` seconds, so a short interval should be used
+    with the closed loop.
+
+    **param** ```path```: Path of the master's ```jobs.csv``` file
+
+    **type** ```path```: str
+
+    **param** ```pollInterval```: Seconds between the reads of the file
+
+    **type** ```pollInterval```: float
+    """
+    def __init__(self, path: str, pollInterval: float = 0.05) -> None:
+        self.path = path
+        self.pollInterval = pollInterval
+        self.offset: int = 0
+        self.awaited: Dict[str, asyncio.Future] = {}
+
+    def expect(self, job_id: str) -> asyncio.Future:
+        """```expect``` returns the future completed once the job
+        ```job_id``` completes.
+        """
+        future = asyncio.get_running_loop().create_future()
+        self.awaited[job_id] = future
+        return future
+
+    def forget(self, job_id: str) -> None:
+        """```forget``` stops waiting for the job ```job_id```.
+        """
+        self.awaited.pop(job_id, None)
+
+    def readCompletedJobs(self) -> None:
+        """```readCompletedJobs``` reads the rows written since the last
+        read, and completes the futures of their jobs.
+        """
+        try:
+            with open(self.path, "rb") as fHandler:
+                fHandler.seek(self.offset)
+                data = fHandler.read()
+        except FileNotFoundError:
+            return
+        # Only read up to the last whole row
+        data = data[:data.rfind(b"\n") + 1]
+        self.offset += len(data)
+        for row in csv.reader(data.decode().splitlines()):
+            future = self.awaited.pop(row[0], None) if row else None
+            if future is not None and not future.done():
+                future.set_result(None)
+
+    async def run(self) -> None:
+        """```run``` reads the file every ```pollInterval``` seconds.
+        """
+        while True:
+            self.readCompletedJobs()
+            await asyncio.sleep(self.pollInterval)
+
+
+def percentile(values: List[float], fraction: float) -> Optional[float]:
+    """```percentile``` returns the value below which ```fraction``` of the
+    ```values``` are, or None if there are no values.
+    """
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+
+def writeWorkload(path: str, jobs: Iterable[Tuple[float, dict]]) -> None:
+    """```writeWorkload``` writes the job requests to the file at ```path```,
+    one per line along with its ```"arrival_time"```, in the format read by
+    the simulation's ```--workload```.
+    """
+    with open(path, "w") as fHandler:
+        for arrivalTime, jobRequest in jobs:
+            fHandler.write(json.dumps(dict(jobRequest,
+                                           arrival_time=arrivalTime)))
+            fHandler.write("\n")
+
+
+def printSummary(loadGenerator: AsyncLoadGenerator, mode: str,
+                 wallTime: float, outputPath: str) -> None:
+    """```printSummary``` prints the number of sent jobs, the rate at which
+    they were sent and their lag behind their scheduled times, followed by
+    the total number of sent tasks, on the same line as the client code,
+    which ```check_logs.py``` looks for.
+    """
+    print(json.dumps({
+        "mode": mode,
+        "sent jobs": loadGenerator.sentJobCount,
+        "failed jobs": loadGenerator.errorCount,
+        "wall time (s)": round(wallTime, 3),
+        "jobs per second": round(loadGenerator.sentJobCount / wallTime, 1),
+        "submit lag p50 (s)": percentile(loadGenerator.lags, 0.5),
+        "submit lag p99 (s)": percentile(loadGenerator.lags, 0.99),
+        "output": os.path.abspath(outputPath)
+    }, indent=4))
+    print("Total number of tasks sent by the client are: "
+          f"{loadGenerator.sentTaskCount}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=("Submit job requests to "
+                                                  "the master"))
+    parser.add_argument("--host", default="localhost")
+    parser.add_argument("--port", type=int, default=5000)
+    parser.add_argument("--mode", choices=["open", "closed"], default="open")
+    parser.add_argument("--jobs", type=int, default=1000,
+                        help="Number of jobs to submit (default: 1000)")
+    parser.add_argument("--duration", type=float, default=None,
+                        help="Stop submitting after this many seconds")
+    parser.add_argument("--concurrency", type=int, default=64,
+                        help="Maximum number of open connections")
+    parser.add_argument("--profile", choices=list(PROFILES),
+                        default="client",
+                        help="Workload profile (default: client)")
+    parser.add_argument("--maps", help="Distribution of the map task counts")
+    parser.add_argument("--reduces",
+                        help="Distribution of the reduce task counts")
+    parser.add_argument("--map-duration",
+                        help="Distribution of the map task durations")
+    parser.add_argument("--reduce-duration",
+                        help="Distribution of the reduce task durations")
+    parser.add_argument("--arrival", choices=["poisson", "constant",
+                                              "bursty"], default="poisson",
+                        help="Arrival process of the open loop")
+    parser.add_argument("--rate", type=float, default=1.0,
+                        help="Average jobs per second of the open loop")
+    parser.add_argument("--burst-on", type=float, default=1.0,
+                        help="Mean seconds of the bursts")
+    parser.add_argument("--burst-off", type=float, default=1.0,
+                        help="Mean seconds between the bursts")
+    parser.add_argument("--clients", type=int, default=1,
+                        help="Number of clients of the closed loop")
+    parser.add_argument("--think-time", type=float, default=0.0,
+                        help=("Seconds a client of the closed loop waits "
+                              "before its next job"))
+    parser.add_argument("--jobs-csv",
+                        help=("The master's jobs.csv, to see the jobs of "
+                              "the closed loop complete"))
+    parser.add_argument("--completion-timeout", type=float, default=300.0,
+                        help="Seconds to wait for a job of the closed loop")
+    parser.add_argument("--job-id-prefix", default="",
+                        help="Prefix of the job IDs, to keep them unique")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--output", default="submits.csv",
+                        help="CSV file of the times of the sent jobs")
+    parser.add_argument("--write-workload", metavar="PATH",
+                        help=("Write the open loop's job requests and "
+                              "arrival times to PATH, one per line, for the "
+                              "simulation, instead of sending them"))
+    cmdArgs = parser.parse_args()
+    if cmdArgs.mode == "closed" and not cmdArgs.jobs_csv:
+        parser.error("--mode closed needs --jobs-csv")
+
+    workload = Workload.fromProfile(
+        cmdArgs.profile, cmdArgs.seed, maps=cmdArgs.maps,
+        reduces=cmdArgs.reduces, map_duration=cmdArgs.map_duration,
+        reduce_duration=cmdArgs.reduce_duration)
+    jobRequests = (workload.createJobRequest(f"{cmdArgs.job_id_prefix}{i}")
+                   for i in range(cmdArgs.jobs))
+    arrivals = arrivalTimes(cmdArgs.arrival, cmdArgs.rate, cmdArgs.seed,
+                            cmdArgs.burst_on, cmdArgs.burst_off)
+    jobs = zip(arrivals, jobRequests)
+    if cmdArgs.duration is not None:
+        jobs = itertools.takewhile(
+            lambda job: job[0] < cmdArgs.duration, jobs)
+
+    if cmdArgs.write_workload:
+        writeWorkload(cmdArgs.write_workload, jobs)
+        raise SystemExit(0)
+
+    async def main(output) -> AsyncLoadGenerator:
+        loadGenerator = AsyncLoadGenerator(cmdArgs.host, cmdArgs.port,
+                                           cmdArgs.concurrency, output)
+        if cmdArgs.mode == "open":
+            await loadGenerator.runOpenLoop(jobs)
+        else:
+            if cmdArgs.duration is not None:
+                _end = time.time() + cmdArgs.duration
+                closedJobs = itertools.takewhile(lambda _: time.time() < _end,
+                                                 jobRequests)
+            else:
+                closedJobs = jobRequests
+            await loadGenerator.runClosedLoop(
+                closedJobs, cmdArgs.clients, cmdArgs.think_time,
+                JobCompletionWatcher(cmdArgs.jobs_csv),
+                cmdArgs.completion_timeout)
+        return loadGenerator
+
+    wallStart = time.perf_counter()
+    with open(cmdArgs.output, "w", newline="") as output:
+        loadGenerator = asyncio.run(main(output))
+    wallTime = time.perf_counter() - wallStart
+
+    printSummary(loadGenerator, cmdArgs.mode, wallTime, cmdArgs.output)
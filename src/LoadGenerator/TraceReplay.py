@@ -0,0 +1,262 @@
+"""Rebuilds the job stream of a recorded run, and submits it to the master
+again, so that a change to the master can be measured on the exact workload
+which gave an earlier result.
+
+The job stream is rebuilt from either:
+
+- the log files of a run (```Analytics/<algorithm>```), where the arrival
+time of every job is its ```start_time``` in ```jobs.csv```, and its tasks
+and their durations are those in ```tasks.csv```. The durations are the
+measured ones, which ```--round-durations``` rounds to whole seconds, as
+requested by the client code, or
+- the output of a master (```Logs/master_run_logs/*.log```), where the tasks
+and their requested durations are those sent to the workers. The logs have
+no timestamps, so the jobs arrive in the order they were first dispatched,
+```--interval``` seconds apart, unless ```--arrivals``` gives the
+```jobs.csv``` of the same run to take the arrival times from.
+
+The map and reduce tasks are told apart using their task IDs, which the
+client code creates as ```<job_id>_M<n>``` and ```<job_id>_R<n>```.
+
+Run from the ```src``` folder, once the master is running:
+
+```bash
+$ python3 -m LoadGenerator.TraceReplay Analytics/Round-Robin
+$ python3 -m LoadGenerator.TraceReplay Analytics/Round-Robin --speed 10
+$ python3 -m LoadGenerator.TraceReplay \\
+      ../Logs/master_run_logs/run_9_LL.log --speed 0
+```
+"""
+import argparse
+import asyncio
+import csv
+import json
+import os
+import re
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from LoadGenerator.AsyncLoadGenerator import AsyncLoadGenerator, \
+    printSummary, writeWorkload
+
+DISPATCH_PREFIX = "Sending task to worker: "
+
+# The task IDs created by the client code, e.g. "0_M1" or "12_R0"
+TASK_ID_PATTERN = re.compile(r"_([MR])(\d+)$")
+
+
+def taskOrder(task_id: str) -> Tuple[str, int, str]:
+    """```taskOrder``` returns the key to sort the tasks of a job by, i.e.
+    their family and number, e.g. ```("M", 1, "0_M1")``` for ```"0_M1"```.
+    """
+    match = TASK_ID_PATTERN.search(task_id)
+    if match is None:
+        return ("M", 0, task_id)
+    return (match.group(1), int(match.group(2)), task_id)
+
+
+def buildJobRequest(job_id: str, tasks: Dict[str, float],
+                    families: Optional[Dict[str, str]] = None) -> dict:
+    """```buildJobRequest``` creates the job request of the job
+    ```job_id```, in the same format as the client code, from the durations
+    of its tasks by task ID. The family of a task is taken from
+    ```families``` if it is there, or else from its task ID.
+    """
+    jobRequest: dict = {"job_id": job_id, "map_tasks": [],
+                        "reduce_tasks": []}
+    for task_id in sorted(tasks, key=taskOrder):
+        family = (families or {}).get(task_id)
+        if family is None:
+            family = "reduce" if taskOrder(task_id)[0] == "R" else "map"
+        jobRequest[f"{family}_tasks"].append({"task_id": task_id,
+                                              "duration": tasks[task_id]})
+    return jobRequest
+
+
+def readArrivalTimes(jobsPath: str) -> Dict[str, float]:
+    """```readArrivalTimes``` returns the ```start_time``` of every job in
+    the ```jobs.csv``` file at ```jobsPath```, by job ID.
+    """
+    with open(jobsPath, newline="") as fHandler:
+        return {row["JobID"]: float(row["start_time"])
+                for row in csv.DictReader(fHandler)}
+
+
+def readRunFolder(folder: str, roundDurations: bool = False
+                  ) -> List[Tuple[float, dict]]:
+    """```readRunFolder``` rebuilds the job stream from the ```jobs.csv``` and
+    ```tasks.csv``` files in ```folder```.
+
+    A job which has tasks but did not complete, and so is not in
+    ```jobs.csv```, arrives at the start of its first task.
+
+    **return**: The job requests along with their arrival times, in seconds
+    from the first one, in the order of their arrival
+
+    **rtype**: List[Tuple[float, dict]]
+    """
+    arrivals = readArrivalTimes(os.path.join(folder, "jobs.csv"))
+    firstStarts: Dict[str, float] = {}
+    tasks: Dict[str, Dict[str, float]] = OrderedDict()
+    with open(os.path.join(folder, "tasks.csv"), newline="") as fHandler:
+        for row in csv.DictReader(fHandler):
+            duration = float(row["duration"])
+            if roundDurations:
+                duration = round(duration)
+            tasks.setdefault(row["JobID"], {})[row["TaskID"]] = duration
+            firstStarts[row["JobID"]] = min(
+                firstStarts.get(row["JobID"], float("inf")),
+                float(row["start_time"]))
+    for job_id, firstStart in firstStarts.items():
+        arrivals.setdefault(job_id, firstStart)
+
+    return timeline([(arrivals[job_id], buildJobRequest(job_id, jobTasks))
+                     for job_id, jobTasks in tasks.items()])
+
+
+def readMasterLog(path: str, interval: float = 1.0,
+                  arrivals: Optional[Dict[str, float]] = None
+                  ) -> List[Tuple[float, dict]]:
+    """```readMasterLog``` rebuilds the job stream from the tasks dispatched
+    in the master's output at ```path```, with their requested durations.
+
+    The jobs arrive in the order their first task was dispatched,
+    ```interval``` seconds apart, or at their times in ```arrivals``` if it
+    is given (see ```readArrivalTimes```).
+
+    **return**: The job requests along with their arrival times, in seconds
+    from the first one, in the order of their arrival
+
+    **rtype**: List[Tuple[float, dict]]
+    """
+    tasks: Dict[str, Dict[str, float]] = OrderedDict()
+    families: Dict[str, Dict[str, str]] = {}
+    with open(path, errors="replace") as fHandler:
+        for line in fHandler:
+            if not line.startswith(DISPATCH_PREFIX):
+                continue
+            messages = json.loads(line[len(DISPATCH_PREFIX):])
+            for message in (messages if isinstance(messages, list)
+                            else [messages]):
+                job_id = str(message["job_id"])
+                task_id = str(message["task"]["task_id"])
+                tasks.setdefault(job_id, {})[task_id] = \
+                    message["task"]["duration"]
+                # Older logs call the field "task family"
+                families.setdefault(job_id, {})[task_id] = \
+                    message.get("task_family", message.get("task family"))
+
+    jobs = []
+    for number, (job_id, jobTasks) in enumerate(tasks.items()):
+        if arrivals is not None and job_id in arrivals:
+            arrivalTime = arrivals[job_id]
+        else:
+            arrivalTime = number * interval
+        jobs.append((arrivalTime,
+                     buildJobRequest(job_id, jobTasks, families[job_id])))
+    return timeline(jobs)
+
+
+def timeline(jobs: List[Tuple[float, dict]]) -> List[Tuple[float, dict]]:
+    """```timeline``` sorts the jobs by their arrival times, and makes the
+    arrival times relative to the first one.
+    """
+    jobs = sorted(jobs, key=lambda job: job[0])
+    if not jobs:
+        return jobs
+    first = jobs[0][0]
+    return [(arrivalTime - first, jobRequest)
+            for arrivalTime, jobRequest in jobs]
+
+
+def retime(jobs: List[Tuple[float, dict]], speed: float,
+           scaleDurations: bool = False, jobIDPrefix: str = ""
+           ) -> List[Tuple[float, dict]]:
+    """```retime``` speeds the job stream up ```speed``` times, i.e. divides
+    the arrival times by ```speed```, or submits all the jobs at once if
+    ```speed``` is 0. If ```scaleDurations``` is set, the durations of the
+    tasks are divided by ```speed``` as well, so that the whole run is
+    replayed faster, with the same load on the workers.
+    """
+    retimed = []
+    for arrivalTime, jobRequest in jobs:
+        job_id = f"{jobIDPrefix}{jobRequest['job_id']}"
+        jobRequest = {
+            "job_id": job_id,
+            **{family: [{"task_id": f"{jobIDPrefix}{task['task_id']}",
+                         "duration": (task["duration"] / speed
+                                      if scaleDurations and speed
+                                      else task["duration"])}
+                        for task in jobRequest[family]]
+               for family in ["map_tasks", "reduce_tasks"]}
+        }
+        retimed.append((arrivalTime / speed if speed else 0.0, jobRequest))
+    return retimed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=("Replay the job stream of a "
+                                                  "recorded run"))
+    parser.add_argument("TRACE",
+                        help=("Folder holding the jobs.csv and tasks.csv of "
+                              "a run, or the output of a master"))
+    parser.add_argument("--speed", type=float, default=1.0,
+                        help=("How many times faster the jobs arrive, or 0 "
+                              "to submit them as fast as possible "
+                              "(default: 1)"))
+    parser.add_argument("--scale-durations", action="store_true",
+                        help="Also divide the task durations by --speed")
+    parser.add_argument("--round-durations", action="store_true",
+                        help="Round the measured durations to whole seconds")
+    parser.add_argument("--interval", type=float, default=1.0,
+                        help=("Seconds between the jobs of a master's "
+                              "output, which has no timestamps (default: 1)"))
+    parser.add_argument("--arrivals", metavar="JOBS_CSV",
+                        help=("jobs.csv of the same run, for the arrival "
+                              "times of a master's output"))
+    parser.add_argument("--host", default="localhost")
+    parser.add_argument("--port", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=64,
+                        help="Maximum number of open connections")
+    parser.add_argument("--job-id-prefix", default="",
+                        help="Prefix of the job and task IDs")
+    parser.add_argument("--output", default="submits.csv",
+                        help="CSV file of the times of the sent jobs")
+    parser.add_argument("--write-workload", metavar="PATH",
+                        help=("Write the job stream to PATH, one job request "
+                              "per line, for the simulation, instead of "
+                              "sending it"))
+    cmdArgs = parser.parse_args()
+    if cmdArgs.speed < 0:
+        parser.error("--speed cannot be negative")
+
+    if os.path.isdir(cmdArgs.TRACE):
+        jobs = readRunFolder(cmdArgs.TRACE, cmdArgs.round_durations)
+    else:
+        jobs = readMasterLog(cmdArgs.TRACE, cmdArgs.interval,
+                             readArrivalTimes(cmdArgs.arrivals)
+                             if cmdArgs.arrivals else None)
+    jobs = retime(jobs, cmdArgs.speed, cmdArgs.scale_durations,
+                  cmdArgs.job_id_prefix)
+    taskCount = sum(len(job["map_tasks"]) + len(job["reduce_tasks"])
+                    for _, job in jobs)
+    print(f"Replaying {len(jobs)} jobs with {taskCount} tasks, arriving over "
+          f"{jobs[-1][0] if jobs else 0:.3f} seconds")
+
+    if cmdArgs.write_workload:
+        writeWorkload(cmdArgs.write_workload, jobs)
+        raise SystemExit(0)
+
+    async def main(output) -> AsyncLoadGenerator:
+        loadGenerator = AsyncLoadGenerator(cmdArgs.host, cmdArgs.port,
+                                           cmdArgs.concurrency, output)
+        await loadGenerator.runOpenLoop(iter(jobs))
+        return loadGenerator
+
+    wallStart = time.perf_counter()
+    with open(cmdArgs.output, "w", newline="") as output:
+        loadGenerator = asyncio.run(main(output))
+    wallTime = time.perf_counter() - wallStart
+
+    printSummary(loadGenerator, "replay", wallTime, cmdArgs.output)
@@ -0,0 +1,217 @@
+"""The workload profiles of the load generator, i.e. how many map and reduce
+tasks the jobs have, how long their tasks last and when the jobs arrive.
+
+A distribution is given as ```KIND:ARGS[:MAX]```, e.g. ```randint:1,4```,
+```pareto:1.5,1:64``` or ```lognormal:1,1```:
+
+| Kind | Arguments | Values |
+|:-:|:-:|:-:|
+| ```const``` | value | always ```value``` |
+| ```randint``` | low, high | whole numbers from ```low``` to ```high``` |
+| ```uniform``` | low, high | uniform between ```low``` and ```high``` |
+| ```exp``` | mean | exponential |
+| ```lognormal``` | median, sigma | log-normal, heavy-tailed |
+| ```pareto``` | alpha, minimum | Pareto, heavy-tailed |
+
+The optional ```MAX``` caps the values, which keeps the heavy-tailed ones
+within what the cluster can run.
+"""
+import random
+from typing import Dict, Iterator, Optional
+
+
+class Distribution:
+    """The ```Distribution``` class draws values from a distribution given
+    as ```KIND:ARGS[:MAX]``` (see the module's documentation).
+
+    **param** ```spec```: The distribution, e.g. ```"randint:1,4"```
+
+    **type** ```spec```: str
+
+    **raise** ```ValueError```: If the distribution is not valid
+    """
+    ARGUMENT_COUNTS: Dict[str, int] = {
+        "const": 1,
+        "randint": 2,
+        "uniform": 2,
+        "exp": 1,
+        "lognormal": 2,
+        "pareto": 2
+    }
+
+    def __init__(self, spec: str) -> None:
+        self.spec = spec
+        kind, _, rest = spec.partition(":")
+        args, _, maximum = rest.partition(":")
+        if kind not in Distribution.ARGUMENT_COUNTS:
+            raise ValueError(f"Unknown distribution {kind!r} in {spec!r}, "
+                             "expected one of "
+                             f"{', '.join(Distribution.ARGUMENT_COUNTS)}")
+        self.kind = kind
+        self.args = [float(arg) for arg in args.split(",") if arg]
+        if len(self.args) != Distribution.ARGUMENT_COUNTS[kind]:
+            raise ValueError(f"{spec!r} needs "
+                             f"{Distribution.ARGUMENT_COUNTS[kind]} "
+                             "argument(s)")
+        self.maximum: Optional[float] = float(maximum) if maximum else None
+
+    def sample(self, rng: random.Random) -> float:
+        """```sample``` draws a value using the random number generator
+        ```rng```.
+
+        **return**: The value, never more than the cap nor less than 0
+
+        **rtype**: float
+        """
+        if self.kind == "const":
+            value = self.args[0]
+        elif self.kind == "randint":
+            value = rng.randint(int(self.args[0]), int(self.args[1]))
+        elif self.kind == "uniform":
+            value = rng.uniform(self.args[0], self.args[1])
+        elif self.kind == "exp":
+            value = rng.expovariate(1 / self.args[0])
+        elif self.kind == "lognormal":
+            value = self.args[0] * rng.lognormvariate(0, self.args[1])
+        else:
+            value = self.args[1] * rng.paretovariate(self.args[0])
+        if self.maximum is not None:
+            value = min(value, self.maximum)
+        return max(value, 0)
+
+    def sampleCount(self, rng: random.Random) -> int:
+        """```sampleCount``` draws a value rounded to a whole number, for
+        the number of tasks of a job.
+        """
+        return int(round(self.sample(rng)))
+
+    def __repr__(self) -> str:
+        return f"Distribution({self.spec!r})"
+
+
+# The built-in profiles, by name. "client" is the workload of the client
+# code (Copy_of_requests.py)
+PROFILES: Dict[str, Dict[str, str]] = {
+    "client": {
+        "maps": "randint:1,4",
+        "reduces": "randint:1,2",
+        "map_duration": "randint:1,4",
+        "reduce_duration": "randint:1,4"
+    },
+    "heavy-tailed": {
+        "maps": "pareto:1.5,1:64",
+        "reduces": "pareto:2,1:16",
+        "map_duration": "lognormal:1,1:60",
+        "reduce_duration": "lognormal:2,1:120"
+    },
+    # Jobs which cost the workers nothing, to load the master alone
+    "tiny": {
+        "maps": "const:1",
+        "reduces": "const:0",
+        "map_duration": "const:0",
+        "reduce_duration": "const:0"
+    }
+}
+
+
+class Workload:
+    """The ```Workload``` class creates the job requests, in the same format
+    as the client code, with the numbers of tasks and their durations drawn
+    from the given distributions.
+
+    **param** ```maps```, ```reduces```: The distributions of the numbers of
+    map and reduce tasks of a job
+
+    **param** ```mapDuration```, ```reduceDuration```: The distributions of
+    the durations of the map and reduce tasks, in seconds
+
+    **param** ```seed```: Seed of the random number generator, so that the
+    same seed gives the same jobs
+
+    **type** ```seed```: Optional[int]
+    """
+    def __init__(self, maps: Distribution, reduces: Distribution,
+                 mapDuration: Distribution, reduceDuration: Distribution,
+                 seed: Optional[int] = None) -> None:
+        self.maps = maps
+        self.reduces = reduces
+        self.mapDuration = mapDuration
+        self.reduceDuration = reduceDuration
+        self.rng = random.Random(seed)
+
+    @staticmethod
+    def fromProfile(name: str, seed: Optional[int] = None,
+                    **overrides: Optional[str]) -> "Workload":
+        """```fromProfile``` creates the workload of the built-in profile
+        ```name```, with any of its distributions replaced by the
+        ```overrides``` which are not None, e.g. ```maps="const:8"```.
+        """
+        specs = dict(PROFILES[name])
+        specs.update({key: value for key, value in overrides.items()
+                      if value is not None})
+        return Workload(Distribution(specs["maps"]),
+                        Distribution(specs["reduces"]),
+                        Distribution(specs["map_duration"]),
+                        Distribution(specs["reduce_duration"]), seed)
+
+    def createJobRequest(self, job_id: str) -> dict:
+        """```createJobRequest``` creates the job request of the job
+        ```job_id```. Every job has at least one task.
+        """
+        mapCount = self.maps.sampleCount(self.rng)
+        reduceCount = self.reduces.sampleCount(self.rng)
+        if mapCount == 0 and reduceCount == 0:
+            mapCount = 1
+        return {
+            "job_id": job_id,
+            "map_tasks": [{"task_id": f"{job_id}_M{i}",
+                           "duration": self.mapDuration.sample(self.rng)}
+                          for i in range(mapCount)],
+            "reduce_tasks": [{"task_id": f"{job_id}_R{i}",
+                              "duration": self.reduceDuration.sample(
+                                  self.rng)}
+                             for i in range(reduceCount)]
+        }
+
+
+def arrivalTimes(process: str, rate: float, seed: Optional[int] = None,
+                 burstOn: float = 1.0, burstOff: float = 1.0
+                 ) -> Iterator[float]:
+    """```arrivalTimes``` yields the arrival times of the jobs of an open
+    loop, in seconds from the first one, for an average of ```rate``` jobs
+    per second.
+
+    - ```poisson```: exponentially distributed inter-arrival times
+    - ```constant```: the same inter-arrival time for all the jobs
+    - ```bursty```: on and off periods, whose lengths are exponentially
+    distributed with means of ```burstOn``` and ```burstOff``` seconds. The
+    jobs only arrive during the on periods, as a Poisson process fast enough
+    for the average rate to be ```rate```
+
+    **raise** ```ValueError```: If ```process``` is not one of them
+    """
+    rng = random.Random(seed)
+    now = 0.0
+    if process == "constant":
+        while True:
+            yield now
+            now += 1 / rate
+    elif process == "poisson":
+        while True:
+            yield now
+            now += rng.expovariate(rate)
+    elif process == "bursty":
+        burstRate = rate * (burstOn + burstOff) / burstOn
+        burstEnd = rng.expovariate(1 / burstOn)
+        while True:
+            while now >= burstEnd:
+                # The arrival fell into an off period, so the next one is
+                # drawn from the start of the next on period, as the
+                # arrivals are memoryless
+                burstStart = burstEnd + rng.expovariate(1 / burstOff)
+                burstEnd = burstStart + rng.expovariate(1 / burstOn)
+                now = burstStart + rng.expovariate(burstRate)
+            yield now
+            now += rng.expovariate(burstRate)
+    else:
+        raise ValueError(f"Unknown arrival process {process!r}")
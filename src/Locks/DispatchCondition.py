@@ -0,0 +1,73 @@
+import threading
+from typing import Optional
+
+
+class DispatchCondition:
+    """ This class is used to create the *common object* across the files for
+    the **master code** to share the ```CONDITION``` on which the task
+    dispatcher thread sleeps, whenever there is no task that can be dispatched
+    or none of the workers have a free slot.
+
+    The dispatcher is woken up as soon as something that it is waiting on
+    changes, i.e. when a worker frees up a slot, when a new job request
+    arrives or when all the map tasks of a job have completed.
+
+    A *generation counter* is incremented on every notification, so that a
+    notification that arrives after the dispatcher has checked the state, but
+    before it has started waiting, is **never lost**.
+    """
+    def __init__(self) -> None:
+        self.CONDITION = threading.Condition()
+        self.generation: int = 0
+
+    def getGeneration(self) -> int:
+        """```getGeneration``` returns the current value of the generation
+        counter. It must be read **before** checking the state being waited
+        on, and then passed to ```waitForChange```.
+
+        **return**: The current value of the generation counter
+
+        **rtype**: int
+        """
+        self.CONDITION.acquire()
+        _generation = self.generation
+        self.CONDITION.release()
+        return _generation
+
+    def notify(self) -> None:
+        """```notify``` increments the generation counter and wakes up all the
+        threads waiting in ```waitForChange```.
+        """
+        self.CONDITION.acquire()
+        self.generation += 1
+        self.CONDITION.notify_all()
+        self.CONDITION.release()
+
+    def waitForChange(self, generation: int,
+                      timeout: Optional[float] = None) -> bool:
+        """```waitForChange``` blocks until the generation counter is
+        different from ```generation```, i.e. until ```notify``` has been
+        called since ```generation``` was read.
+
+        **param** ```generation```: The value returned by ```getGeneration```
+
+        **type** ```generation```: int
+
+        **param** ```timeout```: The maximum time to block for in seconds,
+        defaults to None, i.e. block until notified
+
+        **type** ```timeout```: Optional[float]
+
+        **return**: True if a notification was received, False if the call
+        timed out
+
+        **rtype**: bool
+        """
+        self.CONDITION.acquire()
+        _notified = self.CONDITION.wait_for(
+            lambda: self.generation != generation, timeout)
+        self.CONDITION.release()
+        return _notified
+
+
+dispatch = DispatchCondition()
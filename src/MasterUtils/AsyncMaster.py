@@ -0,0 +1,465 @@
+import asyncio
+import json
+import socket
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
+import colored as TC
+from cryptography.fernet import Fernet
+
+# This lock is used to get access to print onto the standard output
+from Locks.MasterPrintLock import master
+
+from MasterUtils.CLIText import error_text, info_text
+from MasterUtils.WorkerSender import AsyncWorkerSender
+from MasterUtils.WorkerStateTracker import StateTracker
+from MasterUtils.WorkerUpdates import applyWorkerUpdates
+from UpdateTracker.JobUpdateTracker import Tracker as JobUpdateTracker
+
+from Scheduler.JobRequests import JobRequestHandler
+from Scheduler.RandomScheduling import RandomScheduler
+from Scheduler.RoundRobinScheduling import RoundRobinScheduler
+from Scheduler.LeastLoadedScheduling import LeastLoadedScheduler
+from Scheduler.TaskDispatch import sendTask
+
+from Communication.codec import CODECS, BinaryCodec
+from Communication.protocol import FrameReader, YACS_Protocol, \
+    messageToMasterType
+from Communication.security import SESSIONS
+from Communication.timescale import TimeScale
+
+
+class AsyncMaster:
+    """The ```AsyncMaster``` class runs the master on a single ```asyncio```
+    event loop, instead of a thread per worker, per job and for each of the
+    job requests and the task dispatcher. It behaves the same way as the
+    threaded master in ```master.py```:
+
+    1. The workers are connected to concurrently, retrying until they are
+       listening, and are sent the *connect back* request, and their task
+       updates are received on **port 5001**
+    1. The job requests from the client code are received on **port 5000**,
+       once ```quorum``` workers have connected back
+    1. The tasks are dispatched to the workers which have connected back
+       using the chosen scheduling algorithm
+
+    Each connection is handled by its own coroutine, and the task dispatcher
+    waits on ```wakeUp```, which is set every time a job request or a task
+    update is received. The dispatch and completion of every job are
+    reported by the callbacks which ```master.py``` subscribes to the
+    ```JobRequestHandler``` and the ```JobUpdateTracker``` events.
+
+    **param** ```workerStateTracker```: Tracks the states of the worker nodes,
+    created with ```connect=False``` as the workers are connected to here
+
+    **type** ```workerStateTracker```: StateTracker
+
+    **param** ```jobUpdateTracker```: Tracks the jobs assigned to the workers,
+    and their corresponding updates
+
+    **type** ```jobUpdateTracker```: JobUpdateTracker
+
+    **param** ```jobRequestHandler```: Tracks the tasks of the jobs which are
+    yet to be dispatched
+
+    **type** ```jobRequestHandler```: JobRequestHandler
+
+    **param** ```typeOfScheduling```: One of ```"LL"```, ```"RR"``` or
+    ```"RANDOM"```
+
+    **type** ```typeOfScheduling```: str
+
+    **param** ```codecs```: Names of the codecs offered to the workers, in
+    order of preference
+
+    **type** ```codecs```: Sequence[str]
+
+    **param** ```security_modes```: Names of the security modes offered to the
+    workers, in order of preference
+
+    **type** ```security_modes```: Sequence[str]
+
+    **param** ```time_scale```: How many times faster than real time the
+    workers are to run, offered to them along with its epoch
+
+    **type** ```time_scale```: TimeScale
+
+    **param** ```quorum```: The number of workers which have to connect back
+    before the job requests are accepted, defaults to all the workers
+
+    **type** ```quorum```: Optional[int], optional
+
+    **param** ```connectTimeout```: Seconds to keep retrying the connections
+    to the workers for, and to wait for the quorum of workers for, defaults
+    to ```StateTracker.CONNECT_TIMEOUT```
+
+    **type** ```connectTimeout```: float, optional
+    """
+    SCHEDULERS = {
+        "LL": LeastLoadedScheduler,
+        "RR": RoundRobinScheduler,
+        "RANDOM": RandomScheduler
+    }
+
+    JOB_REQUEST_ADDR: Tuple[str, int] = ("localhost", 5000)
+    WORKER_UPDATES_PORT: int = 5001
+    BUFFER_SIZE: int = 4096
+
+    def __init__(self, workerStateTracker: StateTracker,
+                 jobUpdateTracker: JobUpdateTracker,
+                 jobRequestHandler: JobRequestHandler,
+                 typeOfScheduling: str,
+                 codecs: Sequence[str] = ("json",),
+                 security_modes: Sequence[str] = ("fernet",),
+                 time_scale: TimeScale = TimeScale(),
+                 quorum: Optional[int] = None,
+                 connectTimeout: float = StateTracker.CONNECT_TIMEOUT
+                 ) -> None:
+        self.workerStateTracker = workerStateTracker
+        self.jobUpdateTracker = jobUpdateTracker
+        self.jobRequestHandler = jobRequestHandler
+        self.scheduler = AsyncMaster.SCHEDULERS[typeOfScheduling]
+        self.codecs = codecs
+        self.security_modes = security_modes
+        self.time_scale = time_scale
+        self.quorum = len(workerStateTracker.workerIDs) if quorum is None \
+            else quorum
+        self.connectTimeout = connectTimeout
+
+        self.PUBLIC_KEY = Fernet.generate_key()
+        self.PUBLIC_KEY_OBJ = Fernet(self.PUBLIC_KEY)
+
+        # Created on the event loop, by run()
+        self.wakeUp: Optional[asyncio.Event] = None
+        self.quorumReady: Optional[asyncio.Event] = None
+        # Workers' streams for sending tasks, by worker ID
+        self.taskWriters: Dict[int, asyncio.StreamWriter] = {}
+
+    async def run(self) -> bool:
+        """```run``` starts listening for worker updates, connects to the
+        workers, and once ```quorum``` of them have connected back, starts
+        listening for job requests and dispatches tasks forever.
+
+        **return**: False if the quorum of workers did not connect back in
+        time
+
+        **rtype**: bool
+        """
+        self.wakeUp = asyncio.Event()
+        self.quorumReady = asyncio.Event()
+
+        # Listen for the workers before asking them to connect back
+        workerUpdatesServer = await asyncio.start_server(
+            self.handleWorker, socket.gethostname(),
+            AsyncMaster.WORKER_UPDATES_PORT, reuse_address=True)
+
+        master.PRINT_LOCK.acquire()
+        print(info_text(("Listening to updates from the workers on port: "
+                         f"{AsyncMaster.WORKER_UPDATES_PORT}")))
+        master.PRINT_LOCK.release()
+
+        async with workerUpdatesServer:
+            connectTasks = [asyncio.ensure_future(self.connectToWorker(
+                                workerID, frame))
+                            for workerID, frame in self.workerStateTracker
+                            .createConnectBackFrames(self.PUBLIC_KEY,
+                                                     self.codecs,
+                                                     self.security_modes,
+                                                     self.time_scale.factor,
+                                                     self.time_scale.epoch)]
+            try:
+                try:
+                    await asyncio.wait_for(self.quorumReady.wait(),
+                                           self.connectTimeout)
+                except asyncio.TimeoutError:
+                    master.PRINT_LOCK.acquire()
+                    print(error_text((
+                        f"Only {self.workerStateTracker.readyWorkerCount} "
+                        f"of the {self.quorum} workers needed are ready "
+                        f"after {self.connectTimeout:g}s")))
+                    master.PRINT_LOCK.release()
+                    return False
+
+                # Job requests are only accepted once the quorum is ready
+                jobRequestServer = await asyncio.start_server(
+                    self.handleJobRequest, *AsyncMaster.JOB_REQUEST_ADDR,
+                    reuse_address=True)
+
+                master.PRINT_LOCK.acquire()
+                print(info_text((
+                    f"{self.workerStateTracker.readyWorkerCount} of "
+                    f"{len(self.workerStateTracker.workerIDs)} workers "
+                    "ready, accepting job requests")))
+                print(info_text("Listening for incoming job requests"))
+                master.PRINT_LOCK.release()
+
+                async with jobRequestServer:
+                    await self.dispatchTasks()
+            finally:
+                for connectTask in connectTasks:
+                    connectTask.cancel()
+                # The streams have to be closed while the event loop is
+                # still running
+                self.workerStateTracker.LOCK.acquire()
+                for workerID, writer in self.taskWriters.items():
+                    writer.close()
+                    self.workerStateTracker.workerState[workerID][
+                        "socket"] = None
+                self.workerStateTracker.LOCK.release()
+        return True
+
+    async def connectToWorker(self, workerID: int, frame: bytes) -> None:
+        """```connectToWorker``` opens the connection to the worker for
+        sending it tasks, retrying until the worker is listening, and sends
+        it its *connect back* request ```frame```. The workers are connected
+        to concurrently, by one of these coroutines each.
+        """
+        deadline = time.monotonic() + self.connectTimeout
+        delay = 0.05
+        while True:
+            try:
+                _, writer = await asyncio.open_connection(
+                    socket.gethostname(),
+                    self.workerStateTracker.workerState[workerID]["port"])
+                break
+            except OSError:
+                if time.monotonic() + delay > deadline:
+                    master.PRINT_LOCK.acquire()
+                    print(error_text(("Unable to connect to worker ID: "
+                                      f"{workerID}")))
+                    master.PRINT_LOCK.release()
+                    return
+                await asyncio.sleep(delay)
+                delay = min(2 * delay, StateTracker.MAX_RETRY_DELAY)
+
+        self.taskWriters[workerID] = writer
+        self.workerStateTracker.LOCK.acquire()
+        self.workerStateTracker.workerState[workerID]["socket"] = writer
+        self.workerStateTracker.LOCK.release()
+
+        writer.write(frame)
+        await writer.drain()
+
+    async def handleJobRequest(self, reader: asyncio.StreamReader,
+                               writer: asyncio.StreamWriter) -> None:
+        """```handleJobRequest``` receives a job request from the client code,
+        and adds it to the ```jobRequestHandler``` and the
+        ```jobUpdateTracker```.
+        """
+        # The client closes the connection once it has sent the request
+        try:
+            jobRequest = await reader.read()
+        except asyncio.CancelledError:
+            # The master is exiting
+            jobRequest = b""
+        writer.close()
+        if not jobRequest:
+            return
+
+        # Decode and parse the JSON string
+        parsedJSON_Msg = json.loads(jobRequest.decode())
+
+        if not parsedJSON_Msg["map_tasks"] and \
+                not parsedJSON_Msg["reduce_tasks"]:
+            master.PRINT_LOCK.acquire()
+            print(info_text((f"Job request received with {TC.attr(1)}no "
+                             f"map nor reduce tasks!{TC.attr(0)}")))
+            master.PRINT_LOCK.release()
+            return
+
+        # The workers pick the first codec offered, and the binary codec
+        # cannot encode IDs which are not strings
+        if self.codecs[0] == BinaryCodec.NAME and \
+                not BinaryCodec.hasStringIDs(parsedJSON_Msg):
+            master.PRINT_LOCK.acquire()
+            print(error_text(("Refusing the job request "
+                              f"{parsedJSON_Msg['job_id']!r}, as the binary "
+                              "codec needs its job and task IDs to be "
+                              "strings")))
+            master.PRINT_LOCK.release()
+            return
+
+        # The job is tracked before its tasks can be dispatched, so that
+        # their updates always find it
+        self.jobUpdateTracker.LOCK.acquire()
+        self.jobUpdateTracker.addJobRequest(parsedJSON_Msg)
+        self.jobUpdateTracker.LOCK.release()
+
+        self.jobRequestHandler.LOCK.acquire()
+        self.jobRequestHandler.addJobRequest(parsedJSON_Msg)
+        self.jobRequestHandler.LOCK.release()
+
+        master.PRINT_LOCK.acquire()
+        print(info_text(f"Received job request: {parsedJSON_Msg['job_id']}"))
+        print("Pending job requests: "
+              f"{len(self.jobRequestHandler.jobRequests)}")
+        master.PRINT_LOCK.release()
+
+        self.wakeUp.set()
+
+    async def handleWorker(self, reader: asyncio.StreamReader,
+                           writer: asyncio.StreamWriter) -> None:
+        """```handleWorker``` receives the *connect back* response of a
+        worker, followed by its task updates, for as long as the worker stays
+        connected.
+        """
+        frameReader = FrameReader()
+        frames = await frameReader.readFramesFromStream(
+            reader, AsyncMaster.BUFFER_SIZE)
+        if frames is None:
+            writer.close()
+            return
+
+        # The first frame is the worker's connect back response
+        response_msg = json.loads(frames.pop(0).decode())
+        WORKER_ID = int(response_msg["worker_id"])
+        _worker_key = self.PUBLIC_KEY_OBJ.decrypt(
+            response_msg["enc_pri_key"].encode())
+        # Workers which do not take part in the codec and security mode
+        # handshakes use JSON and Fernet. A codec which was not offered is
+        # refused.
+        _worker_codec_name = response_msg.get("codec", "json")
+        if _worker_codec_name not in self.codecs:
+            self.refuseWorker(WORKER_ID, writer,
+                              (f"it chose the codec {_worker_codec_name!r}, "
+                               f"which was not offered: {list(self.codecs)}"))
+            return
+        _worker_codec = CODECS[_worker_codec_name]
+        # A security mode which was not offered is refused, as the worker
+        # could otherwise downgrade the encryption of the frames
+        _worker_security_mode = response_msg.get("security_mode", "fernet")
+        if _worker_security_mode not in self.security_modes:
+            self.refuseWorker(WORKER_ID, writer,
+                              (f"it chose the security mode "
+                               f"{_worker_security_mode!r}, which was not "
+                               f"offered: {list(self.security_modes)}"))
+            return
+        _worker_session = SESSIONS[_worker_security_mode](_worker_key)
+        # Workers which do not take part in the time scale handshake run in
+        # real time
+        _worker_time_scale = response_msg.get("time_scale", 1.0)
+
+        self.workerStateTracker.LOCK.acquire()
+        _state = self.workerStateTracker.workerState[WORKER_ID]
+        _state["pri_key"] = _worker_key
+        _state["codec"] = _worker_codec
+        _state["session"] = _worker_session
+        _state["sender"] = AsyncWorkerSender(self.taskWriters[WORKER_ID],
+                                             _worker_session, _worker_codec)
+        self.workerStateTracker.markWorkerReady(WORKER_ID)
+        _readyWorkerCount = self.workerStateTracker.readyWorkerCount
+        self.workerStateTracker.LOCK.release()
+
+        master.PRINT_LOCK.acquire()
+        print(info_text(f"Connected to worker ID: {WORKER_ID} at address:"))
+        print(f"IP Address: {writer.get_extra_info('peername')[0]}")
+        print(f"Socket: {writer.get_extra_info('peername')[1]}")
+        print(f"Codec: {_worker_codec.NAME}")
+        print(f"Security mode: {_worker_session.NAME}")
+        print(f"Time scale: {_worker_time_scale}")
+        if _worker_time_scale != self.time_scale.factor:
+            print(error_text((f"Worker {WORKER_ID} runs at "
+                              f"{_worker_time_scale}x real time instead of "
+                              f"{self.time_scale.factor}x, so the times of "
+                              "its tasks are not comparable!")))
+        print(f"Ready workers: {_readyWorkerCount}")
+        master.PRINT_LOCK.release()
+
+        if _readyWorkerCount >= self.quorum:
+            self.quorumReady.set()
+        # The worker's slots can now be dispatched tasks to
+        self.wakeUp.set()
+
+        while frames is not None:
+            # Every frame holds a batch of encrypted messages
+            updates: List[messageToMasterType] = \
+                [_worker_codec.decodeMessageToMaster(message)
+                 for frame in frames
+                 for message in YACS_Protocol.splitBatch(
+                     _worker_session.decrypt(frame))]
+
+            if updates:
+                master.PRINT_LOCK.acquire()
+                print("Received worker update at master: "
+                      f"{json.dumps(updates)}")
+                master.PRINT_LOCK.release()
+
+                applyWorkerUpdates(self.workerStateTracker,
+                                   self.jobUpdateTracker, updates)
+                # Slots have been freed, and the reduce tasks of a job may
+                # now be ready to be dispatched
+                self.wakeUp.set()
+
+            try:
+                frames = await frameReader.readFramesFromStream(
+                    reader, AsyncMaster.BUFFER_SIZE)
+            except asyncio.CancelledError:
+                # The master is exiting
+                break
+
+        writer.close()
+
+    def refuseWorker(self, workerID: int, writer: asyncio.StreamWriter,
+                     reason: str) -> None:
+        """```refuseWorker``` closes both the connections to the worker with
+        ID ```workerID```, instead of registering it, when its *connect
+        back* response cannot be accepted. The worker is never sent any
+        tasks.
+        """
+        master.PRINT_LOCK.acquire()
+        print(error_text(f"Refusing worker {workerID}, as {reason}"))
+        master.PRINT_LOCK.release()
+
+        writer.close()
+        _taskWriter = self.taskWriters.pop(workerID, None)
+        self.workerStateTracker.LOCK.acquire()
+        self.workerStateTracker.workerState[workerID]["socket"] = None
+        self.workerStateTracker.LOCK.release()
+        if _taskWriter is not None:
+            _taskWriter.close()
+
+    async def dispatchTasks(self) -> None:
+        """```dispatchTasks``` dispatches the waiting tasks to the workers
+        picked by the scheduling algorithm. When there is no task that can be
+        dispatched, or no worker with a free slot, it waits until a job
+        request or a task update is received.
+
+        As in the threaded dispatchers, a task is taken first, and a worker
+        is only picked once there is a task for it, so the scheduler's state
+        (e.g. the Round-Robin cursor) only changes when a task is dispatched.
+        """
+        cursor: int = 0
+        jobID_family_task = None
+        while True:
+            if jobID_family_task is None:
+                self.jobRequestHandler.LOCK.acquire()
+                if not self.jobRequestHandler.isEmpty():
+                    jobID_family_task = self.jobRequestHandler\
+                        .getWaitingTask()
+                self.jobRequestHandler.LOCK.release()
+
+            workerID = None
+            if jobID_family_task is not None:
+                self.workerStateTracker.LOCK.acquire()
+                workerID, _cursor = self.scheduler.selectWorker(
+                    self.workerStateTracker, cursor)
+                if workerID is not None:
+                    self.workerStateTracker.allocateSlot(workerID)
+                    freeSlots = self.workerStateTracker\
+                        .workerState[workerID]["free slots"]
+                    cursor = _cursor
+                self.workerStateTracker.LOCK.release()
+
+            # Nothing can change until another coroutine runs, so there is
+            # no missed wake up between the checks above and the wait. The
+            # task taken, if any, waits for a slot to be freed up.
+            if workerID is None:
+                self.wakeUp.clear()
+                await self.wakeUp.wait()
+                continue
+
+            sendTask(self.jobRequestHandler, self.workerStateTracker,
+                     workerID, freeSlots, jobID_family_task)
+            jobID_family_task = None
+
+            # Let the other coroutines run between the tasks
+            await asyncio.sleep(0)
@@ -0,0 +1,52 @@
+import colored as TC
+
+
+def info_text(text):
+    """```info_text``` returns a modified version of the input ```text``` such
+    that it looks like an *information message* when printed on the CLI.
+
+    **param** ```text```: The input string that will be modified to look like
+    an *information message* when printed on the CLI
+
+    **type** ```text```: str
+
+    **return**: The modified version of the input ```text``` such
+    that it looks like an *information message* when printed on the CLI
+
+    **rtype**: str
+    """
+    return f"{TC.fg(6) + TC.attr(1)}INFO:{TC.attr(0)} {text}"
+
+
+def error_text(text):
+    """```error_text``` returns a modified version of the input ```text``` such
+    that it looks like an *error message* when printed on the CLI.
+
+    **param** ```text```: The input string that will be modified to look like
+    an *error message* when printed on the CLI
+
+    **type** ```text```: str
+
+    **return**: The modified version of the input ```text``` such
+    that it looks like an *error message* when printed on the CLI
+
+    **rtype**: str
+    """
+    return f"{TC.fg(1) + TC.attr(1)}ERROR:{TC.attr(0)} {text}"
+
+
+def success_text(text):
+    """```success_text``` returns a modified version of the input ```text```
+    such that it looks like a *success message* when printed on the CLI.
+
+    **param** ```text```: The input string that will be modified to look like
+    a *success message* when printed on the CLI
+
+    **type** ```text```: str
+
+    **return**: The modified version of the input ```text``` such
+    that it looks like a *success message* when printed on the CLI
+
+    **rtype**: str
+    """
+    return f"{TC.fg(2) + TC.attr(1)}SUCCESS:{TC.attr(0)} {text}"
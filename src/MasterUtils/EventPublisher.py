@@ -0,0 +1,56 @@
+from typing import Callable, Dict, List
+
+
+class EventPublisher:
+    """The ```EventPublisher``` class lets the master's objects announce
+    events (e.g. *all the map tasks of a job have completed*) to the other
+    objects that have subscribed to them, instead of those objects having to
+    poll for the change.
+
+    The callbacks are called synchronously, in the thread that publishes the
+    event, and while any lock held by the publisher is still held. Hence a
+    callback must not acquire a lock that is held by a thread which could be
+    waiting on the publisher's lock.
+    """
+    def __init__(self) -> None:
+        self.subscribers: Dict[str, List[Callable]] = {}
+
+    def subscribe(self, event: str, callback: Callable) -> None:
+        """```subscribe``` registers ```callback``` to be called every time
+        ```event``` is published.
+
+        **param** ```event```: Name of the event
+
+        **type** ```event```: str
+
+        **param** ```callback```: Called with the arguments of the event
+
+        **type** ```callback```: Callable
+        """
+        self.subscribers.setdefault(event, []).append(callback)
+
+    def unsubscribe(self, event: str, callback: Callable) -> None:
+        """```unsubscribe``` stops ```callback``` from being called when
+        ```event``` is published.
+
+        **param** ```event```: Name of the event
+
+        **type** ```event```: str
+
+        **param** ```callback```: A callback that was passed to
+        ```subscribe```
+
+        **type** ```callback```: Callable
+        """
+        self.subscribers[event].remove(callback)
+
+    def publish(self, event: str, *args) -> None:
+        """```publish``` calls all the callbacks subscribed to ```event```,
+        in the order in which they subscribed, with ```args```.
+
+        **param** ```event```: Name of the event
+
+        **type** ```event```: str
+        """
+        for callback in self.subscribers.get(event, []):
+            callback(*args)
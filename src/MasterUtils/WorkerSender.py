@@ -0,0 +1,160 @@
+import asyncio
+import queue
+import socket
+import threading
+from typing import List, Optional
+
+# This lock is used to get access to print onto the standard output
+from Locks.MasterPrintLock import master
+from Communication.protocol import YACS_Protocol
+
+
+class WorkerSender:
+    """The ```WorkerSender``` class sends the tasks to a single worker from
+    its own thread, so that the task dispatcher never waits on the worker's
+    socket, let alone while holding the ```StateTracker.LOCK```.
+
+    The task dispatcher puts the encoded messages in the sender's bounded
+    queue, using ```send()```. The sender's thread encrypts every message in
+    its own frame, and sends all the frames waiting in the queue using a
+    single ```sendall```.
+
+    **param** ```workerID```: ID of the worker to send the tasks to
+
+    **type** ```workerID```: int
+
+    **param** ```workerSocket```: The socket used to send tasks to the worker
+
+    **type** ```workerSocket```: socket.socket
+
+    **param** ```session```: Encrypts the frames, using the security mode
+    chosen by the worker
+
+    **type** ```session```: Union[AEADSession, FernetSession, PlainSession]
+
+    **param** ```codec```: The codec chosen by the worker, used to print the
+    messages sent
+
+    **type** ```codec```: Union[JSONCodec, BinaryCodec]
+
+    **param** ```maxQueueSize```: The maximum number of messages waiting to
+    be sent. As a task is only sent to a worker with a free slot, the number
+    of slots of the worker is enough for ```send()``` to never block
+
+    **type** ```maxQueueSize```: int
+    """
+    def __init__(self, workerID: int, workerSocket: socket.socket, session,
+                 codec, maxQueueSize: int) -> None:
+        self.workerID = workerID
+        self.socket = workerSocket
+        self.session = session
+        self.codec = codec
+        self.queue: queue.Queue = queue.Queue(maxQueueSize)
+
+        self.thread = threading.Thread(name=(f"Worker-{workerID} Task "
+                                             "Sender"),
+                                       target=self.sendTasks)
+        self.thread.daemon = True
+        self.thread.start()
+
+    def send(self, message: bytes) -> None:
+        """```send``` queues the encoded ```message``` to be sent to the
+        worker. It only blocks if the queue is full.
+
+        **param** ```message```: The message created using the worker's
+        codec
+
+        **type** ```message```: bytes
+        """
+        self.queue.put(message)
+
+    def close(self) -> None:
+        """```close``` stops the sender's thread, once all the messages
+        queued before it have been sent.
+        """
+        self.queue.put(None)
+
+    def sendTasks(self) -> None:
+        """```sendTasks``` is run by the sender's thread. It waits for
+        messages to be queued, and sends all the queued messages together.
+        """
+        while True:
+            # Block until a message is queued, and then take all the other
+            # messages that are waiting as well
+            messages: List[Optional[bytes]] = [self.queue.get()]
+            while True:
+                try:
+                    messages.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            _isClosed: bool = None in messages
+            messages = [message for message in messages
+                        if message is not None]
+
+            if messages:
+                self.socket.sendall(b"".join([
+                    YACS_Protocol.createFrame(self.session.encrypt(message))
+                    for message in messages]))
+
+                master.PRINT_LOCK.acquire()
+                for message in messages:
+                    print("Sending task to worker: "
+                          f"{self.codec.messageToWorkerJSON(message)}")
+                master.PRINT_LOCK.release()
+
+            if _isClosed:
+                break
+
+
+class AsyncWorkerSender:
+    """The ```AsyncWorkerSender``` class is used in place of the
+    ```WorkerSender``` by the asyncio master (see ```AsyncMaster```), and has
+    the same interface.
+
+    ```send()``` encrypts the message in a frame and writes it to the
+    worker's stream, which buffers it until the event loop sends it. As a task
+    is only sent to a worker with a free slot, the buffer never holds more
+    frames than the worker has slots.
+
+    **param** ```writer```: The stream used to send tasks to the worker
+
+    **type** ```writer```: asyncio.StreamWriter
+
+    **param** ```session```: Encrypts the frames, using the security mode
+    chosen by the worker
+
+    **type** ```session```: Union[AEADSession, FernetSession, PlainSession]
+
+    **param** ```codec```: The codec chosen by the worker, used to print the
+    messages sent
+
+    **type** ```codec```: Union[JSONCodec, BinaryCodec]
+    """
+    def __init__(self, writer: asyncio.StreamWriter, session, codec) -> None:
+        self.writer = writer
+        self.session = session
+        self.codec = codec
+
+    def send(self, message: bytes) -> None:
+        """```send``` queues the encoded ```message``` to be sent to the
+        worker. It never blocks.
+
+        **param** ```message```: The message created using the worker's
+        codec
+
+        **type** ```message```: bytes
+        """
+        self.writer.write(YACS_Protocol.createFrame(
+            self.session.encrypt(message)))
+
+        master.PRINT_LOCK.acquire()
+        print("Sending task to worker: "
+              f"{self.codec.messageToWorkerJSON(message)}")
+        master.PRINT_LOCK.release()
+
+    def close(self) -> None:
+        """```close``` closes the worker's stream, once all the messages
+        written to it have been sent.
+        """
+        self.writer.close()
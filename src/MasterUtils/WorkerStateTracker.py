@@ -1,13 +1,25 @@
+import heapq
 import socket
+import threading
+import time
 from threading import Lock
-from typing import List, Optional
+from typing import Dict, List, Optional, Tuple
 
+from Communication.codec import JSONCodec
 from Communication.protocol import YACS_Protocol
+from Locks.DispatchCondition import dispatch
+from MasterUtils.WorkerSender import WorkerSender
 # from Locks.MasterPrintLock import master
 
 
 class StateTracker:
-    def __init__(self, confObj: dict) -> None:
+    # Seconds to keep retrying the connections to the workers for
+    CONNECT_TIMEOUT: float = 60.0
+    # Longest wait between two attempts to connect to a worker
+    MAX_RETRY_DELAY: float = 1.0
+
+    def __init__(self, confObj: dict, connect: bool = True,
+                 ready: bool = True) -> None:
         """Store the list of the worker dictionaries (originally got
         from the configuration file given to the master) in a new internal
         dictionary indexed using the ```worker_id``` as key.
@@ -16,35 +28,202 @@ class StateTracker:
         data stored in the worker configuration file
 
         **type** ```configObj```: dict
+
+        **param** ```connect```: Whether to connect to the workers' task
+        dispatch sockets. When False, the ```"socket"``` of every worker is
+        set to None so that it can be filled in later (used by the
+        benchmarks), defaults to True
+
+        **type** ```connect```: bool, optional
+
+        **param** ```ready```: Whether the workers can be sent tasks from the
+        start. When False, no worker is picked for a task until it is marked
+        ready using ```markWorkerReady()```, i.e. once it has connected back
+        to the master, defaults to True
+
+        **type** ```ready```: bool, optional
         """
         self.workerState = {}
         self.workerIDs: List[int] = []
         self.LOCK = Lock()
+        # Notified whenever a worker is marked ready
+        self.READY = threading.Condition(self.LOCK)
+        self.readyWorkerCount: int = 0
+
+        # Heap of (-free slots, worker ID) entries used to find the least
+        # loaded worker. Entries are never updated in place, instead a new
+        # entry is pushed whenever the free slots of a worker change, and
+        # the stale entries are discarded lazily (see getLeastLoadedWorkerID)
+        self.leastLoadedHeap: List[Tuple[int, int]] = []
 
         for worker in confObj["workers"]:
             # master.PRINT_LOCK.acquire()
             # print(f"{worker['worker_id']=}")
             # master.PRINT_LOCK.release()
 
-            workerConnSocket = socket.socket(socket.AF_INET,
-                                             socket.SOCK_STREAM)
-            workerConnSocket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR,
-                                        1)
-            # master.PRINT_LOCK.acquire()
-            # print(f'{worker["port"]=}')
-            # master.PRINT_LOCK.release()
-
-            workerConnSocket.connect((socket.gethostname(), worker["port"]))
             self.workerState[worker["worker_id"]] = {
                 "slots": worker["slots"],
                 "port": worker["port"],
                 "free slots": worker["slots"],
-                "socket": workerConnSocket
+                # Set by connectToWorkers()
+                "socket": None,
+                # Whether the worker can be picked for a task
+                "ready": ready,
+                # Replaced by the codec chosen by the worker when it
+                # connects back to the master
+                "codec": JSONCodec,
+                # Encrypts the frames sent to the worker, created once the
+                # worker connects back to the master
+                "session": None,
+                # Sends the tasks to the worker, started once the worker
+                # connects back to the master
+                "sender": None
             }
             self.workerIDs.append(worker["worker_id"])
 
         # Sort the workerIDs
         self.workerIDs.sort()
+        if ready:
+            self.readyWorkerCount = len(self.workerIDs)
+
+        self.rebuildLeastLoadedHeap()
+
+        if connect:
+            _failed_workerIDs = self.connectToWorkers()
+            if _failed_workerIDs:
+                raise ConnectionError("Unable to connect to the workers: "
+                                      f"{_failed_workerIDs}")
+
+    def connectToWorker(self, workerID: int,
+                        timeout: float = CONNECT_TIMEOUT) -> bool:
+        """```connectToWorker``` connects to the socket on which the worker
+        with ID ```workerID``` receives its tasks. The worker may not have
+        started listening yet, so the connection is retried, waiting twice
+        as long every time (up to ```MAX_RETRY_DELAY```), for up to
+        ```timeout``` seconds.
+
+        **param** ```workerID```: ID of the worker to connect to
+
+        **type** ```workerID```: int
+
+        **param** ```timeout```: Seconds to keep retrying for, defaults to
+        ```CONNECT_TIMEOUT```
+
+        **type** ```timeout```: float, optional
+
+        **return**: Whether the connection was made
+
+        **rtype**: bool
+        """
+        _deadline = time.monotonic() + timeout
+        _delay = 0.05
+        while True:
+            workerConnSocket = socket.socket(socket.AF_INET,
+                                             socket.SOCK_STREAM)
+            workerConnSocket.setsockopt(socket.SOL_SOCKET,
+                                        socket.SO_REUSEADDR, 1)
+            try:
+                workerConnSocket.connect((socket.gethostname(),
+                                          self.workerState[workerID]["port"]))
+                break
+            except OSError:
+                workerConnSocket.close()
+                if time.monotonic() + _delay > _deadline:
+                    return False
+                time.sleep(_delay)
+                _delay = min(2 * _delay, StateTracker.MAX_RETRY_DELAY)
+
+        self.LOCK.acquire()
+        self.workerState[workerID]["socket"] = workerConnSocket
+        self.LOCK.release()
+        return True
+
+    def connectToWorkers(self, timeout: float = CONNECT_TIMEOUT,
+                         frames: Optional[Dict[int, bytes]] = None
+                         ) -> List[int]:
+        """```connectToWorkers``` connects to all the workers in parallel,
+        each one using ```connectToWorker()```, and sends each worker its
+        frame in ```frames``` (e.g. its *connect back* request) as soon as it
+        is connected. It returns once every worker is connected, or could not
+        be connected to in time.
+
+        **param** ```timeout```: Seconds to keep retrying for, defaults to
+        ```CONNECT_TIMEOUT```
+
+        **type** ```timeout```: float, optional
+
+        **param** ```frames```: The frame to send to every worker, by worker
+        ID, defaults to None
+
+        **type** ```frames```: Optional[Dict[int, bytes]], optional
+
+        **return**: The IDs of the workers which could not be connected to
+
+        **rtype**: List[int]
+        """
+        _failed_workerIDs: List[int] = []
+
+        def connect(workerID: int) -> None:
+            if not self.connectToWorker(workerID, timeout):
+                self.LOCK.acquire()
+                _failed_workerIDs.append(workerID)
+                self.LOCK.release()
+            elif frames is not None:
+                self.workerState[workerID]["socket"].sendall(
+                    frames[workerID])
+
+        _threads = [threading.Thread(target=connect, args=(workerID,),
+                                     name=f"Connect to Worker-{workerID}",
+                                     daemon=True)
+                    for workerID in self.workerIDs]
+        for _thread in _threads:
+            _thread.start()
+        for _thread in _threads:
+            _thread.join()
+        return sorted(_failed_workerIDs)
+
+    def markWorkerReady(self, workerID: int) -> None:
+        """```markWorkerReady``` lets the worker with ID ```workerID``` be
+        picked for tasks, once it has connected back to the master, and wakes
+        up the task dispatcher as well as the threads waiting in
+        ```waitForReadyWorkers()```. It must be called while holding the
+        ```LOCK```.
+
+        **param** ```workerID```: ID of the worker which is ready
+
+        **type** ```workerID```: int
+        """
+        if self.workerState[workerID]["ready"]:
+            return
+        self.workerState[workerID]["ready"] = True
+        self.readyWorkerCount += 1
+        self.pushLeastLoadedEntry(workerID)
+        self.READY.notify_all()
+        dispatch.notify()
+
+    def waitForReadyWorkers(self, count: int,
+                            timeout: Optional[float] = None) -> bool:
+        """```waitForReadyWorkers``` blocks until at least ```count``` workers
+        are ready, or until ```timeout``` seconds have passed.
+
+        **param** ```count```: The number of workers to wait for
+
+        **type** ```count```: int
+
+        **param** ```timeout```: The maximum time to block for in seconds,
+        defaults to None, i.e. block until they are ready
+
+        **type** ```timeout```: Optional[float]
+
+        **return**: Whether ```count``` workers are ready
+
+        **rtype**: bool
+        """
+        self.LOCK.acquire()
+        _isReady = self.READY.wait_for(
+            lambda: self.readyWorkerCount >= count, timeout)
+        self.LOCK.release()
+        return _isReady
 
     def isWorkerFree(self, workerID: int, demand: int = 1) -> bool:
         """```isWorkerFree``` checks if the worker whose ```worker_id``` key
@@ -72,8 +251,8 @@ class StateTracker:
         # print(f"{workerID in self.workerIDs}")
         # master.PRINT_LOCK.release()
 
-        return True if self.workerState[workerID]["free slots"] >= demand \
-            else False
+        return True if self.workerState[workerID]["ready"] and \
+            self.workerState[workerID]["free slots"] >= demand else False
 
     def showWorkerStates(self) -> None:
         """```showWorkerStates``` displays the contents of the workerState
@@ -98,6 +277,36 @@ class StateTracker:
         """
         return self.workerState[workerID]["socket"]
 
+    def startWorkerSender(self, workerID: int) -> None:
+        """```startWorkerSender``` starts the ```WorkerSender``` of the worker
+        with ID ```workerID```, once its codec and session are known.
+
+        **param** ```workerID```: ID of the worker which has connected back
+
+        **type** ```workerID```: int
+        """
+        self.workerState[workerID]["sender"] = \
+            WorkerSender(workerID, self.workerState[workerID]["socket"],
+                         self.workerState[workerID]["session"],
+                         self.workerState[workerID]["codec"],
+                         self.workerState[workerID]["slots"])
+
+    def getWorkerSender(self, workerID: int) -> WorkerSender:
+        """```getWorkerSender``` returns the ```WorkerSender``` which is used
+        to send tasks to the worker with ID ```workerID```.
+
+        **param** ```workerID```: ID of the worker for whom the sender is
+        desired
+
+        **type** ```workerID```: int
+
+        **return** The sender which is used to send tasks to the worker with
+        ID ```workerID```
+
+        **rtype** WorkerSender
+        """
+        return self.workerState[workerID]["sender"]
+
     def allocateSlot(self, workerID: int, task_count: int = 1) -> None:
         """```allocateSlot``` allocates the task to the worker and decrements
         the number of free slots in that worker.
@@ -115,10 +324,13 @@ class StateTracker:
         assert self.isWorkerFree(workerID, task_count) is True,\
             "Over allocating tasks to worker!"
         self.workerState[workerID]["free slots"] -= task_count
+        self.pushLeastLoadedEntry(workerID)
 
     def freeSlot(self, workerID: int, task_count: int = 1) -> None:
         """```freeSlot``` updates the state of the worker to indicate task
         completion by incrementing the number of free slots on that worker.
+        It also wakes up the task dispatcher, if it is waiting for a free
+        slot.
 
         **param** ```workerID```: Specifies the worker which has completed its
         task
@@ -130,10 +342,12 @@ class StateTracker:
 
         **type** ```task_count```: int, optional
         """
-        assert self.workerState[workerID]["free slots"] != \
+        assert self.workerState[workerID]["free slots"] + task_count <= \
             self.workerState[workerID]["slots"],\
             "There are no slots to free up!"
         self.workerState[workerID]["free slots"] += task_count
+        self.pushLeastLoadedEntry(workerID)
+        dispatch.notify()
 
     def getLeastLoadedWorkerID(self) -> Optional[int]:
         """```getLeastLoadedWorkerID``` this methods check all the worker
@@ -141,50 +355,134 @@ class StateTracker:
         case where there are **no workers with free slots**, then it returns
         ```None```.
 
+        When more than one worker has the most free slots, the one with the
+        smallest worker ID is returned.
+
+        The top of the ```leastLoadedHeap``` is checked against the current
+        state of the worker and discarded if it is stale, so the amortized
+        cost is *O(log n)* in the number of workers.
+
         **return**: Worker ID of the least loaded worker or ```None``` if all
         the workers are **fully loaded**
 
         **rtype**: Optional[int]
         """
-        # Variables used to track the least loaded worker
-        _least_loaded_workerID = None
-        _least_loaded_workerFreeSlots = 0
+        while self.leastLoadedHeap:
+            _neg_free_slots, workerID = self.leastLoadedHeap[0]
 
-        for workerID in self.workerIDs:
-            # Get the free slots of worker with ID: workerID
-            _free_slot_count = self.workerState[workerID]["free slots"]
+            # The entry is stale if the worker's free slots have changed
+            # since it was pushed
+            if -_neg_free_slots != self.workerState[workerID]["free slots"]:
+                heapq.heappop(self.leastLoadedHeap)
+                continue
 
-            if _free_slot_count > _least_loaded_workerFreeSlots:
-                # If the worker with ID: workerID has more free slots
-                # then update the tracking variables
-                _least_loaded_workerID = workerID
-                _least_loaded_workerFreeSlots = _free_slot_count
+            return workerID if _neg_free_slots < 0 else None
 
-        return _least_loaded_workerID
+        return None
 
-    def connectBackRequest(self, public_key):
-        """```connectBackRequest``` is used to send a message to all the
-        workers on their *socket for receiving tasks from the master* with
-        the public key information as well as the time after which the
-        individual worker should attempt to connect back to the master.
+    def pushLeastLoadedEntry(self, workerID: int) -> None:
+        """```pushLeastLoadedEntry``` records the current number of free slots
+        of the worker with ID ```workerID``` in the ```leastLoadedHeap```.
+
+        When the stale entries make up most of the heap, as happens when the
+        heap is not being read (e.g. with the Round-Robin scheduler), the heap
+        is rebuilt so that its size stays proportional to the worker count.
+
+        **param** ```workerID```: ID of the worker whose free slots have
+        changed
+
+        **type** ```workerID```: int
+        """
+        heapq.heappush(self.leastLoadedHeap,
+                       (-self.workerState[workerID]["free slots"], workerID))
+
+        if len(self.leastLoadedHeap) > 2 * len(self.workerIDs) + 16:
+            self.rebuildLeastLoadedHeap()
+
+    def rebuildLeastLoadedHeap(self) -> None:
+        """```rebuildLeastLoadedHeap``` rebuilds the ```leastLoadedHeap```
+        with exactly one (up to date) entry per ready worker.
+        """
+        self.leastLoadedHeap = [(-self.workerState[workerID]["free slots"],
+                                 workerID)
+                                for workerID in self.workerIDs
+                                if self.workerState[workerID]["ready"]]
+        heapq.heapify(self.leastLoadedHeap)
+
+    def createConnectBackFrames(self, public_key, codecs=("json",),
+                                security_modes=("fernet",), time_scale=1.0,
+                                time_epoch=None
+                                ) -> List[Tuple[int, bytes]]:
+        """```createConnectBackFrames``` creates the *connect back* request
+        to be sent to every worker, with the public key information as well
+        as the time after which the individual worker should attempt to
+        connect back to the master.
 
         **param** ```public_key```: This is the encryption key which is shared
         with the worker so that they can encrypt their private keys and later
         send it back to the master, in encrypted format using this public key
 
         **type** ```public_key```: bytes
+
+        **param** ```codecs```: Names of the codecs offered to the workers for
+        the task messages, in order of preference, defaults to ("json",)
+
+        **type** ```codecs```: Sequence[str], optional
+
+        **param** ```security_modes```: Names of the security modes offered to
+        the workers for the frames, in order of preference, defaults to
+        ("fernet",)
+
+        **type** ```security_modes```: Sequence[str], optional
+
+        **param** ```time_scale```: How many times faster than real time the
+        workers are to run, defaults to 1.0
+
+        **type** ```time_scale```: float, optional
+
+        **param** ```time_epoch```: The real time at which the simulated time
+        of the workers starts, defaults to None
+
+        **type** ```time_epoch```: Optional[float], optional
+
+        **return**: The worker ID and the framed request for every worker
+
+        **rtype**: List[Tuple[int, bytes]]
         """
-        back_off_time = 0.5
+        frames: List[Tuple[int, bytes]] = []
+        # The master listens for the workers before asking them to connect
+        # back, so they can all connect back right away
+        back_off_time = 0
         for workerID in self.workerIDs:
             message = YACS_Protocol \
                 .connectBackMessage(back_off_time=back_off_time,
-                                    public_key=public_key)
-            self.workerState[workerID]["socket"].sendall(message.encode())
-
-            back_off_time += 0.5
+                                    public_key=public_key,
+                                    codecs=codecs,
+                                    security_modes=security_modes,
+                                    time_scale=time_scale,
+                                    time_epoch=time_epoch)
+            frames.append((workerID,
+                           YACS_Protocol.createFrame(message.encode())))
+        return frames
+
+    def connectBackRequest(self, public_key, codecs=("json",),
+                           security_modes=("fernet",), time_scale=1.0,
+                           time_epoch=None):
+        """```connectBackRequest``` is used to send a message to all the
+        workers on their *socket for receiving tasks from the master*, created
+        using ```createConnectBackFrames()```, which takes the same
+        parameters.
+        """
+        for workerID, frame in self.createConnectBackFrames(public_key,
+                                                            codecs,
+                                                            security_modes,
+                                                            time_scale,
+                                                            time_epoch):
+            self.workerState[workerID]["socket"].sendall(frame)
 
     def __del__(self):
         """```__del__``` closes all task dispatch sockets to the workers.
         """
         for workerID in self.workerIDs:
-            self.workerState[workerID]["socket"].close()
+            if self.workerState[workerID]["socket"] is not None:
+                self.workerState[workerID]["socket"].close()
@@ -0,0 +1,60 @@
+from collections import Counter
+from typing import List
+
+from Communication.protocol import messageToMasterType
+# This lock is used to get access to print onto the standard output
+from Locks.MasterPrintLock import master
+from MasterUtils.CLIText import error_text
+from MasterUtils.WorkerStateTracker import StateTracker
+from UpdateTracker.JobUpdateTracker import Tracker as JobUpdateTracker
+
+
+def applyWorkerUpdates(workerStateTracker: StateTracker,
+                       jobUpdateTracker: JobUpdateTracker,
+                       updates: List[messageToMasterType]) -> None:
+    """```applyWorkerUpdates``` records a batch of task updates received
+    from a worker, and frees up the slots of the completed tasks. The whole
+    batch is applied under a single acquisition of each lock.
+
+    **param** ```workerStateTracker```: Tracks the states of the worker nodes
+    as to how many free slots do they have
+
+    **type** ```workerStateTracker```: StateTracker
+
+    **param** ```jobUpdateTracker```: Tracks the jobs assigned to the workers,
+    and their corresponding updates
+
+    **type** ```jobUpdateTracker```: JobUpdateTracker
+
+    **param** ```updates```: The decoded ```createMessageToMaster()```
+    messages of the completed tasks
+
+    **type** ```updates```: List[messageToMasterType]
+    """
+    msg: messageToMasterType
+    # Only the slots of the updates which have been applied are freed, as
+    # those of the ignored ones (e.g. repeated updates) are not held by
+    # them. An update which cannot be applied is reported and skipped, so
+    # that neither the rest of the batch nor the thread (or coroutine)
+    # listening to the worker is lost to it.
+    _appliedWorkerIDs: List[int] = []
+    with jobUpdateTracker.LOCK:
+        for msg in updates:
+            try:
+                if jobUpdateTracker.updateJob(msg):
+                    _appliedWorkerIDs.append(msg["worker_id"])
+            except Exception as error:
+                master.PRINT_LOCK.acquire()
+                print(error_text(("Unable to apply the worker update "
+                                  f"{msg!r}: {error!r}")))
+                master.PRINT_LOCK.release()
+
+    with workerStateTracker.LOCK:
+        for workerID, task_count in Counter(_appliedWorkerIDs).items():
+            try:
+                workerStateTracker.freeSlot(workerID, task_count)
+            except (AssertionError, KeyError) as error:
+                master.PRINT_LOCK.acquire()
+                print(error_text((f"Unable to free {task_count} slots of "
+                                  f"worker {workerID}: {error!r}")))
+                master.PRINT_LOCK.release()
@@ -1,8 +1,12 @@
+import heapq
+from collections import deque
 from threading import Lock
-from typing import Optional, Tuple
+from typing import List, Optional, Set, Tuple
 
 from UpdateTracker.JobUpdateTracker import Tracker as JobUpdateTracker
 from Locks.MasterPrintLock import master
+from Locks.DispatchCondition import dispatch
+from MasterUtils.EventPublisher import EventPublisher
 
 
 class JobRequestHandler:
@@ -13,17 +17,44 @@ class JobRequestHandler:
     Once a job has been completely allocated, i.e. all its map and reduced
     tasks have been dispatched to one or the other worker, then its entry
     is removed from this object.
+
+    The jobs which have a task that can be dispatched right away are kept in
+    the ```readyJobs``` heap, ordered by their arrival. A job leaves the heap
+    once all its map tasks have been dispatched, and its reduce tasks are
+    promoted back into the heap by the ```JobUpdateTracker``` once all its map
+    tasks have completed.
+
+    The events published through ```events```, while the ```LOCK``` is held,
+    are:
+
+| Event | Arguments |
+|:-:|:-:|
+| ```JobRequestHandler.TASKS_DISPATCHED``` | job_id |
     """
+    TASKS_DISPATCHED = "tasks dispatched"
+
     def __init__(self, workerUpdatesTracker: JobUpdateTracker):
         self.jobRequests = {}
         # self.priorityOrder = []
         self.LOCK = Lock()
         self.workerUpdatesTracker: JobUpdateTracker = workerUpdatesTracker
 
+        # Heap of (arrival number, job ID) of the jobs with a task that can
+        # be dispatched, and the set of those job IDs
+        self.readyJobs: List[Tuple[int, str]] = []
+        self.readyJobIDs: Set[str] = set()
+        self.arrivalNumber = {}
+        self.jobCount: int = 0
+        self.events = EventPublisher()
+
+        self.workerUpdatesTracker.events.subscribe(
+            JobUpdateTracker.MAP_COMPLETE, self.onMapComplete)
+
     def addJobRequest(self, requestSpecs):
         """
         ```addJobRequest``` adds the job request's specification to
-        the handler object's ```jobRequests``` dictionary.
+        the handler object's ```jobRequests``` dictionary, and wakes up the
+        task dispatcher, if it is waiting for a task.
 
         **param** ```requestSpecs```: Dictionary got after converting the
         incoming JSON request string into a dictionary
@@ -32,10 +63,50 @@ class JobRequestHandler:
         """
         _JOB_ID: int = requestSpecs["job_id"]
         self.jobRequests[_JOB_ID] = {
-            "map": requestSpecs["map_tasks"],
-            "reduce": requestSpecs["reduce_tasks"]
+            "map": deque(requestSpecs["map_tasks"]),
+            "reduce": deque(requestSpecs["reduce_tasks"])
         }
         # self.priorityOrder.append(requestSpecs["job_id"])
+        self.arrivalNumber[_JOB_ID] = self.jobCount
+        self.jobCount += 1
+
+        # The map tasks can be dispatched right away, and so can the reduce
+        # tasks of a job without any map tasks
+        if self.jobRequests[_JOB_ID]["map"] or \
+           self.jobRequests[_JOB_ID]["reduce"]:
+            self.markJobReady(_JOB_ID)
+        dispatch.notify()
+
+    def markJobReady(self, jobID) -> None:
+        """```markJobReady``` adds the job given by ```jobID``` to the
+        ```readyJobs``` heap, if it is not already in it.
+
+        **param** ```jobID```: ID of the job which has a task that can be
+        dispatched
+
+        **type** ```jobID```: str
+        """
+        if jobID not in self.readyJobIDs:
+            heapq.heappush(self.readyJobs, (self.arrivalNumber[jobID], jobID))
+            self.readyJobIDs.add(jobID)
+
+    def onMapComplete(self, jobID) -> None:
+        """```onMapComplete``` is called by the ```JobUpdateTracker``` once all
+        the map tasks of the job given by ```jobID``` have completed, and
+        promotes the job's reduce tasks so that they can be dispatched.
+
+        It is called while the ```JobUpdateTracker.LOCK``` is held, and so it
+        acquires this object's ```LOCK``` itself.
+
+        **param** ```jobID```: ID of the job whose map tasks have completed
+
+        **type** ```jobID```: str
+        """
+        self.LOCK.acquire()
+        if (self.jobRequests.get(jobID) is not None) and \
+           self.jobRequests[jobID]["reduce"]:
+            self.markJobReady(jobID)
+        self.LOCK.release()
 
     def getWaitingTask(self) -> Optional[Tuple[Optional[int],
                                                Optional[str],
@@ -45,78 +116,53 @@ class JobRequestHandler:
 
         ## Algorithm:
         ```
-        1. For every job in the jobRequests list:
-            1.1 Check if the job has any pending map tasks
-                1.1.1 Return any map task of the job and associated meta-data
-            1.2 else
-                1.2.1 Check if all the job's map tasks have completed
-                    1.2.1.1 Return any reduce task of the job and associated
-                            meta-data
-                1.2.2 else
-                    1.2.2.1 Continue and hence check the next pending job
-        2. Return None as there is no assignable task available
+        1. Take the earliest arrived job in the readyJobs heap
+            1.1 If the job has any pending map tasks
+                1.1.1 Return its first map task and associated meta-data
+                1.1.2 If that was its last map task, then remove the job from
+                      the heap until its map tasks complete
+            1.2 else (its map tasks have completed)
+                1.2.1 Return its first reduce task and associated meta-data
+                1.2.2 If that was its last reduce task, then remove the job
+                      from the heap
+        2. Return None if the readyJobs heap is empty, as there is no
+           assignable task available
         ```
 
         **return** Task meta-data and the task-dictionary
 
         **rtype** Optional[Tuple[Optional[int], Optional[str], Optional[dict]]]
         """
-        # If there are no pending tasks and hence no pending jobs
-        # then return None
-        if len(self.jobRequests) == 0:
+        # If there are no tasks which can be dispatched then return None
+        if not self.readyJobs:
             return None
 
-        _JOB_ID: Optional[int] = None
+        _JOB_ID: Optional[int] = self.readyJobs[0][1]
         _SELECTED_TASK: Optional[dict] = None
         _TASK_TYPE: Optional[str] = None
 
-        for jobID in self.jobRequests:
-            # Check for a pending map task
-            if self.jobRequests[jobID]["map"]:
-                _SELECTED_TASK = self.jobRequests[jobID]["map"].pop(0)
-                _TASK_TYPE = "map"
-                _JOB_ID = jobID
-
-                # Exit the loop as we have found a suitable task
-                break
-
-            else:  # Check for pending reduce tasks, if any
-                self.workerUpdatesTracker.LOCK.acquire()
-                _temp = self.workerUpdatesTracker.isMapComplete(jobID)
-                self.workerUpdatesTracker.LOCK.release()
-
-                # if jobID:
-                #     master.PRINT_LOCK.acquire()
-                #     print(("Have all map tasks completed "
-                #           f"{_temp} for {jobID}"))
-                #     master.PRINT_LOCK.release()
-
-                if _temp:  # If the map tasks of the job have completed
-                    if self.jobRequests[jobID]["reduce"]:
-                        # Check for a pending reduce task
-                        _SELECTED_TASK = self.jobRequests[jobID]["reduce"]\
-                            .pop(0)
-
-                        # master.PRINT_LOCK.acquire()
-                        # print(f"{_SELECTED_TASK=}")
-                        # master.PRINT_LOCK.release()
-
-                        _TASK_TYPE = "reduce"
-                        _JOB_ID = jobID
-
-                        # Exit the loop as we have found a suitable task
-                        break
-
-        if (_SELECTED_TASK is None) and (_JOB_ID is None) and\
-           (_TASK_TYPE is None):
-            return None
+        if self.jobRequests[_JOB_ID]["map"]:  # Check for a pending map task
+            _SELECTED_TASK = self.jobRequests[_JOB_ID]["map"].popleft()
+            _TASK_TYPE = "map"
+            _isJobStillReady = bool(self.jobRequests[_JOB_ID]["map"])
+
+        else:  # The map tasks have completed, so take a reduce task
+            _SELECTED_TASK = self.jobRequests[_JOB_ID]["reduce"].popleft()
+            _TASK_TYPE = "reduce"
+            _isJobStillReady = bool(self.jobRequests[_JOB_ID]["reduce"])
+
+        if not _isJobStillReady:
+            heapq.heappop(self.readyJobs)
+            self.readyJobIDs.discard(_JOB_ID)
 
         # Check if this task is the last task, if so then remove its
         # entry from this object's state
         if (not self.jobRequests[_JOB_ID]["map"]) and \
            (not self.jobRequests[_JOB_ID]["reduce"]):
             del self.jobRequests[_JOB_ID]
+            del self.arrivalNumber[_JOB_ID]
             # self.priorityOrder.remove(_JOB_ID)
+            self.events.publish(JobRequestHandler.TASKS_DISPATCHED, _JOB_ID)
 
         master.PRINT_LOCK.acquire()
         print("Selected tuple:", (_JOB_ID, _TASK_TYPE, _SELECTED_TASK))
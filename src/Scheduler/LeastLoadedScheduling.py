@@ -1,12 +1,10 @@
-import time
-from typing import Optional
-from cryptography.fernet import Fernet
+from typing import Optional, Tuple
 
 
-# This lock is used to get access to print onto the standard output
-from Locks.MasterPrintLock import master
-from Communication.protocol import YACS_Protocol
+# This condition is used to wait for a task or a free slot to show up
+from Locks.DispatchCondition import dispatch
 from Scheduler.JobRequests import JobRequestHandler
+from Scheduler.TaskDispatch import sendTask
 from MasterUtils.WorkerStateTracker import StateTracker
 
 
@@ -15,9 +13,37 @@ class LeastLoadedScheduler:
     Scheduling** algorithm. In this algorithm the Master looks at the state
     of all the machines and checks which machine has most number of free
     slots. It then launches the task on that machine. If none of the machines
-    have free slots available, the Master waits for 1 second and repeats the
-    process. This process continues until a free slot is found.
+    have free slots available, the Master waits until one of the workers
+    frees up a slot and repeats the process. This process continues until a
+    free slot is found.
     """
+    @staticmethod
+    def selectWorker(workerStateTracker: StateTracker,
+                     cursor: int = 0) -> Tuple[Optional[int], int]:
+        """```selectWorker``` returns the worker which the **Least-Loaded
+        Scheduling** algorithm picks for the next task, if any of them have
+        a free slot, or None if none of them have a free slot.
+
+        It is used by the asyncio master's dispatcher, which cannot block,
+        and must be called while holding the ```workerStateTracker.LOCK```.
+
+        **param** ```workerStateTracker```: This object will track and update
+        how loaded the workers are, i.e. how many free slots fo they have
+
+        **type** ```workerStateTracker```: StateTracker
+
+        **param** ```cursor```: Not used by this algorithm, it is returned
+        as it is
+
+        **type** ```cursor```: int
+
+        **return**: The ID of the chosen worker, or None if none of the
+        workers have a free slot, and the cursor for the next call
+
+        **rtype**: Tuple[Optional[int], int]
+        """
+        return workerStateTracker.getLeastLoadedWorkerID(), cursor
+
     @staticmethod
     def jobDispatcher(requestHandler: JobRequestHandler,
                       workerStateTracker: StateTracker):
@@ -38,18 +64,28 @@ class LeastLoadedScheduler:
         while True:
             jobID_family_task = None
 
+            # Read the generation before looking for a task, so that a
+            # job request arriving after the check is not missed
+            _generation = dispatch.getGeneration()
+
             # Get a pending task if any
             requestHandler.LOCK.acquire()
             if not requestHandler.isEmpty():
                 jobID_family_task = requestHandler.getWaitingTask()
             requestHandler.LOCK.release()
 
+            # If there is no task that can be executed, then wait until a
+            # new job request arrives or the map tasks of a job complete
+            if jobID_family_task is None:
+                dispatch.waitForChange(_generation)
+
             # If there is a Task that needs to be executed
-            if jobID_family_task is not None:
+            else:
                 # Initially we have not found a worker with a free slot
                 workerFound: bool = False
 
                 while workerFound is False:  # Until a free worker is not found
+                    _generation = dispatch.getGeneration()
                     workerStateTracker.LOCK.acquire()
 
                     # Get the least loaded worker if present, else None
@@ -61,56 +97,23 @@ class LeastLoadedScheduler:
                         # We have found a worker and hence set this to True
                         workerFound = True
 
-                        # Create the JSON protocol message
-                        protocolMsg = (YACS_Protocol
-                                       .createMessageToWorker
-                                       (
-                                        job_ID=jobID_family_task[0],
-                                        task_family=jobID_family_task[1],
-                                        task_ID=(jobID_family_task[2]
-                                                 ["task_id"]),
-                                        duration=(jobID_family_task[2]
-                                                  ["duration"]),
-                                        worker_ID=_temp
-                                        ))
-                        # Once a worker with a free slot is found then
-                        # 1. We dispatch the job to the worker
-                        # 2. Update its state
-                        enc_obj = Fernet(workerStateTracker
-                                         .workerState[_temp]["pri_key"])
-                        workerStateTracker.getWorkerSocket(_temp)\
-                            .sendall(enc_obj.encrypt(protocolMsg.encode()))
-
-                        master.PRINT_LOCK.acquire()
-                        print(f"Sending task to worker: {protocolMsg}")
-                        master.PRINT_LOCK.release()
+                        # Reserve a slot on the worker, the task is sent
+                        # once the lock has been released
                         workerStateTracker.allocateSlot(_temp)
-
-                        master.PRINT_LOCK.acquire()
-                        workerStateTracker.showWorkerStates()
-                        master.PRINT_LOCK.release()
-
-                        requestHandler.LOCK.acquire()
-                        _state = requestHandler.jobRequests
-                        requestHandler.LOCK.release()
-                        master.PRINT_LOCK.acquire()
-                        print(f"requestHandler.jobRequests={_state}")
-                        master.PRINT_LOCK.release()
+                        _freeSlots: int = workerStateTracker\
+                            .workerState[_temp]["free slots"]
 
                     workerStateTracker.LOCK.release()
 
                     # If none of the machines have free slots available,
-                    # then the Master waits for 1 second and repeats the
-                    # process
+                    # then the Master waits until a slot is freed and
+                    # repeats the process
                     if workerFound is False:
-                        # Sleep for 1 second to allow for the
-                        # workerStateTracker to be updated by
+                        # Wait for the workerStateTracker to be updated by
                         # the thread: workerUpdates
-                        time.sleep(1)
+                        dispatch.waitForChange(_generation)
+
+                    # Else queue the task to be sent to the worker
                     else:
-                        # After sending a task to the worker, sleep for 0.01s
-                        # seconds before sending the next task. This done so
-                        # that the worker buffer only has at most 1 task in
-                        # its socket's buffer
-                        # time.sleep(0.01)
-                        pass
+                        sendTask(requestHandler, workerStateTracker, _temp,
+                                 _freeSlots, jobID_family_task)
@@ -1,13 +1,11 @@
 # import threading
-import time
-from typing import Set
-from cryptography.fernet import Fernet
+from typing import Optional, Set, Tuple
 
 
-# This lock is used to get access to print onto the standard output
-from Locks.MasterPrintLock import master
-from Communication.protocol import YACS_Protocol
+# This condition is used to wait for a task or a free slot to show up
+from Locks.DispatchCondition import dispatch
 from Scheduler.JobRequests import JobRequestHandler
+from Scheduler.TaskDispatch import sendTask
 from MasterUtils.WorkerStateTracker import StateTracker
 
 
@@ -22,6 +20,40 @@ class RoundRobinScheduler:
     the Master moves on to the next worker_id in the ordering. This process
     continues until a free slot is found.
     """
+    @staticmethod
+    def selectWorker(workerStateTracker: StateTracker,
+                     cursor: int = 0) -> Tuple[Optional[int], int]:
+        """```selectWorker``` returns the worker which the **Round-Robin
+        Scheduling** algorithm picks for the next task, if any of them have
+        a free slot, or None if none of them have a free slot.
+
+        It is used by the asyncio master's dispatcher, which cannot block,
+        and must be called while holding the ```workerStateTracker.LOCK```.
+
+        **param** ```workerStateTracker```: This object will track and update
+        how loaded the workers are, i.e. how many free slots fo they have
+
+        **type** ```workerStateTracker```: StateTracker
+
+        **param** ```cursor```: Index of the worker, in the ordering of the
+        workers, to start looking for a free slot from
+
+        **type** ```cursor```: int
+
+        **return**: The ID of the chosen worker, or None if none of the
+        workers have a free slot, and the cursor for the next call
+
+        **rtype**: Tuple[Optional[int], int]
+        """
+        _WORKER_COUNT: int = len(workerStateTracker.workerIDs)
+        for _offset in range(_WORKER_COUNT):
+            _index: int = (cursor + _offset) % _WORKER_COUNT
+            if workerStateTracker\
+                    .isWorkerFree(workerStateTracker.workerIDs[_index]):
+                return (workerStateTracker.workerIDs[_index],
+                        (_index + 1) % _WORKER_COUNT)
+        return None, cursor
+
     @staticmethod
     def jobDispatcher(requestHandler: JobRequestHandler,
                       workerStateTracker: StateTracker,
@@ -51,14 +83,23 @@ class RoundRobinScheduler:
         while True:
             jobID_family_task = None
 
+            # Read the generation before looking for a task, so that a
+            # job request arriving after the check is not missed
+            _generation = dispatch.getGeneration()
+
             # Get a pending task, if any
             requestHandler.LOCK.acquire()
             if not requestHandler.isEmpty():
                 jobID_family_task = requestHandler.getWaitingTask()
             requestHandler.LOCK.release()
 
+            # If there is no task that can be executed, then wait until a
+            # new job request arrives or the map tasks of a job complete
+            if jobID_family_task is None:
+                dispatch.waitForChange(_generation)
+
             # If there is a Task that needs to be executed
-            if jobID_family_task is not None:
+            else:
                 # Initially we have not visited any worker
                 workerIDsVisited.clear()
 
@@ -66,6 +107,11 @@ class RoundRobinScheduler:
                 workerFound: bool = False
 
                 while workerFound is False:  # Until a free worker is not found
+                    # Read the generation at the start of every sweep over
+                    # the workers, so that a slot freed up during the sweep
+                    # is not missed
+                    if not workerIDsVisited:
+                        _generation = dispatch.getGeneration()
 
                     workerStateTracker.LOCK.acquire()
                     workerIDsVisited.add(workerStateTracker.workerIDs[_temp])
@@ -73,69 +119,38 @@ class RoundRobinScheduler:
                     # If the worker has a free slot
                     if workerStateTracker \
                             .isWorkerFree(workerStateTracker.workerIDs[_temp]):
-                        # Create the JSON protocol message
-                        protocolMsg = (YACS_Protocol
-                                       .createMessageToWorker
-                                       (
-                                        job_ID=jobID_family_task[0],
-                                        task_family=jobID_family_task[1],
-                                        task_ID=(jobID_family_task[2]
-                                                 ["task_id"]),
-                                        duration=(jobID_family_task[2]
-                                                  ["duration"]),
-                                        worker_ID=workerStateTracker
-                                        .workerIDs[_temp]
-                                       ))
-                        # Once a worker with a free slot is found then
-                        # 1. We dispatch the job to the worker
-                        # 2. Update its state
-                        enc_obj = Fernet(workerStateTracker
-                                         .workerState[workerStateTracker
-                                                      .workerIDs[_temp]]
-                                         ["pri_key"])
-                        workerStateTracker.getWorkerSocket(workerStateTracker.
-                                                           workerIDs[_temp])\
-                            .sendall(enc_obj.encrypt(protocolMsg.encode()))
-
-                        master.PRINT_LOCK.acquire()
-                        print(f"Sending task to worker: {protocolMsg}")
-                        master.PRINT_LOCK.release()
-                        workerStateTracker.allocateSlot(workerStateTracker
-                                                        .workerIDs[_temp])
-                        master.PRINT_LOCK.acquire()
-                        workerStateTracker.showWorkerStates()
-                        master.PRINT_LOCK.release()
-
-                        requestHandler.LOCK.acquire()
-                        _state = requestHandler.jobRequests
-                        requestHandler.LOCK.release()
-                        master.PRINT_LOCK.acquire()
-                        print(f"requestHandler.jobRequests={_state}")
-                        master.PRINT_LOCK.release()
+                        # Reserve a slot on the worker, the task is sent
+                        # once the lock has been released
+                        _selectedWorkerID: int = \
+                            workerStateTracker.workerIDs[_temp]
+                        workerStateTracker.allocateSlot(_selectedWorkerID)
+                        _freeSlots: int = workerStateTracker\
+                            .workerState[_selectedWorkerID]["free slots"]
 
                         # We have found a worker and hence set this to True
                         workerFound = True
 
                     workerStateTracker.LOCK.release()
 
+                    # If a worker was found, then queue the task to be sent
+                    # to it
+                    if workerFound is True:
+                        sendTask(requestHandler, workerStateTracker,
+                                 _selectedWorkerID, _freeSlots,
+                                 jobID_family_task)
+
                     _temp += 1
                     _temp %= WORKER_COUNT
 
                     # In the case where none of the workers have a free slot
                     if (workerFound is False) and \
-                        (list(workerIDsVisited) ==
-                            workerStateTracker.workerIDs):
-                        # Sleep for a second to allow for the
-                        # workerStateTracker to be updated by the
-                        # thread: workerUpdates
-                        time.sleep(1)
+                        (len(workerIDsVisited) ==
+                            len(workerStateTracker.workerIDs)):
+                        # Wait for the workerStateTracker to be updated by
+                        # the thread: workerUpdates
+                        dispatch.waitForChange(_generation)
 
                         # Clear the worker IDs visited set as we are
                         # restarting our search for a free slot on one of the
                         # workers
                         workerIDsVisited.clear()
-
-                # After sending a task to the worker, sleep for 0.01 seconds
-                # before sending the next task. This done so that the worker
-                # buffer only has at most 1 task in its socket's buffer
-                # time.sleep(0.01)
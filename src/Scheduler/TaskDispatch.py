@@ -0,0 +1,64 @@
+from typing import Tuple
+
+# This lock is used to get access to print onto the standard output
+from Locks.MasterPrintLock import master
+from Scheduler.JobRequests import JobRequestHandler
+from MasterUtils.WorkerStateTracker import StateTracker
+
+
+def sendTask(requestHandler: JobRequestHandler,
+             workerStateTracker: StateTracker, workerID: int,
+             freeSlots: int,
+             jobID_family_task: Tuple[str, str, dict]) -> None:
+    """```sendTask``` sends the task given by ```jobID_family_task``` to the
+    worker given by ```workerID```, on which the scheduler has already
+    allocated a slot for it.
+
+    The message is only queued on the worker's ```WorkerSender```, which
+    sends it over the network. This must be called after releasing the
+    ```workerStateTracker.LOCK```, so that the workers' updates are never held
+    up by the task being sent.
+
+    **param** ```requestHandler```: Used to print the number of pending jobs
+
+    **type** ```requestHandler```: JobRequestHandler
+
+    **param** ```workerStateTracker```: Holds the worker's codec and sender
+
+    **type** ```workerStateTracker```: StateTracker
+
+    **param** ```workerID```: ID of the worker chosen by the scheduler
+
+    **type** ```workerID```: int
+
+    **param** ```freeSlots```: The worker's free slots after allocating the
+    slot, read by the scheduler while it held the lock
+
+    **type** ```freeSlots```: int
+
+    **param** ```jobID_family_task```: The task returned by
+    ```requestHandler.getWaitingTask()```
+
+    **type** ```jobID_family_task```: Tuple[str, str, dict]
+    """
+    # Create the protocol message, using the codec chosen by the worker
+    protocolMsg = workerStateTracker.workerState[workerID]["codec"]\
+        .encodeMessageToWorker(job_ID=jobID_family_task[0],
+                               task_family=jobID_family_task[1],
+                               task_ID=jobID_family_task[2]["task_id"],
+                               duration=jobID_family_task[2]["duration"],
+                               worker_ID=workerID)
+    workerStateTracker.getWorkerSender(workerID).send(protocolMsg)
+
+    master.PRINT_LOCK.acquire()
+    print(f"Free slots of worker {workerID}: {freeSlots}")
+    master.PRINT_LOCK.release()
+
+    # Only the number of pending jobs is printed, as printing all of them for
+    # every task slows the master down as they pile up
+    requestHandler.LOCK.acquire()
+    _pendingJobCount = len(requestHandler.jobRequests)
+    requestHandler.LOCK.release()
+    master.PRINT_LOCK.acquire()
+    print(f"Pending job requests: {_pendingJobCount}")
+    master.PRINT_LOCK.release()
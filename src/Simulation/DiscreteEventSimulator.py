@@ -0,0 +1,329 @@
+"""Runs the master's scheduling in virtual time, i.e. as a discrete-event
+simulation, without any workers, sockets or sleeps.
+
+The same ```JobRequestHandler```, ```StateTracker``` slot accounting,
+```JobUpdateTracker``` and schedulers as the master are used, so the
+simulated run writes the same log files as a live run, into
+```Analytics/<algorithm>```.
+
+Run from the ```src``` folder:
+
+```bash
+$ python3 -m Simulation.DiscreteEventSimulator config.json LL --jobs 10000
+$ python3 -m Simulation.DiscreteEventSimulator config.json RR \\
+      --workload jobs.jsonl
+```
+"""
+import argparse
+import contextlib
+import heapq
+import itertools
+import json
+import os
+import random
+import sys
+import time
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+from Communication.protocol import messageToMasterType
+from MasterUtils.WorkerStateTracker import StateTracker
+from MasterUtils.WorkerUpdates import applyWorkerUpdates
+from UpdateTracker.JobUpdateTracker import Tracker as JobUpdateTracker
+from Scheduler.JobRequests import JobRequestHandler
+from Scheduler.RandomScheduling import RandomScheduler
+from Scheduler.RoundRobinScheduling import RoundRobinScheduler
+from Scheduler.LeastLoadedScheduling import LeastLoadedScheduler
+
+
+class DiscreteEventSimulator:
+    """The ```DiscreteEventSimulator``` class replays job requests against the
+    master's scheduling in virtual time.
+
+    The events, i.e. the arrival of a job request and the completion of a
+    task, are kept in a heap ordered by their virtual time. All the events
+    at the same time are applied together, task completions first, after
+    which the waiting tasks are dispatched to the workers picked by the
+    scheduler's ```selectWorker```, the same way as the asyncio master does.
+    A dispatched task completes after its ```duration```, in virtual
+    seconds.
+
+    **param** ```workerConf```: The worker configuration, as given to the
+    master
+
+    **type** ```workerConf```: dict
+
+    **param** ```typeOfScheduling```: One of ```"LL"```, ```"RR"``` or
+    ```"RANDOM"```
+
+    **type** ```typeOfScheduling```: str
+
+    **param** ```jobUpdateTracker```: Writes the log files of the run. Its
+    clock has to be this object's ```clock()```
+
+    **type** ```jobUpdateTracker```: JobUpdateTracker
+    """
+    SCHEDULERS = {
+        "LL": LeastLoadedScheduler,
+        "RR": RoundRobinScheduler,
+        "RANDOM": RandomScheduler
+    }
+
+    # The kinds of events, in the order they are applied at the same time
+    TASK_COMPLETE: int = 0
+    JOB_ARRIVAL: int = 1
+
+    def __init__(self, workerConf: dict, typeOfScheduling: str,
+                 jobUpdateTracker: JobUpdateTracker) -> None:
+        self.workerStateTracker = StateTracker(workerConf, connect=False)
+        self.jobUpdateTracker = jobUpdateTracker
+        self.jobRequestHandler = JobRequestHandler(jobUpdateTracker)
+        self.scheduler = DiscreteEventSimulator.SCHEDULERS[typeOfScheduling]
+
+        # The virtual time, in seconds
+        self.now: float = 0.0
+        # Heap of (time, kind, sequence number, event)
+        self.events: List[Tuple[float, int, int, dict]] = []
+        self.sequence = itertools.count()
+        self.cursor: int = 0
+        # The task taken from the jobRequestHandler which is waiting for a
+        # worker with a free slot, like the task held by the dispatchers
+        self.waitingTask: Optional[Tuple[int, str, dict]] = None
+        self.dispatchedTaskCount: int = 0
+
+    def clock(self) -> float:
+        """```clock``` returns the virtual time, and is given to the
+        ```JobUpdateTracker``` in place of ```time.time```.
+        """
+        return self.now
+
+    def pushEvent(self, eventTime: float, kind: int, event: dict) -> None:
+        """```pushEvent``` schedules the ```event``` at the virtual time
+        ```eventTime```.
+        """
+        heapq.heappush(self.events,
+                       (eventTime, kind, next(self.sequence), event))
+
+    def addJobRequest(self, arrivalTime: float, jobRequest: dict) -> None:
+        """```addJobRequest``` schedules the arrival of the job request
+        ```jobRequest```, in the same format as the ones sent by the client
+        code, at the virtual time ```arrivalTime```.
+        """
+        self.pushEvent(arrivalTime, DiscreteEventSimulator.JOB_ARRIVAL,
+                       jobRequest)
+
+    def receiveJobRequest(self, jobRequest: dict) -> None:
+        """```receiveJobRequest``` adds the arrived job request to the
+        handlers, the same way as ```listenForJobRequests``` does.
+        """
+        self.jobUpdateTracker.LOCK.acquire()
+        self.jobUpdateTracker.addJobRequest(jobRequest)
+        self.jobUpdateTracker.LOCK.release()
+
+        self.jobRequestHandler.LOCK.acquire()
+        self.jobRequestHandler.addJobRequest(jobRequest)
+        self.jobRequestHandler.LOCK.release()
+
+    def dispatchTasks(self) -> None:
+        """```dispatchTasks``` dispatches the waiting tasks to the workers
+        picked by the scheduling algorithm, until there is no task that can
+        be dispatched or no worker with a free slot.
+
+        As in the dispatchers of the master, a task is taken first, and a
+        worker is only picked once there is a task for it, so the
+        scheduler's state (e.g. the Round-Robin cursor) only changes when a
+        task is dispatched.
+        """
+        while True:
+            if self.waitingTask is None:
+                self.jobRequestHandler.LOCK.acquire()
+                if not self.jobRequestHandler.isEmpty():
+                    self.waitingTask = \
+                        self.jobRequestHandler.getWaitingTask()
+                self.jobRequestHandler.LOCK.release()
+                if self.waitingTask is None:
+                    return
+
+            self.workerStateTracker.LOCK.acquire()
+            workerID, cursor = self.scheduler.selectWorker(
+                self.workerStateTracker, self.cursor)
+            if workerID is not None:
+                self.workerStateTracker.allocateSlot(workerID)
+                self.cursor = cursor
+            self.workerStateTracker.LOCK.release()
+            # The task waits for a slot to be freed up
+            if workerID is None:
+                return
+
+            jobID_family_task = self.waitingTask
+            self.waitingTask = None
+
+            jobID, family, task = jobID_family_task
+            update: messageToMasterType = {
+                "worker_id": workerID,
+                "job_id": jobID,
+                "task_family": family,
+                "task": {
+                    "task_id": task["task_id"],
+                    "start_time": self.now,
+                    "end_time": self.now + task["duration"]
+                }
+            }
+            self.pushEvent(update["task"]["end_time"],
+                           DiscreteEventSimulator.TASK_COMPLETE, update)
+            self.dispatchedTaskCount += 1
+
+    def run(self) -> float:
+        """```run``` applies the events in the order of their virtual times,
+        until all the jobs have completed.
+
+        **return**: The virtual time at which the last task completed
+
+        **rtype**: float
+        """
+        while self.events:
+            self.now = self.events[0][0]
+
+            # Apply all the events at the current virtual time together
+            updates: List[messageToMasterType] = []
+            while self.events and self.events[0][0] == self.now:
+                _, kind, _, event = heapq.heappop(self.events)
+                if kind == DiscreteEventSimulator.TASK_COMPLETE:
+                    updates.append(event)
+                else:
+                    # The completed tasks free their slots before the job
+                    # requests at the same time are received
+                    if updates:
+                        applyWorkerUpdates(self.workerStateTracker,
+                                           self.jobUpdateTracker, updates)
+                        updates = []
+                    self.receiveJobRequest(event)
+            if updates:
+                applyWorkerUpdates(self.workerStateTracker,
+                                   self.jobUpdateTracker, updates)
+
+            self.dispatchTasks()
+        return self.now
+
+
+def createJobRequests(job_count: int, seed: Optional[int] = None
+                      ) -> Iterator[Tuple[float, dict]]:
+    """```createJobRequests``` yields ```job_count``` job requests along with
+    their arrival times, the same way as the client code
+    (```Copy_of_requests.py```) creates them: 1 to 4 map tasks, 1 to 2
+    reduce tasks, task durations of 1 to 4 seconds, and exponentially
+    distributed inter-arrival times with a mean of 1 second.
+    """
+    generator = random.Random(seed)
+    arrivalTime = 0.0
+    for job_number in range(job_count):
+        if job_number > 0:
+            arrivalTime += generator.expovariate(1)
+        job_id = str(job_number)
+        yield arrivalTime, {
+            "job_id": job_id,
+            "map_tasks": [{"task_id": f"{job_id}_M{i}",
+                           "duration": generator.randrange(1, 5)}
+                          for i in range(generator.randrange(1, 5))],
+            "reduce_tasks": [{"task_id": f"{job_id}_R{i}",
+                              "duration": generator.randrange(1, 5)}
+                             for i in range(generator.randrange(1, 3))]
+        }
+
+
+def readJobRequests(path: str) -> Iterator[Tuple[float, dict]]:
+    """```readJobRequests``` yields the job requests of a workload file,
+    along with their arrival times. Every line of the file is a job request
+    in the same format as the ones sent by the client code, with an optional
+    ```"arrival_time"``` field in seconds (0 if it is missing).
+    """
+    with open(path) as fHandler:
+        for line in fHandler:
+            if line.strip():
+                jobRequest = json.loads(line)
+                yield float(jobRequest.pop("arrival_time", 0)), jobRequest
+
+
+def simulate(workerConf: dict, typeOfScheduling: str, logName: str,
+             jobRequests: Iterable[Tuple[float, dict]],
+             columnar: bool = False) -> dict:
+    """```simulate``` runs the job requests through the scheduling algorithm
+    in virtual time, writes the log files into ```Analytics/<logName>``` and
+    returns the statistics of the simulation.
+    """
+    simulator: Optional[DiscreteEventSimulator] = None
+    # The rows are written right away, as the simulation runs in a single
+    # thread
+    jobUpdateTracker = JobUpdateTracker(logName, columnar=columnar,
+                                        clock=lambda: simulator.clock(),
+                                        threadedLog=False)
+    simulator = DiscreteEventSimulator(workerConf, typeOfScheduling,
+                                       jobUpdateTracker)
+
+    jobCount = 0
+    for arrivalTime, jobRequest in jobRequests:
+        simulator.addJobRequest(arrivalTime, jobRequest)
+        jobCount += 1
+
+    wallStart = time.perf_counter()
+    makespan = simulator.run()
+    jobUpdateTracker.close()
+    wallTime = time.perf_counter() - wallStart
+
+    return {
+        "algorithm": typeOfScheduling,
+        "jobs": jobCount,
+        "tasks": simulator.dispatchedTaskCount,
+        "virtual makespan (s)": round(makespan, 4),
+        "wall time (s)": round(wallTime, 4),
+        "tasks per wall second": round(simulator.dispatchedTaskCount /
+                                       wallTime) if wallTime else None
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=("Simulate the scheduling of "
+                                                  "the master in virtual "
+                                                  "time"))
+    parser.add_argument("PATH_TO_CONFIG_FILE",
+                        help="Path to the worker configuration file")
+    parser.add_argument("TYPE_OF_SCHEDULING", choices=["LL", "RR", "RANDOM"])
+    parser.add_argument("--workload",
+                        help=("File with a job request per line, and their "
+                              "\"arrival_time\" in seconds"))
+    parser.add_argument("--jobs", type=int, default=1000,
+                        help=("Number of job requests to create like the "
+                              "client code, if no --workload is given"))
+    parser.add_argument("--seed", type=int, default=None,
+                        help="Seed of the created jobs and of RANDOM")
+    parser.add_argument("--log-name", default=None,
+                        help=("Folder in Analytics to write the log files to"
+                              " (default: Simulated-<algorithm>)"))
+    parser.add_argument("--columnar", action="store_true",
+                        help="Also write the columnar logs")
+    parser.add_argument("--verbose", action="store_true",
+                        help="Print the debug output of the master's classes")
+    cmdArgs = parser.parse_args()
+
+    _converter = {
+        "RR": "Round-Robin",
+        "LL": "Least-Loaded",
+        "RANDOM": "Random"
+    }
+    with open(cmdArgs.PATH_TO_CONFIG_FILE) as fHandler:
+        workerConf = json.load(fHandler)
+    if cmdArgs.seed is not None:
+        random.seed(cmdArgs.seed)
+    if cmdArgs.workload:
+        jobRequests = readJobRequests(cmdArgs.workload)
+    else:
+        jobRequests = createJobRequests(cmdArgs.jobs, cmdArgs.seed)
+    logName = cmdArgs.log_name or \
+        f"Simulated-{_converter[cmdArgs.TYPE_OF_SCHEDULING]}"
+    os.makedirs("Analytics", exist_ok=True)
+
+    # print() does nothing when sys.stdout is None, which silences the debug
+    # output of the master's classes at no cost
+    with contextlib.redirect_stdout(sys.stdout if cmdArgs.verbose else None):
+        result = simulate(workerConf, cmdArgs.TYPE_OF_SCHEDULING, logName,
+                          jobRequests, cmdArgs.columnar)
+    print(json.dumps(result, indent=4))
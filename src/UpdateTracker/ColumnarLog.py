@@ -0,0 +1,166 @@
+import json
+import os
+from typing import Dict, List, Tuple
+
+# NumPy is only needed by the master when the columnar logs are enabled
+import numpy as np
+
+
+class ColumnarLog:
+    """The ```ColumnarLog``` class writes the same rows as the CSV *data
+    logging files*, but as typed NumPy columns, so that the analytics can
+    memory-map them instead of parsing text.
+
+    The rows of every table are buffered, and written out in *segments* of
+    ```chunkRows``` rows, with one ```.npy``` file per column. The
+    ```manifest.json``` file lists the columns of every table and the segments
+    written so far, and is replaced every time a segment is written, so the
+    run can be loaded while it is still going on. The remaining rows are
+    written by ```close()```, which then compacts the segments of every table
+    into one file per column, so that a finished run is memory-mapped without
+    copying.
+
+    The files are written to the ```columnar``` folder, next to the CSV
+    files:
+
+| File Name | Contents |
+|:-:|:-:|
+| ```manifest.json``` | columns, dtypes and segments of every table |
+| ```<table>-<segment>-<column>.npy``` | values of a column in a segment |
+| ```<table>-<column>.npy``` | values of a column, once the run is closed |
+
+    **param** ```folder```: The folder of the CSV files of the run
+
+    **type** ```folder```: str
+
+    **param** ```chunkRows```: The number of rows of a table per segment,
+    which bounds the number of rows held in memory per table, defaults to
+    65536
+
+    **type** ```chunkRows```: int, optional
+    """
+    FORMAT: str = "yacs-columnar"
+    VERSION: int = 1
+    MANIFEST: str = "manifest.json"
+
+    # The columns of every table, in the same order as the CSV files. The
+    # IDs are stored as fixed-width unicode strings.
+    SCHEMAS: Dict[str, List[Tuple[str, str]]] = {
+        "jobs": [("JobID", "str"), ("start_time", "float64"),
+                 ("end_time", "float64"), ("duration", "float64")],
+        "tasks": [("JobID", "str"), ("TaskID", "str"),
+                  ("start_time", "float64"), ("end_time", "float64"),
+                  ("duration", "float64")],
+        "workers": [("JobID", "str"), ("WorkerID", "int32"),
+                    ("TaskID", "str"), ("start_time", "float64"),
+                    ("end_time", "float64")]
+    }
+
+    def __init__(self, folder: str, chunkRows: int = 1 << 16) -> None:
+        self.folder = os.path.join(folder, "columnar")
+        self.chunkRows = chunkRows
+        os.makedirs(self.folder, exist_ok=True)
+
+        self.rows: Dict[str, List[list]] = {name: []
+                                            for name in ColumnarLog.SCHEMAS}
+        self.manifest = {
+            "format": ColumnarLog.FORMAT,
+            "version": ColumnarLog.VERSION,
+            "tables": {name: {"columns": [list(column) for column in schema],
+                              "segments": []}
+                       for name, schema in ColumnarLog.SCHEMAS.items()}
+        }
+        self.writeManifest()
+
+    def writerow(self, name: str, row: list) -> None:
+        """```writerow``` buffers the ```row``` of the table given by
+        ```name```, and writes out a segment once ```chunkRows``` rows have
+        been buffered.
+
+        **param** ```name```: Name of the table, i.e. one of ```"jobs"```,
+        ```"tasks"``` or ```"workers"```
+
+        **type** ```name```: str
+
+        **param** ```row```: The values of the row, in the order of the
+        table's columns
+
+        **type** ```row```: list
+        """
+        self.rows[name].append(row)
+        if len(self.rows[name]) >= self.chunkRows:
+            self.writeSegment(name)
+
+    def writeSegment(self, name: str) -> None:
+        """```writeSegment``` writes out the buffered rows of the table given
+        by ```name``` as a new segment, and then updates the manifest.
+        """
+        rows = self.rows[name]
+        if not rows:
+            return
+        self.rows[name] = []
+
+        segments = self.manifest["tables"][name]["segments"]
+        files = {}
+        for index, (column, dtype) in \
+                enumerate(ColumnarLog.SCHEMAS[name]):
+            files[column] = f"{name}-{len(segments):05d}-{column}.npy"
+            np.save(os.path.join(self.folder, files[column]),
+                    np.asarray([row[index] for row in rows],
+                               dtype=str if dtype == "str" else dtype))
+        segments.append({"rows": len(rows), "files": files})
+        self.writeManifest()
+
+    def writeManifest(self) -> None:
+        """```writeManifest``` replaces the manifest in one step, so that it
+        never lists a segment which has not been written completely.
+        """
+        path = os.path.join(self.folder, ColumnarLog.MANIFEST)
+        with open(path + ".tmp", "w") as fHandler:
+            json.dump(self.manifest, fHandler, indent=4)
+        os.replace(path + ".tmp", path)
+
+    def compactSegments(self, name: str) -> None:
+        """```compactSegments``` copies the segments of the table given by
+        ```name``` into one file per column, one column at a time through a
+        memory-mapped output file, so that the table is never held in memory.
+        The manifest is replaced before the old segments are removed.
+        """
+        segments = self.manifest["tables"][name]["segments"]
+        if len(segments) <= 1:
+            return
+
+        files = {}
+        for column, _ in ColumnarLog.SCHEMAS[name]:
+            files[column] = f"{name}-{column}.npy"
+            parts = [np.load(os.path.join(self.folder,
+                                          segment["files"][column]),
+                             mmap_mode="r")
+                     for segment in segments]
+            # The unicode columns of the segments may have different widths
+            compacted = np.lib.format.open_memmap(
+                os.path.join(self.folder, files[column]), mode="w+",
+                dtype=np.result_type(*parts),
+                shape=(sum(len(part) for part in parts),))
+            offset = 0
+            for part in parts:
+                compacted[offset:offset + len(part)] = part
+                offset += len(part)
+            compacted.flush()
+            del compacted, parts
+
+        self.manifest["tables"][name]["segments"] = [
+            {"rows": sum(segment["rows"] for segment in segments),
+             "files": files}]
+        self.writeManifest()
+        for segment in segments:
+            for path in segment["files"].values():
+                os.remove(os.path.join(self.folder, path))
+
+    def close(self) -> None:
+        """```close``` writes out the remaining rows of every table, and then
+        compacts its segments.
+        """
+        for name in ColumnarLog.SCHEMAS:
+            self.writeSegment(name)
+            self.compactSegments(name)
@@ -1,8 +1,40 @@
+import atexit
 import time
 import json
 import csv
 import os
 from threading import Lock
+from typing import Set
+
+from Locks.DispatchCondition import dispatch
+# This lock is used to get access to print onto the standard output
+from Locks.MasterPrintLock import master
+from MasterUtils.CLIText import error_text
+from MasterUtils.EventPublisher import EventPublisher
+from UpdateTracker.LogWriter import LogWriter
+
+
+class JobRecord:
+    """
+    A ```JobRecord``` holds the state of a job which has not completed yet,
+    i.e. its start time, the number of its map and reduce tasks whose
+    updates are yet to be received, and the IDs of its tasks whose updates
+    have been received.
+
+    The counters let the completion of the job's map tasks and of the job
+    itself be checked in constant time, and the IDs of the completed tasks
+    let a repeated update be ignored instead of being counted again. The
+    record is dropped once the job completes.
+    """
+    __slots__ = ("start_time", "remaining_map", "remaining_reduce",
+                 "completed_tasks")
+
+    def __init__(self, start_time: float, remaining_map: int,
+                 remaining_reduce: int):
+        self.start_time: float = start_time
+        self.remaining_map: int = remaining_map
+        self.remaining_reduce: int = remaining_reduce
+        self.completed_tasks: Set = set()
 
 
 class Tracker:
@@ -18,16 +50,40 @@ class Tracker:
 | ```jobs.csv``` | job_id, start time, end time and duration |
 | ```tasks.csv``` | job_id, task_id, start time, end time and duration |
 | ```workers.csv``` | job_id, worker_id, task_id, start time and end time |
+
+    - The rows are written by a ```LogWriter```, from its own thread, and the
+    files are flushed every ```flushInterval``` seconds or ```flushRows```
+    rows, whichever comes first. ```close()``` writes out the remaining rows
+    and closes the files. If ```threadedLog``` is False, the rows are written
+    right away by the calling thread instead.
+    - The arrival time of the jobs is read from ```clock```, which the
+    simulation replaces with its virtual clock.
+    - If ```columnar``` is set, the rows are also written as typed NumPy
+    columns by a ```ColumnarLog```, in the ```columnar``` folder next to the
+    CSV files, which the analytics can memory-map. They are written in
+    segments of ```columnarChunkRows``` rows per table.
+
+    - The events published through ```events``` are:
+
+| Event | Arguments |
+|:-:|:-:|
+| ```Tracker.MAP_COMPLETE``` | job_id |
+| ```Tracker.JOB_COMPLETE``` | job_id |
     """
-    def __init__(self, algorithm):
+    MAP_COMPLETE = "map complete"
+    JOB_COMPLETE = "job complete"
+
+    def __init__(self, algorithm, flushInterval=1.0, flushRows=1000,
+                 columnar=False, clock=time.time, threadedLog=True,
+                 columnarChunkRows=1 << 16):
+        # Records of the jobs which have not completed, by job ID
         self.jobs = dict()
-        self.jobs_time = dict()
-        self.tasks_time = dict()
-        self.workers_time = dict()
-        self.map_tracker = dict()
-        self.reduce_tracker = dict()
+        # Gives the arrival time of the jobs, replaced by the virtual clock
+        # of the simulation
+        self.clock = clock
         self.algorithm = algorithm
         self.LOCK = Lock()
+        self.events = EventPublisher()
 
         fields_job = ['JobID', 'start_time', 'end_time', 'duration']
         fields_task = ['JobID', 'TaskID', 'start_time', 'end_time', 'duration']
@@ -48,92 +104,88 @@ class Tracker:
         self.f_tasks = open(os.path.join(algorithm, "tasks.csv"), 'w')
         self.f_workers = open(os.path.join(algorithm, "workers.csv"), 'w')
 
-        j_writer = csv.writer(self.f_jobs, delimiter=',', quotechar='"',
-                              quoting=csv.QUOTE_MINIMAL)
-        t_writer = csv.writer(self.f_tasks, delimiter=',', quotechar='"',
-                              quoting=csv.QUOTE_MINIMAL)
-        w_writer = csv.writer(self.f_workers, delimiter=',', quotechar='"',
-                              quoting=csv.QUOTE_MINIMAL)
-        j_writer.writerow(fields_job)
-        t_writer.writerow(fields_task)
-        w_writer.writerow(fields_worker)
-        self.job_writer = j_writer
-        self.task_writer = t_writer
-        self.worker_writer = w_writer
+        csv.writer(self.f_jobs).writerow(fields_job)
+        csv.writer(self.f_tasks).writerow(fields_task)
+        csv.writer(self.f_workers).writerow(fields_worker)
+
+        columnarLog = None
+        if columnar:
+            # Imported here, as it needs NumPy
+            from UpdateTracker.ColumnarLog import ColumnarLog
+            columnarLog = ColumnarLog(algorithm, columnarChunkRows)
+
+        self.logWriter = LogWriter({"jobs": self.f_jobs,
+                                    "tasks": self.f_tasks,
+                                    "workers": self.f_workers},
+                                   flushInterval, flushRows,
+                                   columnarLog=columnarLog,
+                                   threaded=threadedLog)
         self.flush()
+        # The rows still queued are written out when the program exits
+        atexit.register(self.close)
         print("Job Tracker Initialized")
 
     def flush(self):
-        """```flush``` clears the internal buffer of the *data logging files*.
-        Normally, the files are automatically flushed while closing them.
-        However, a programmer can flush the *data logging files* before
-        closing it by using this ```flush()``` method.
+        """```flush``` waits for the rows written so far to be written out,
+        and clears the internal buffer of the *data logging files*.
+        Normally, the files are flushed periodically by the ```LogWriter```
+        and while closing them. However, a programmer can flush the *data
+        logging files* before that by using this ```flush()``` method.
 
         This method does not require any parameters and it does not return
         anything.
         """
-        self.f_jobs.flush()
-        self.f_tasks.flush()
-        self.f_workers.flush()
+        self.logWriter.flush()
+
+    def close(self):
+        """```close``` writes out the remaining rows and closes the *data
+        logging files*. Calling it again does nothing.
+        """
+        self.logWriter.close()
 
     def addJobRequest(self, parsed_json_request: dict):  # request_message):
         """
-        - Gets the Request message and initialises the dictionaries
-        to keep track of the jobs and associated tasks
-        - Get job_ids from request message, update jobs and tasks
-        - jobs_time keeps track of time to complete a job
-        - Starting time is initialized when request message is sent
-        - Ending time is updated when all tasks in a job are complete and a
-        response message is sent tasks_time keeps track of start time and
-        end time of a task
-        - The start time and end time of a particular task are received in the
-        response message
+        - Gets the Request message and creates the ```JobRecord``` which
+        keeps track of the job
+        - The starting time of the job is the time at which the request
+        message is received
+        - The counts of the job's map and reduce tasks are stored, and each
+        one is decremented as the updates of the tasks are received
         """
         # json_string = json.loads(request_message)
 
         # Get the job id from request string
         job_id = parsed_json_request["job_id"]
 
-        # The jobs dictionary keeps track of jobs as well as the tasks
-        # in the job
-        self.jobs[job_id] = dict()
-
-        self.map_tracker[job_id] = dict()  # Tracker for map tasks
-        self.reduce_tracker[job_id] = dict()  # Tracker for reduce tasks
-
-        # We log the start time of the job and set the end time of the job
-        # as None for now
-        self.jobs_time[job_id] = [time.time(), None]
-
-        self.tasks_time[job_id] = dict()
-        self.workers_time[job_id] = dict()
+        # We log the start time of the job, its end time is that of its last
+        # task
+        self.jobs[job_id] = JobRecord(self.clock(),
+                                      len(parsed_json_request["map_tasks"]),
+                                      len(parsed_json_request["reduce_tasks"]))
 
-        # Initializing the dictionaries below
-        for map_task in parsed_json_request["map_tasks"]:
-            self.jobs[job_id][map_task["task_id"]] = None
-            self.tasks_time[job_id][map_task["task_id"]] = None
-            self.map_tracker[job_id][map_task["task_id"]] = 0
-
-        for reduce_task in parsed_json_request["reduce_tasks"]:
-            self.jobs[job_id][reduce_task["task_id"]] = None
-            self.tasks_time[job_id][reduce_task["task_id"]] = None
-            self.reduce_tracker[job_id][reduce_task["task_id"]] = 0
-
-    def updateJob(self, parsed_json_request):
+    def updateJob(self, parsed_json_request) -> bool:
         """
         This method takes in the response message and performs the following
         tasks:
 
-        - Updates task end time
-        - If all tasks composing a job are done, updates job end time
-        - Updates task stats of a worker
-        - Writes out the stats of job, task, worker to a csv file
-        - Format of task_stats is ```[start_time, end_time]```
+        - Writes out the stats of the task and of its worker to a csv file
+        - Decrements the job's count of remaining map or reduce tasks
+        - Publishes ```Tracker.MAP_COMPLETE``` and wakes up the task
+        dispatcher once all the map tasks of the job have completed, as the
+        job's reduce tasks can now be dispatched
+        - If all tasks composing a job are done, writes out the stats of the
+        job, whose end time is that of its last task
+        - Updates for a job which is not being tracked (e.g. one which has
+        already completed), repeated updates of a task, and updates for more
+        tasks of a family than the job has, are reported and ignored, and no
+        rows are written for them
+
+        **return** Whether the update was applied, rather than ignored
+
+        **rtype** bool
         """
         # json_string = json.loads(response_message)
 
-        # Converting the Python dictionary into a JSON string
-        response_message = json.dumps(parsed_json_request)
         # Get the job id from the response message
         job_id = parsed_json_request["job_id"]
         # Get the task id from the response message
@@ -143,83 +195,81 @@ class Tracker:
         # Get the task family from the response message
         task_fam = parsed_json_request["task_family"]
 
+        # Ignore the update if it cannot belong to a task of the job still
+        # being waited for, as it would never let the job complete
+        record = self.jobs.get(job_id)
+        _reason = None
+        if record is None:
+            _reason = "the job is not being tracked"
+        elif task_id in record.completed_tasks:
+            _reason = "its update has already been received"
+        elif (record.remaining_map if task_fam == "map"
+              else record.remaining_reduce) == 0:
+            _reason = f"all its {task_fam} tasks have completed"
+        if _reason is not None:
+            master.PRINT_LOCK.acquire()
+            print(error_text((f"Ignoring the update of the {task_fam} task "
+                              f"{task_id} of job {job_id}, as {_reason}")))
+            master.PRINT_LOCK.release()
+            return False
+        record.completed_tasks.add(task_id)
+
         # Get task start and end time on worker
-        task_stats = [parsed_json_request["task"]["start_time"],
-                      parsed_json_request["task"]["end_time"]]
-        self.jobs[job_id][task_id] = response_message
-        # Stores start time and end time for a task
-        self.tasks_time[job_id][task_id] = task_stats
-        self.writeTasksCSV(job_id, task_id)
-
-        # Store the job_id, worker_id, task_id for a particular task
-        self.workers_time[job_id][worker_id] = task_stats
-        self.writeWorkersCSV(job_id, worker_id, task_id)
-
-        # If the task is a mapper task then update map_tracker else
-        # update reduce tracker
+        start_time = parsed_json_request["task"]["start_time"]
+        end_time = parsed_json_request["task"]["end_time"]
+        self.writeTasksCSV(job_id, task_id, start_time, end_time)
+        self.writeWorkersCSV(job_id, worker_id, task_id, start_time,
+                             end_time)
+
+        # If the task is a mapper task then update the count of remaining
+        # map tasks else update the count of remaining reduce tasks
         if task_fam == "map":
-            self.map_tracker[job_id][task_id] = 1
+            record.remaining_map -= 1
+            if record.remaining_map == 0:
+                self.events.publish(Tracker.MAP_COMPLETE, job_id)
+                dispatch.notify()
         else:
-            self.reduce_tracker[job_id][task_id] = 1
-        '''
-        Check if all tasks that compose a job are finished
-        This is checked using a flag. If flag remains 1, then all tasks
-        in a job are completed and the job end time is written to the
-        jobs_time dictionary.
-        '''
-        flag = 1
-        for key in self.jobs[job_id].keys():
-            if self.jobs[job_id][key] is None:
-                flag = 0
-                break
-        if flag == 1:
-            self.jobs_time[job_id][1] = task_stats[1]  # time.time()
-            self.writeJobsCSV(job_id)
+            record.remaining_reduce -= 1
+
+        # Once all tasks that compose a job are finished, the job's end time
+        # is that of its last task
+        if record.remaining_map == 0 and record.remaining_reduce == 0:
+            self.writeJobsCSV(job_id, end_time)
+        return True
 
     def isMapComplete(self, jobID) -> bool:
         """
         - Performs a check whether all map tasks in a job are complete
         - This is to maintain *map-reduce dependency*
         """
-        status = self.map_tracker[jobID].values()
-        if 0 in status:
-            return False
-        else:
-            return True
+        return self.jobs[jobID].remaining_map == 0
 
     def isReduceComplete(self, jobID) -> bool:
         """
         - Performs a check whether **all reduce tasks in a job are complete**
         - This is to maintain *map-reduce dependency*
         """
-        status = self.reduce_tracker[jobID].values()
-        if 0 in status:
-            return False
-        else:
-            return True
+        return self.jobs[jobID].remaining_reduce == 0
 
-    def writeJobsCSV(self, JobID):
+    def writeJobsCSV(self, JobID, end):
         """
         If a job has completed, then this method is called to write
-        the stats of that particular job to a log file.
+        the stats of that particular job to a log file, after which
+        ```Tracker.JOB_COMPLETE``` is published.
         """
         row = []
         row.append(JobID)
-        start = self.jobs_time[JobID][0]
-        end = self.jobs_time[JobID][1]
+        start = self.jobs[JobID].start_time
         row.append(start)
         row.append(end)
         row.append((end-start))
-        self.job_writer.writerow(row)
-        self.flush()
+        self.logWriter.write("jobs", row)
         # Once the job has been written into the CSV file then delete
         # its entry from the dictionary
-        del self.jobs_time[JobID]
         del self.jobs[JobID]
-        del self.map_tracker[JobID]
-        del self.reduce_tracker[JobID]
+        self.events.publish(Tracker.JOB_COMPLETE, JobID)
 
-    def writeTasksCSV(self, JobID, TaskID):
+    def writeTasksCSV(self, JobID, TaskID, start, end):
         """
         If a task has completed, then this method is called to write the
         stats of that particular task to a log file.
@@ -227,18 +277,12 @@ class Tracker:
         row = []
         row.append(JobID)
         row.append(TaskID)
-        start = self.tasks_time[JobID][TaskID][0]
-        end = self.tasks_time[JobID][TaskID][1]
         row.append(start)
         row.append(end)
         row.append((end-start))
-        self.task_writer.writerow(row)
-        self.flush()
-        # Once the task has been written into the CSV file then delete
-        # its entry from the dictionary
-        del self.tasks_time[JobID][TaskID]
+        self.logWriter.write("tasks", row)
 
-    def writeWorkersCSV(self, JobID, WorkerID, TaskID):
+    def writeWorkersCSV(self, JobID, WorkerID, TaskID, start, end):
         """
         Writes worker stats to a log (here CSV) file.
         """
@@ -246,22 +290,15 @@ class Tracker:
         row.append(JobID)
         row.append(WorkerID)
         row.append(TaskID)
-        start = self.workers_time[JobID][WorkerID][0]
-        end = self.workers_time[JobID][WorkerID][1]
         row.append(start)
         row.append(end)
-        self.worker_writer.writerow(row)
-        self.flush()
-        del self.workers_time[JobID][WorkerID]
+        self.logWriter.write("workers", row)
 
     def __del__(self):
         """
         The destructor of the class closes all the open log files.
         """
-        self.flush()
-        self.f_jobs.close()
-        self.f_workers.close()
-        self.f_tasks.close()
+        self.close()
 
 
 if __name__ == "__main__":
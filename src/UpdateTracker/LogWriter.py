@@ -0,0 +1,178 @@
+import csv
+import queue
+import threading
+import time
+from typing import Dict, List, Optional, TextIO
+
+
+class LogWriter:
+    """The ```LogWriter``` class writes the rows of the *data logging files*
+    from its own thread, so that the threads applying the worker updates only
+    hand off the rows, and never wait on the files while holding the
+    ```JobUpdateTracker.LOCK```.
+
+    The rows are put in a bounded queue using ```write()```. The writer's
+    thread writes all the rows waiting in the queue together, and flushes the
+    files once ```flushRows``` rows have been written since the last flush,
+    or once ```flushInterval``` seconds have passed since then, whichever
+    happens first.
+
+    **param** ```files```: The open *data logging files*, by name
+
+    **type** ```files```: Dict[str, TextIO]
+
+    **param** ```flushInterval```: The maximum number of seconds a written
+    row stays unflushed
+
+    **type** ```flushInterval```: float
+
+    **param** ```flushRows```: The number of written rows after which the
+    files are flushed right away
+
+    **type** ```flushRows```: int
+
+    **param** ```maxQueueSize```: The maximum number of rows waiting to be
+    written. ```write()``` blocks when the queue is full, which slows the
+    worker updates down instead of letting the queue grow without bound
+
+    **type** ```maxQueueSize```: int
+
+    **param** ```columnarLog```: If given, every row is also written to it
+
+    **type** ```columnarLog```: Optional[ColumnarLog]
+
+    **param** ```threaded```: Whether to write the rows from the writer's
+    thread. When False, ```write()``` writes the row right away in the
+    calling thread, which is faster for a single-threaded program such as
+    the simulation, as the rows are not handed off between the threads
+
+    **type** ```threaded```: bool
+    """
+    def __init__(self, files: Dict[str, TextIO], flushInterval: float = 1.0,
+                 flushRows: int = 1000, maxQueueSize: int = 10000,
+                 columnarLog=None, threaded: bool = True) -> None:
+        self.files = files
+        self.writers = {name: csv.writer(fHandler, delimiter=',',
+                                         quotechar='"',
+                                         quoting=csv.QUOTE_MINIMAL)
+                        for name, fHandler in files.items()}
+        self.flushInterval = flushInterval
+        self.flushRows = flushRows
+        self.columnarLog = columnarLog
+        self.queue: queue.Queue = queue.Queue(maxQueueSize)
+        self.isClosed: bool = False
+
+        self.thread: Optional[threading.Thread] = None
+        if threaded:
+            self.thread = threading.Thread(name="Log Writer",
+                                           target=self.writeRows)
+            self.thread.daemon = True
+            self.thread.start()
+
+    def write(self, name: str, row: list) -> None:
+        """```write``` queues the ```row``` to be written to the file given
+        by ```name```, or writes it right away if the writer is not
+        ```threaded```. It only blocks if the queue is full, and raises
+        ```ValueError``` once the writer has been closed, as the row would
+        never be written.
+
+        **param** ```name```: Name of the file to write the row to
+
+        **type** ```name```: str
+
+        **param** ```row```: The values of the row
+
+        **type** ```row```: list
+        """
+        if self.isClosed:
+            raise ValueError(f"Cannot write a row to {name}, as the log "
+                             "writer has been closed")
+        if self.thread is None:
+            self.writers[name].writerow(row)
+            if self.columnarLog is not None:
+                self.columnarLog.writerow(name, row)
+            return
+        self.queue.put((name, row))
+
+    def flush(self) -> None:
+        """```flush``` blocks until all the rows queued before it have been
+        written, and the files have been flushed. Once the writer has been
+        closed, the files have already been flushed, so it does nothing.
+        """
+        if self.isClosed:
+            return
+        if self.thread is None:
+            for fHandler in self.files.values():
+                fHandler.flush()
+            return
+        _flushed = threading.Event()
+        self.queue.put(_flushed)
+        _flushed.wait()
+
+    def close(self) -> None:
+        """```close``` stops the writer's thread, if any, once all the rows
+        queued before it have been written, and then flushes and closes the
+        files, and the columnar log if there is one. Calling it again does
+        nothing.
+        """
+        if self.isClosed:
+            return
+        self.isClosed = True
+        if self.thread is not None:
+            self.queue.put(None)
+            self.thread.join()
+        for fHandler in self.files.values():
+            fHandler.close()
+        if self.columnarLog is not None:
+            self.columnarLog.close()
+
+    def writeRows(self) -> None:
+        """```writeRows``` is run by the writer's thread. It waits for rows to
+        be queued, writes all the queued rows together, and flushes the files
+        when needed.
+        """
+        _unflushedRows: int = 0
+        _lastFlush: float = time.monotonic()
+        while True:
+            # Only wait for the rest of the flush interval if there are rows
+            # which have not been flushed yet
+            if _unflushedRows:
+                _timeout: Optional[float] = max(
+                    0, _lastFlush + self.flushInterval - time.monotonic())
+            else:
+                _timeout = None
+            try:
+                items: List = [self.queue.get(timeout=_timeout)]
+            except queue.Empty:
+                items = []
+            while True:
+                try:
+                    items.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            _isClosed: bool = False
+            _flushRequests: List[threading.Event] = []
+            for item in items:
+                if item is None:
+                    _isClosed = True
+                elif isinstance(item, threading.Event):
+                    _flushRequests.append(item)
+                else:
+                    self.writers[item[0]].writerow(item[1])
+                    if self.columnarLog is not None:
+                        self.columnarLog.writerow(item[0], item[1])
+                    _unflushedRows += 1
+
+            if _isClosed or _flushRequests or \
+               _unflushedRows >= self.flushRows or \
+               time.monotonic() - _lastFlush >= self.flushInterval:
+                for fHandler in self.files.values():
+                    fHandler.flush()
+                _unflushedRows = 0
+                _lastFlush = time.monotonic()
+                for _flushed in _flushRequests:
+                    _flushed.set()
+
+            if _isClosed:
+                break
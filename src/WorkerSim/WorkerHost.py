@@ -0,0 +1,254 @@
+import asyncio
+import json
+import socket
+import time
+from typing import Dict, List, Optional
+
+from cryptography.fernet import Fernet
+
+from Locks.WorkerPrintLock import worker
+from Communication.codec import chooseCodec
+from Communication.protocol import FrameReader, YACS_Protocol
+from Communication.security import chooseSession
+from Communication.timescale import TimeScale
+from WorkerSim.WorkerSimulation import Worker
+
+
+class HostedWorker:
+    """The ```HostedWorker``` class holds the state of one of the workers run
+    by a ```WorkerHost```, i.e. its ```Worker``` instance, which keeps its
+    task execution pool, and its connection back to the master.
+
+    **param** ```workerID```: ID of the worker, as in the master's config
+
+    **type** ```workerID```: int
+
+    **param** ```port```: Port to listen for tasks from the master on
+
+    **type** ```port```: int
+    """
+    def __init__(self, workerID: int, port: int) -> None:
+        self.worker = Worker(workerID)
+        self.port = port
+        # Created during the connect back exchange
+        self.session = None
+        self.updatesWriter: Optional[asyncio.StreamWriter] = None
+        # Timer for the earliest deadline in the execution pool, and that
+        # deadline
+        self.timer: Optional[asyncio.TimerHandle] = None
+        self.timerDeadline: float = float("inf")
+        # Updates waiting for the batch window to end, and whether they are
+        # already due to be sent
+        self.pendingUpdates: List[bytes] = []
+        self.isBatchScheduled: bool = False
+
+
+class WorkerHost:
+    """The ```WorkerHost``` class runs many workers in a single process, on
+    one ```asyncio``` event loop, instead of a process with three threads per
+    worker. It is meant for testing the master with hundreds of workers.
+
+    Every worker still listens on its own port and connects back to the
+    master with its own worker ID, key, codec and security mode, so the
+    master cannot tell it apart from a worker started by ```worker.py```.
+    The tasks of every worker are kept by its own ```Worker``` instance,
+    and each worker has a single timer on the event loop, for the earliest
+    deadline in its execution pool, which completes all its tasks that are
+    due and sends their updates to the master in one frame.
+
+    **param** ```workers```: The port of every worker, by worker ID
+
+    **type** ```workers```: Dict[int, int]
+
+    **param** ```batchWindow```: Seconds to wait after a task completes for
+    more tasks of the same worker to complete, before sending their updates
+    together, defaults to 0
+
+    **type** ```batchWindow```: float, optional
+    """
+    MASTER_UPDATES_PORT: int = 5001
+    BUFFER_SIZE: int = 4096
+
+    def __init__(self, workers: Dict[int, int],
+                 batchWindow: float = 0) -> None:
+        self.workers = {workerID: HostedWorker(workerID, port)
+                        for workerID, port in workers.items()}
+        self.batchWindow = batchWindow
+
+    async def run(self) -> None:
+        """```run``` listens for the master on the port of every worker, and
+        then runs the workers until the master closes all their connections.
+        """
+        finished = [asyncio.get_running_loop().create_future()
+                    for _ in self.workers]
+        servers = []
+        for hostedWorker, workerFinished in zip(self.workers.values(),
+                                                finished):
+            servers.append(await asyncio.start_server(
+                self.createHandler(hostedWorker, workerFinished),
+                socket.gethostname(), hostedWorker.port,
+                reuse_address=True))
+
+        worker.PRINT_LOCK.acquire()
+        print(Worker.info_text(f"Hosting {len(self.workers)} workers"))
+        worker.PRINT_LOCK.release()
+
+        try:
+            await asyncio.gather(*finished)
+        finally:
+            for server in servers:
+                server.close()
+
+    def createHandler(self, hostedWorker: HostedWorker,
+                      finished: asyncio.Future):
+        """```createHandler``` returns the handler of the connection from
+        the master to ```hostedWorker```, which sets ```finished``` once the
+        master closes the connection.
+        """
+        async def handler(reader: asyncio.StreamReader,
+                          writer: asyncio.StreamWriter) -> None:
+            try:
+                await self.serveWorker(hostedWorker, reader)
+            finally:
+                writer.close()
+                if hostedWorker.updatesWriter is not None:
+                    hostedWorker.updatesWriter.close()
+                if hostedWorker.timer is not None:
+                    hostedWorker.timer.cancel()
+                if not finished.done():
+                    finished.set_result(None)
+        return handler
+
+    async def serveWorker(self, hostedWorker: HostedWorker,
+                          reader: asyncio.StreamReader) -> None:
+        """```serveWorker``` answers the *connect back* request of the
+        master, and then adds the tasks received from the master to the
+        worker's execution pool until the master closes the connection.
+        """
+        workerInstance = hostedWorker.worker
+        frameReader = FrameReader()
+        frames = await frameReader.readFramesFromStream(
+            reader, WorkerHost.BUFFER_SIZE)
+        if frames is None:
+            return
+
+        connBackDetails = json.loads(frames.pop(0).decode())
+        # Pick the codec and the security mode, from the ones offered by the
+        # master, and create the worker's private key
+        workerInstance.codec = chooseCodec(connBackDetails.get("codecs",
+                                                               ["json"]))
+        sessionType = chooseSession(connBackDetails.get("security_modes",
+                                                        ["fernet"]))
+        workerKey = sessionType.generateKey()
+        hostedWorker.session = sessionType(workerKey)
+        workerInstance.timeScale = TimeScale(
+            connBackDetails.get("time_scale", 1.0),
+            connBackDetails.get("time_epoch"))
+
+        worker.PRINT_LOCK.acquire()
+        print(f"{workerInstance.ID} chose the codec "
+              f"{workerInstance.codec.NAME}")
+        print(f"{workerInstance.ID} chose the security mode "
+              f"{sessionType.NAME}")
+        print(f"{workerInstance.ID} runs at "
+              f"{workerInstance.timeScale.factor}x real time")
+        print(f"Sleeping for {connBackDetails['back_off_time']}s")
+        worker.PRINT_LOCK.release()
+        await asyncio.sleep(connBackDetails["back_off_time"])
+
+        _, hostedWorker.updatesWriter = await asyncio.open_connection(
+            socket.gethostname(), WorkerHost.MASTER_UPDATES_PORT)
+        hostedWorker.updatesWriter.write(YACS_Protocol.createFrame(
+            YACS_Protocol.connectBackResponse(
+                str(workerInstance.ID),
+                Fernet(connBackDetails["public_key"].encode())
+                .encrypt(workerKey),
+                workerInstance.codec.NAME, sessionType.NAME,
+                workerInstance.timeScale.factor).encode()))
+
+        while frames is not None:
+            # Every frame holds a single encrypted message
+            requests = [workerInstance.codec.decodeMessageToWorker(
+                            hostedWorker.session.decrypt(frame))
+                        for frame in frames]
+            if requests:
+                worker.PRINT_LOCK.acquire()
+                print(f"Task received at worker: {json.dumps(requests)}")
+                worker.PRINT_LOCK.release()
+
+                workerInstance.LOCK.acquire()
+                workerInstance.addTasks(requests)
+                workerInstance.LOCK.release()
+                self.scheduleTimer(hostedWorker)
+
+            frames = await frameReader.readFramesFromStream(
+                reader, WorkerHost.BUFFER_SIZE)
+
+    def scheduleTimer(self, hostedWorker: HostedWorker) -> None:
+        """```scheduleTimer``` sets the worker's timer for the earliest
+        deadline in its execution pool, unless it is already set for it.
+        """
+        deadlines = hostedWorker.worker.deadlines
+        if not deadlines or deadlines[0][0] >= hostedWorker.timerDeadline:
+            return
+        if hostedWorker.timer is not None:
+            hostedWorker.timer.cancel()
+        hostedWorker.timerDeadline = deadlines[0][0]
+        hostedWorker.timer = asyncio.get_running_loop().call_later(
+            max(deadlines[0][0] - time.time(), 0), self.completeTasks,
+            hostedWorker)
+
+    def completeTasks(self, hostedWorker: HostedWorker) -> None:
+        """```completeTasks``` completes all the tasks of the worker which
+        are due, sends their updates to the master, or waits for the batch
+        window to end first, and sets the timer for the next deadline.
+        """
+        hostedWorker.timer = None
+        hostedWorker.timerDeadline = float("inf")
+        workerInstance = hostedWorker.worker
+
+        end_time = time.time()
+        workerInstance.LOCK.acquire()
+        while workerInstance.deadlines and \
+                workerInstance.deadlines[0][0] <= end_time:
+            hostedWorker.pendingUpdates.append(
+                workerInstance.completeTask(end_time))
+        isPoolEmpty = not workerInstance.tasks
+        workerInstance.LOCK.release()
+
+        if isPoolEmpty:
+            worker.PRINT_LOCK.acquire()
+            print(Worker.info_text("The task execution pool of worker "
+                                   f"{workerInstance.ID} is empty!"))
+            worker.PRINT_LOCK.release()
+
+        if self.batchWindow > 0:
+            # The updates are sent once, at the end of the window started
+            # by the first of them
+            if hostedWorker.pendingUpdates and \
+                    not hostedWorker.isBatchScheduled:
+                hostedWorker.isBatchScheduled = True
+                asyncio.get_running_loop().call_later(
+                    self.batchWindow, self.sendUpdates, hostedWorker)
+        else:
+            self.sendUpdates(hostedWorker)
+        self.scheduleTimer(hostedWorker)
+
+    def sendUpdates(self, hostedWorker: HostedWorker) -> None:
+        """```sendUpdates``` sends the pending updates of the worker to the
+        master, as a single batch in one encrypted frame.
+        """
+        batch = hostedWorker.pendingUpdates
+        hostedWorker.pendingUpdates = []
+        hostedWorker.isBatchScheduled = False
+        if not batch or hostedWorker.updatesWriter is None or \
+                hostedWorker.updatesWriter.is_closing():
+            return
+
+        hostedWorker.updatesWriter.write(YACS_Protocol.createFrame(
+            hostedWorker.session.encrypt(YACS_Protocol.createBatch(batch))))
+        codec = hostedWorker.worker.codec
+        worker.PRINT_LOCK.acquire()
+        for response_msg in batch:
+            print(f"Task sent: {codec.messageToMasterJSON(response_msg)}!")
+        worker.PRINT_LOCK.release()
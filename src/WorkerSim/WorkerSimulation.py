@@ -1,13 +1,15 @@
+import heapq  # For the deadlines of the tasks
 import time  # For times
 import json  # For JSON to python conversion and vice-versa
 import threading  # For locks
 import socket  # For function parameters
 import queue  # For storing the completed tasks
-from cryptography.fernet import Fernet
 import colored as TC
 
 from Locks.WorkerPrintLock import worker
-from Communication.protocol import YACS_Protocol
+from Communication.codec import JSONCodec
+from Communication.protocol import FrameReader, YACS_Protocol
+from Communication.timescale import TimeScale
 # from master import PRINT_LOCK
 #  For sending message back to master
 
@@ -22,29 +24,46 @@ class Worker:
         1. It adds the particular task to its execution pool.
             - The worker will not be handed any task when its execution pool is
             full.
-        1. Run (i.e. simulate) the tasks by decrementing the *remaining_time*
-            value each second.
+        1. Run (i.e. simulate) the tasks by sleeping until the earliest
+            deadline (i.e. *start_time + duration*) of the tasks in the
+            execution pool.
         1. Once a particular task finishes execution, the worker removes it
             from the execution pool and sends a message back to the Master
             using YACS Protocol Message (***createMessageToMaster()***).
     """
-    def __init__(self, WorkerID):
+    def __init__(self, WorkerID, codec=JSONCodec):
         self.tasks = dict()  # Task Execution Pool
         self.ID = WorkerID  # Unique Worker ID
         self.LOCK = threading.Lock()
         self.updates_q = queue.Queue()  # For completed tasks
+        # Codec for the task messages, agreed upon with the master
+        self.codec = codec
+        # Time scale agreed upon with the master. The deadlines are in real
+        # time, and the times of the tasks in simulated time
+        self.timeScale = TimeScale()
+        # Min-heap of (deadline, job ID, task ID) of the tasks in the
+        # execution pool, ordered by when they finish
+        self.deadlines = []
+        # Notified when a task is added to the execution pool
+        self.TASK_ADDED = threading.Condition(self.LOCK)
+        # Notified when the last task in the execution pool completes
+        self.POOL_EMPTIED = threading.Condition(self.LOCK)
 
     def listenForTaskRequest(self, taskRequestSocket: socket.socket,
-                             WORKER_KEY):
+                             session, frameReader: FrameReader):
         """
         This listens for a JSON message which was created using the
         ***createMessageToWorker()*** method (*i.e. following the set protocol
         format*) and then sets its key for the particular instance of worker
         as task id and the value is all the related information of the task,
         i.e the dictionary obtained from **createMessageToWorker()** method.
+
+        Every message is received in its own frame, using ```frameReader```,
+        which must be the reader already used to receive the connect back
+        message on ```taskRequestSocket```. The frames are decrypted using
+        ```session```, which was created for the security mode chosen during
+        the connect back exchange.
         """
-        dec_obj = Fernet(WORKER_KEY)
-        # Fernet uses a key for symmetric encryption/decryption
 
         # Thread to log when the worker task pool is empty
         _exec_pool_poller_thread = threading\
@@ -58,56 +77,32 @@ class Worker:
         worker.PRINT_LOCK.release()
 
         while True:
-            # To extract the message sent from master
-            taskRequest = taskRequestSocket.recv(MESSAGE_BUFFER_SIZE).decode()
-            if not taskRequest:
+            # To extract the messages sent from master
+            frames = frameReader.readFrames(taskRequestSocket,
+                                            MESSAGE_BUFFER_SIZE)
+            if frames is None:
                 taskRequestSocket.close()
                 break
 
-            _temp: str = ''
-            for i in taskRequest.split('==')[:-1]:
-                _temp += dec_obj.decrypt((i + '==').encode()).decode()
-            taskRequest = _temp
-
-            # Preprocess the received JSON data. This helps prevent
-            # JSON parsing errors when more then one message has been
-            # received at once at the worker
-            taskRequest = "[" + taskRequest.replace("}{", "},{") + "]"
+            # Every frame holds a single encrypted message. Convert them to
+            # python dictionaries
+            python_protocol_message = [self.codec.decodeMessageToWorker(
+                                           session.decrypt(frame))
+                                       for frame in frames]
 
             # For logging purposes
             worker.PRINT_LOCK.acquire()
-            print(f"Task received at worker: {taskRequest}")
+            print("Task received at worker: "
+                  f"{json.dumps(python_protocol_message)}")
             worker.PRINT_LOCK.release()
 
-            # Convert JSON to python dictionary
-            python_protocol_message = json.loads(taskRequest)
-
             # Acquiring lock as shared object is accessed
             self.LOCK.acquire()
+            self.addTasks(python_protocol_message)
 
-            # request: messageToWorker type
-            for request in python_protocol_message:
-                # To obtain key for addition to task exec pool
-                job_in_message = request["job_id"]
-                task_in_message = request["task"]["task_id"]
-                # Initialise the starting time of the task
-                request["task"]["start_time"] = time.time()
-                request["task"]["end_time"] = 0
-                # Adding components that are there in reply message to the
-                # master but not in the received message
-                worker.PRINT_LOCK.acquire()
-                print(request)
-                worker.PRINT_LOCK.release()
-                if self.tasks.get(job_in_message) is None:
-                    self.tasks[job_in_message] = dict()
-                # The dictionary that stores the incoming task requests is a
-                # nested dictionary with first level key as job_id and the
-                # value being another dictionary with task_id(unique for a job)
-                # as the key for this nested dictionary and value being the
-                # actual response to the master
-
-                self.tasks[job_in_message][task_in_message] = request
-
+            # Wake up the simulation, as a new task may finish before the
+            # one it is waiting for
+            self.TASK_ADDED.notify()
             self.LOCK.release()  # Release lock as CS code is complete
 
             worker.PRINT_LOCK.acquire()
@@ -117,108 +112,141 @@ class Worker:
         # _exec_pool_poller_thread.join()
 
     def simulateWorker(self):
-        # While there is a task to execute in the task exec pool
-        while True:
-            # Get the number of tasks in the Task pool
-            self.LOCK.acquire()  # Acquiring lock as shared object is accessed
-            tasksInExecutionPool_Count = len(self.tasks)  # Returns no_of_jobs
-            self.LOCK.release()  # Release lock as CS code is complete
+        """
+        This completes the tasks in the task execution pool, in the order of
+        their deadlines (i.e. *start_time + duration*).
 
-            # If there are tasks to execute in the task pool
-            if tasksInExecutionPool_Count != 0:
-                self.LOCK.acquire()  # Lock as shared object is accessed
-                _temp_1 = list(self.tasks)  # Need to store as list for
-                # Sleeps for 1 second until next check on the values
-                # time.sleep(1)
-                for job_id in _temp_1:      # correct iterating
-                    """Durations (i.e. the value in the dictionary) will be
-                    positive(non-zero) integers."""
-                    _temp_2 = list(self.tasks[job_id])
-                    for task_id in _temp_2:
-                        # Reduce the duration of the task by 1
-                        # worker.PRINT_LOCK.acquire()
-                        # print(type(self.tasks[job_id][task_id]["task"]
-                        #            ["duration"]))
-                        # _d = self.tasks[job_id][task_id]["task"]["duration"]
-                        # print((f'Remaining duration for Job-{job_id} '
-                        #        f'task-{task_id}: '
-                        #        f'{_d}'))
-                        # worker.PRINT_LOCK.release()
-
-                        # self.tasks[job_id][task_id]["task"]["duration"] -= 1
-
-                        # Check if the duration has become 0, i.e. the task has
-                        # finished execution
-                        pot_end_time = time.time()
-                        if pot_end_time - \
-                           self.tasks[job_id][task_id]["task"]["start_time"] \
-                           >= self.tasks[job_id][task_id]["task"]["duration"]:
-                            # (self.tasks[job_id][task_id]["task"]["duration"]
-                            # == 0):
-                            self.tasks[job_id][task_id]["task"]["end_time"] = \
-                                pot_end_time
-                            # Store the end-time of the task
-                            response_message_to_master = YACS_Protocol\
-                                .createMessageToMaster((self.tasks[job_id]
-                                                        [task_id]["job_id"]),
-                                                       (self.tasks[job_id]
-                                                        [task_id]
-                                                        ["task_family"]),
-                                                       (self.tasks[job_id]
-                                                        [task_id]["task"]
-                                                        ["task_id"]),
-                                                       (self.tasks[job_id]
-                                                        [task_id]["task"]
-                                                        ["start_time"]),
-                                                       (self.tasks[job_id]
-                                                        [task_id]["task"]
-                                                        ["end_time"]),
-                                                       (self.tasks[job_id]
-                                                        [task_id]
-                                                        ["worker_id"]))
-                            # YACS Protocol based response to master
-                            self.updates_q.put(response_message_to_master)
-                            # Adding the task in the completed tasks queue
-                            # The queue is a shared object that can be accessed
-                            # between separate threads
-                            del self.tasks[job_id][task_id]
-                            # Remove the task entry from the task exec pool
-                            if len(self.tasks[job_id]) == 0:
-                                del self.tasks[job_id]
-                            # Remove the job entry if there are no tasks of
-                            # that particular job
-
-                self.LOCK.release()  # Release lock as CS code is complete
-
-        # NOTE: Need to add the portion wherein the worker needs to listen
-        # for messages if dict is empty
-        # UPDATE: Taken care of by the forever loop
-        # NOTE: Need to first establish communication between master and
-        # worker for that
-        # UPDATE 1: Acknowledged. Working on that right now.
-        # UPDATE 2: The same has been implemented
-
-    def taskComplete(self, reply_socket: socket.socket, WORKER_KEY):
+        It sleeps until the earliest deadline in ```deadlines```, or until a
+        new task is added to the pool, instead of checking every task in a
+        loop. Every completed task is removed from the pool and its
+        ***createMessageToMaster()*** message is put on ```updates_q```.
         """
-        This method creates and returns returns the **JSON string**
-        of format createMessageToMaster() of YACS Protocol.
+        self.LOCK.acquire()  # Acquiring lock as shared object is accessed
+        while True:
+            # If there are no tasks to execute in the task pool, then wait
+            # for one to be added
+            if not self.deadlines:
+                self.TASK_ADDED.wait()
+                continue
+
+            # Sleep until the earliest deadline, unless a task is added in
+            # the meantime
+            pot_end_time = time.time()
+            if self.deadlines[0][0] > pot_end_time:
+                self.TASK_ADDED.wait(self.deadlines[0][0] - pot_end_time)
+                continue
+
+            # The task has finished execution. Adding the task in the
+            # completed tasks queue, which is a shared object that can be
+            # accessed between separate threads
+            self.updates_q.put(self.completeTask(pot_end_time))
+
+    def addTasks(self, requests):
+        """
+        This adds the tasks of the ***createMessageToWorker()*** messages in
+        ```requests``` to the task execution pool, and their deadlines to
+        ```deadlines```. The ```LOCK``` must be held while calling it.
+        """
+        # request: messageToWorker type
+        for request in requests:
+            # To obtain key for addition to task exec pool
+            job_in_message = request["job_id"]
+            task_in_message = request["task"]["task_id"]
+            # Initialise the starting time of the task
+            start_time = time.time()
+            request["task"]["start_time"] = \
+                self.timeScale.toSimulated(start_time)
+            request["task"]["end_time"] = 0
+            # Adding components that are there in reply message to the
+            # master but not in the received message
+            worker.PRINT_LOCK.acquire()
+            print(request)
+            worker.PRINT_LOCK.release()
+            if self.tasks.get(job_in_message) is None:
+                self.tasks[job_in_message] = dict()
+            # The dictionary that stores the incoming task requests is a
+            # nested dictionary with first level key as job_id and the
+            # value being another dictionary with task_id(unique for a job)
+            # as the key for this nested dictionary and value being the
+            # actual response to the master
+
+            self.tasks[job_in_message][task_in_message] = request
+            heapq.heappush(self.deadlines,
+                           (start_time + self.timeScale.toRealDuration(
+                               request["task"]["duration"]),
+                            job_in_message, task_in_message))
+
+    def completeTask(self, end_time):
+        """
+        This removes the task with the earliest deadline from the task
+        execution pool, as it completed at ```end_time``` (in real time),
+        and returns its
+        encoded ***createMessageToMaster()*** message. The ```LOCK``` must be
+        held while calling it.
+        """
+        _, job_id, task_id = heapq.heappop(self.deadlines)
+        task = self.tasks[job_id][task_id]
+        # Store the end-time of the task
+        task["task"]["end_time"] = self.timeScale.toSimulated(end_time)
+        # YACS Protocol based response to master
+        response_message_to_master = self.codec\
+            .encodeMessageToMaster(task["job_id"], task["task_family"],
+                                   task["task"]["task_id"],
+                                   task["task"]["start_time"],
+                                   task["task"]["end_time"],
+                                   task["worker_id"])
+        # Remove the task entry from the task exec pool
+        del self.tasks[job_id][task_id]
+        # Remove the job entry if there are no tasks of
+        # that particular job
+        if len(self.tasks[job_id]) == 0:
+            del self.tasks[job_id]
+            if not self.tasks:
+                self.POOL_EMPTIED.notify()
+        return response_message_to_master
+
+    def taskComplete(self, reply_socket: socket.socket, session,
+                     batch_window: float = 0):
+        """
+        This sends the ***createMessageToMaster()*** messages of the
+        completed tasks, put on ```updates_q``` by ***simulateWorker()***,
+        to the master.
 
-        This method is called by ***simulateWorker()*** method when the
-        *remaining_duration attribute* of the task **becomes 0**.
+        It blocks until a task completes, and then sends all the completed
+        tasks' messages that are ready as a single batch (see
+        ```YACS_Protocol.createBatch()```), in one encrypted frame.
+
+        **param** ```batch_window```: Seconds to wait after a task completes
+        for more tasks to complete, before sending the batch. This trades a
+        little latency for fewer, larger frames, defaults to 0
+
+        **type** ```batch_window```: float, optional
         """
-        enc_obj = Fernet(WORKER_KEY)
         while True:
-            if not self.updates_q.empty():
-                response_msg: str = self.updates_q.get()
+            # Block until a task completes
+            batch = [self.updates_q.get()]
+            if batch_window > 0:
+                time.sleep(batch_window)
+            # Take all the other completed tasks as well
+            while True:
+                try:
+                    batch.append(self.updates_q.get_nowait())
+                except queue.Empty:
+                    break
+
+            # Sending to master
+            reply_socket.sendall(YACS_Protocol.createFrame(
+                session.encrypt(YACS_Protocol.createBatch(batch))))
+            worker.PRINT_LOCK.acquire()
+            for response_msg in batch:
+                print("Task sent: "
+                      f"{self.codec.messageToMasterJSON(response_msg)}!")
+            worker.PRINT_LOCK.release()
+
+            # get() and task_done() are similar to lock()
+            # and release() for the queue
+            for _ in batch:
                 self.updates_q.task_done()
-                # get() and task_done() are similar to lock()
-                # and release() for the queue
-                # Sending to master
-                reply_socket.sendall(enc_obj.encrypt(response_msg.encode()))
-                worker.PRINT_LOCK.acquire()
-                print(f"Task sent: {response_msg}!")
-                worker.PRINT_LOCK.release()
-                # time.sleep(0.01)
 
     @staticmethod
     def info_text(text):
@@ -239,21 +267,17 @@ class Worker:
         return f"{TC.fg(6) + TC.attr(1)}INFO:{TC.attr(0)} {text}"
 
     def tasksPoolPoller(self):
-        isTaskPoolEmpty: bool = False
-        wasTaskPoolEmpty: bool = False
-        # Prints when the task pool is empty
+        # Prints when the task pool is empty, and then waits for the last
+        # task in the pool to complete
+        self.LOCK.acquire()
         while True:
-            self.LOCK.acquire()
-            isTaskPoolEmpty = not self.tasks
-            self.LOCK.release()
-
-            if isTaskPoolEmpty and not wasTaskPoolEmpty:
+            if not self.tasks:
                 worker.PRINT_LOCK.acquire()
                 print(Worker.info_text("The task execution pool is empty!")
                       )
                 worker.PRINT_LOCK.release()
 
-            wasTaskPoolEmpty = isTaskPoolEmpty
+            self.POOL_EMPTIED.wait()
 
     def __del__(self):
         self.updates_q.join()  # block until all tasks are done
@@ -1,9 +1,11 @@
+import argparse
+import asyncio
 import json
+import signal
 import socket
 import sys
 import threading
-import time
-from typing import List, Optional, Tuple
+from typing import List, Sequence, Tuple
 import colored as TC
 from colored.colored import attr
 import inflect
@@ -12,7 +14,10 @@ from cryptography.fernet import Fernet
 # This lock is used to get access to print onto the standard output
 from Locks.MasterPrintLock import master
 
+from MasterUtils.AsyncMaster import AsyncMaster
+from MasterUtils.CLIText import error_text, info_text, success_text
 from MasterUtils.WorkerStateTracker import StateTracker
+from MasterUtils.WorkerUpdates import applyWorkerUpdates
 from UpdateTracker.JobUpdateTracker import Tracker as JobUpdateTracker
 
 from Scheduler.JobRequests import JobRequestHandler
@@ -20,7 +25,11 @@ from Scheduler.RandomScheduling import RandomScheduler
 from Scheduler.RoundRobinScheduling import RoundRobinScheduler
 from Scheduler.LeastLoadedScheduling import LeastLoadedScheduler
 
-from Communication.protocol import messageToMasterType
+from Communication.codec import CODECS, BinaryCodec
+from Communication.security import SESSIONS, PlainSession
+from Communication.timescale import TimeScale
+from Communication.protocol import FrameReader, YACS_Protocol, \
+    messageToMasterType
 
 
 # The maximum amount of data to be received at once is specified by BUFFER_SIZE
@@ -29,128 +38,54 @@ BUFFER_SIZE: int = 4096
 # Error codes to return to the shell
 # The Unix programs' style for error codes has
 # been used here
-MISSING_CMD_LINE_ARGS: int = 2
 BROKEN_CONFIG_FILE_PATH: int = 1
+WORKERS_NOT_READY: int = 2
 
 GE = inflect.engine()  # GE means Grammar Engine
 
 
-def info_text(text):
-    """```info_text``` returns a modified version of the input ```text``` such
-    that it looks like an *information message* when printed on the CLI.
+def onTasksDispatched(job_id: str):
+    """```onTasksDispatched``` is subscribed to the
+    ```JobRequestHandler.TASKS_DISPATCHED``` event, and prints a ```success
+    message``` once all the tasks of the job given by ```job_id``` have been
+    dispatched to one or the other worker.
 
-    **param** ```text```: The input string that will be modified to look like
-    an *information message* when printed on the CLI
+    It is called by the task dispatcher, while the ```JobRequestHandler.LOCK```
+    is held.
 
-    **type** ```text```: str
+    **param** ```job_id```: The ```Job ID``` of the job whose last task has
+    been dispatched
 
-    **return**: The modified version of the input ```text``` such
-    that it looks like an *information message* when printed on the CLI
-
-    **rtype**: str
-    """
-    return f"{TC.fg(6) + TC.attr(1)}INFO:{TC.attr(0)} {text}"
-
-
-def error_text(text):
-    """```error_text``` returns a modified version of the input ```text``` such
-    that it looks like an *error message* when printed on the CLI.
-
-    **param** ```text```: The input string that will be modified to look like
-    an *error message* when printed on the CLI
-
-    **type** ```text```: str
-
-    **return**: The modified version of the input ```text``` such
-    that it looks like an *error message* when printed on the CLI
-
-    **rtype**: str
-    """
-    return f"{TC.fg(1) + TC.attr(1)}ERROR:{TC.attr(0)} {text}"
-
-
-def success_text(text):
-    """```success_text``` returns a modified version of the input ```text```
-    such that it looks like a *success message* when printed on the CLI.
-
-    **param** ```text```: The input string that will be modified to look like
-    a *success message* when printed on the CLI
-
-    **type** ```text```: str
-
-    **return**: The modified version of the input ```text``` such
-    that it looks like a *success message* when printed on the CLI
-
-    **rtype**: str
+    **type** ```job_id```: str
     """
-    return f"{TC.fg(2) + TC.attr(1)}SUCCESS:{TC.attr(0)} {text}"
-
-
-def checkJobPoller(jobRequestHandler: JobRequestHandler,
-                   jobUpdateTracker: JobUpdateTracker,
-                   job_id: str):
-    """```checkJobPoller``` continuously checks if all the tasks, for
-    the pending job given by ```job_id```, have been dispatched to one
-    or the other worker, by the master. It also checks whether the
-    updates from the workers, for every dispatched task, of the running
-    job given by ```job_id```, have been received by the master.
-
-    It prints a ```success message``` once all tasks of all the pending jobs
-    have been dispatched as well as once all the tasks' updates for all jobs
-    have been received, by the master.
-
-    **param** ```jobRequestHandler```: Used to track the task dispatch status
-    of the job
+    master.PRINT_LOCK.acquire()
+    print(success_text((f"All tasks of job-{job_id} have been "
+                        "dispatched to the workers!")))
+    master.PRINT_LOCK.release()
 
-    **type** ```jobRequestHandler```: JobRequestHandler
 
-    **param** ```jobUpdateTracker```: Used to track the updates from the
-    workers about the tasks assigned belonging to the different jobs
+def onJobComplete(job_id: str):
+    """```onJobComplete``` is subscribed to the
+    ```JobUpdateTracker.JOB_COMPLETE``` event, and prints a ```success
+    message``` once the updates from the workers, for every task of the job
+    given by ```job_id```, have been received by the master.
 
-    **type** ```jobUpdateTracker```: JobUpdateTracker
+    It is called by the thread which received the job's last task update,
+    while the ```JobUpdateTracker.LOCK``` is held.
 
-    **param** ```job_id```: This is the ```Job ID``` of the job that this
-    instance of the thread will track, right from the dispatch of the tasks
-    of the job to the workers, to the reception of all the tasks' updates for
-    the job from the workers.
+    **param** ```job_id```: The ```Job ID``` of the job which has completed
 
     **type** ```job_id```: str
     """
-    isJobDispatchComplete = {}
-    _isPrint_1: bool = False
-    isJobUpdatesComplete = {}
-    _isPrint_2: bool = False
-
-    while (isJobDispatchComplete is not None) or \
-          (isJobUpdatesComplete is not None):
-        jobRequestHandler.LOCK.acquire()
-        isJobDispatchComplete = jobRequestHandler.jobRequests.get(job_id)
-        jobRequestHandler.LOCK.release()
-
-        if (isJobDispatchComplete is None) and (not _isPrint_1):
-            master.PRINT_LOCK.acquire()
-            print(success_text((f"All tasks of job-{job_id} have been "
-                                "dispatched to the workers!"))
-                  )
-            master.PRINT_LOCK.release()
-            _isPrint_1 = True
-
-        jobUpdateTracker.LOCK.acquire()
-        isJobUpdatesComplete = jobUpdateTracker.jobs_time.get(job_id)
-        jobUpdateTracker.LOCK.release()
-
-        if (isJobUpdatesComplete is None) and (not _isPrint_2):
-            master.PRINT_LOCK.acquire()
-            print(success_text((f"All task updates of job-{job_id} have been"
-                                " received!")))
-            master.PRINT_LOCK.release()
-            _isPrint_2 = True
-
-        time.sleep(0.01)
+    master.PRINT_LOCK.acquire()
+    print(success_text((f"All task updates of job-{job_id} have been"
+                        " received!")))
+    master.PRINT_LOCK.release()
 
 
 def listenForJobRequests(jobRequestHandler: JobRequestHandler,
-                         jobUpdateTracker: JobUpdateTracker):
+                         jobUpdateTracker: JobUpdateTracker,
+                         requireStringIDs: bool = False):
     """```listenForJobRequests``` listens for new job requests from the client
     code.
 
@@ -163,6 +98,12 @@ def listenForJobRequests(jobRequestHandler: JobRequestHandler,
     workers about the tasks assigned belonging to the different jobs
 
     **type** ```jobUpdateTracker```: JobUpdateTracker
+
+    **param** ```requireStringIDs```: Whether to refuse the job requests whose
+    job or task IDs are not strings, as the binary codec cannot encode them,
+    defaults to False
+
+    **type** ```requireStringIDs```: bool, optional
     """
     _JOB_REQUEST_ADDR: Tuple[str, int] = ("localhost", 5000)
     # Older version of address tuple used: (socket.gethostname(), 5000)
@@ -188,15 +129,21 @@ def listenForJobRequests(jobRequestHandler: JobRequestHandler,
             print(f"Socket: {clientAddr[1]}")
             master.PRINT_LOCK.release()
 
-            # while True:
-            jobRequest = clientConn.recv(BUFFER_SIZE)
+            # The client closes the connection once it has sent the request,
+            # which may be larger than BUFFER_SIZE
+            _chunks: List[bytes] = []
+            while True:
+                _chunk = clientConn.recv(BUFFER_SIZE)
+                if not _chunk:
+                    break
+                _chunks.append(_chunk)
+            jobRequest = b"".join(_chunks)
             if not jobRequest:
                 clientConn.close()
-                break
+                continue
 
             # Decode and parse the JSON string
             parsedJSON_Msg = json.loads(jobRequest.decode())
-            _recv_job_id: str = parsedJSON_Msg["job_id"]
 
             if not parsedJSON_Msg["map_tasks"] and \
                     not parsedJSON_Msg["reduce_tasks"]:
@@ -211,56 +158,61 @@ def listenForJobRequests(jobRequestHandler: JobRequestHandler,
 
                 continue
 
-            # Add new job request to job request handler object
-            # for task dispatch
-            # print("Acquiring jobRequestHandler LOCK")
-            jobRequestHandler.LOCK.acquire()
-            jobRequestHandler.addJobRequest(parsedJSON_Msg)
-            jobRequestHandler.LOCK.release()
-            # print("Releasing jobRequestHandler LOCK")
+            if requireStringIDs and \
+                    not BinaryCodec.hasStringIDs(parsedJSON_Msg):
+                master.PRINT_LOCK.acquire()
+                print(error_text(("Refusing the job request "
+                                  f"{parsedJSON_Msg['job_id']!r}, as the "
+                                  "binary codec needs its job and task IDs "
+                                  "to be strings")))
+                master.PRINT_LOCK.release()
+                clientConn.close()
+                continue
 
             # Add new job request to job request handler object
             # for tracking dispatched tasks' completion by the
-            # workers
+            # workers. This is done first, as the dispatcher sends the
+            # tasks out as soon as the job is added for task dispatch, and
+            # their updates may arrive right away.
             # print("Acquiring jobUpdateTracker LOCK")
             jobUpdateTracker.LOCK.acquire()
             jobUpdateTracker.addJobRequest(parsedJSON_Msg)
             jobUpdateTracker.LOCK.release()
             # print("Releasing jobUpdateTracker LOCK")
 
+            # Add new job request to job request handler object
+            # for task dispatch
+            # print("Acquiring jobRequestHandler LOCK")
+            jobRequestHandler.LOCK.acquire()
+            jobRequestHandler.addJobRequest(parsedJSON_Msg)
+            jobRequestHandler.LOCK.release()
+            # print("Releasing jobRequestHandler LOCK")
+
+            # Only the number of pending jobs is printed, as printing all of
+            # them for every request slows the master down as they pile up
             jobRequestHandler.LOCK.acquire()
-            _state = jobRequestHandler.jobRequests
+            _pendingJobCount = len(jobRequestHandler.jobRequests)
             jobRequestHandler.LOCK.release()
             master.PRINT_LOCK.acquire()
-            print(f"jobRequestHandler.jobRequests={_state}")
+            print(f"Pending job requests: {_pendingJobCount}")
             master.PRINT_LOCK.release()
 
             # Close the client connection as we have finished receiving the job
             # request from the client
             clientConn.close()
 
-            _job_poller_thread = threading.Thread(name="Job Poller Thread",
-                                                  target=checkJobPoller,
-                                                  args=(jobRequestHandler,
-                                                        jobUpdateTracker,
-                                                        _recv_job_id)
-                                                  )
-            _job_poller_thread.daemon = True
-            _job_poller_thread.start()
-
             master.PRINT_LOCK.acquire()
-            print(info_text("Created the job poller thread!"))
             print("You have reached the bottom of the '__main__'")
             print(threading.enumerate())
             master.PRINT_LOCK.release()
 
-            # _job_poller_thread.join()
-
 
 def workerUpdates(workerSocket: socket.socket,
                   workerStateTracker: StateTracker,
                   jobUpdateTracker: JobUpdateTracker,
-                  WORKER_KEY):
+                  session,
+                  frameReader: FrameReader,
+                  codec):
     """```workerUpdates``` captures the updates from the worker as and when
     they complete the tasks assigned to them, and respond back.
 
@@ -278,65 +230,286 @@ def workerUpdates(workerSocket: socket.socket,
     and their corresponding updates
 
     **type** ```jobUpdateTracker```: JobUpdateTracker
+
+    **param** ```session```: Decrypts the frames received from the worker,
+    using the security mode chosen by the worker
+
+    **type** ```session```: Union[AEADSession, FernetSession, PlainSession]
+
+    **param** ```frameReader```: The reader that was used to receive the
+    worker's connect back response on ```workerSocket```, as it may already
+    hold the worker's first updates
+
+    **type** ```frameReader```: FrameReader
+
+    **param** ```codec```: The codec chosen by the worker for the task
+    messages
+
+    **type** ```codec```: Union[JSONCodec, BinaryCodec]
     """
-    dec_obj = Fernet(WORKER_KEY)
     while True:
-        workerUpdate: str = workerSocket.recv(BUFFER_SIZE).decode()
-        if not workerUpdate:
+        frames = frameReader.readFrames(workerSocket, BUFFER_SIZE)
+        if frames is None:
             workerSocket.close()
             break
 
-        _temp: str = ''
-        for i in workerUpdate.split('==')[:-1]:
-            _temp += dec_obj.decrypt((i + '==').encode()).decode()
-        workerUpdate = _temp
-
-        # Preprocess the received JSON data. This helps prevent
-        # JSON parsing errors when more then one message has been
-        # received at once at the master
-        workerUpdate = "[" + workerUpdate.replace("}{", "},{") + "]"
+        # Every frame holds a batch of encrypted messages
+        parsedJSON_Msg: List[messageToMasterType] = \
+            [codec.decodeMessageToMaster(message)
+             for frame in frames
+             for message in YACS_Protocol.splitBatch(session.decrypt(frame))]
 
         master.PRINT_LOCK.acquire()
-        print(f"Received worker update at master: {workerUpdate}")
+        print("Received worker update at master: "
+              f"{json.dumps(parsedJSON_Msg)}")
         master.PRINT_LOCK.release()
 
-        parsedJSON_Msg: List[messageToMasterType] = \
-            json.loads(workerUpdate)
+        applyWorkerUpdates(workerStateTracker, jobUpdateTracker,
+                           parsedJSON_Msg)
 
-        msg: messageToMasterType
-        for msg in parsedJSON_Msg:
-            jobUpdateTracker.LOCK.acquire()
-            jobUpdateTracker.updateJob(msg)
-            jobUpdateTracker.LOCK.release()
 
-            workerStateTracker.LOCK.acquire()
-            workerStateTracker.freeSlot(msg["worker_id"])
-            workerStateTracker.LOCK.release()
+def refuseWorker(workerSocket: socket.socket,
+                 workerStateTracker: StateTracker, workerID: int,
+                 reason: str) -> None:
+    """```refuseWorker``` closes both the connections to the worker with ID
+    ```workerID```, instead of registering it, when its *connect back*
+    response cannot be accepted. The worker is never sent any tasks.
+
+    **param** ```workerSocket```: The socket the worker connected back on
+
+    **type** ```workerSocket```: socket
+
+    **param** ```workerStateTracker```: Holds the socket the worker is sent
+    its tasks on
+
+    **type** ```workerStateTracker```: StateTracker
+
+    **param** ```workerID```: ID of the worker
+
+    **type** ```workerID```: int
+
+    **param** ```reason```: Why the worker is refused, to be printed
+
+    **type** ```reason```: str
+    """
+    master.PRINT_LOCK.acquire()
+    print(error_text(f"Refusing worker {workerID}, as {reason}"))
+    master.PRINT_LOCK.release()
+
+    workerSocket.close()
+    workerStateTracker.LOCK.acquire()
+    _taskSocket = workerStateTracker.workerState[workerID]["socket"]
+    workerStateTracker.workerState[workerID]["socket"] = None
+    workerStateTracker.LOCK.release()
+    if _taskSocket is not None:
+        _taskSocket.close()
+
+
+def workerConnectBack(workerSocket: socket.socket,
+                      workerAddress: Tuple[str, int],
+                      workerStateTracker: StateTracker,
+                      jobUpdateTracker: JobUpdateTracker,
+                      publicKeyObj: Fernet,
+                      timeScale: TimeScale,
+                      offeredCodecs: Sequence[str],
+                      offeredSecurityModes: Sequence[str]):
+    """```workerConnectBack``` receives the *connect back* response of a
+    worker, marks the worker ready to be sent tasks, and then listens to its
+    updates using ```workerUpdates```. Every worker which connects back is
+    handled by its own thread, so the key exchanges of the workers happen
+    concurrently.
+
+    **param** ```workerSocket```: The socket the worker connected back on
+
+    **type** ```workerSocket```: socket
+
+    **param** ```workerAddress```: The address the worker connected from
+
+    **type** ```workerAddress```: Tuple[str, int]
+
+    **param** ```workerStateTracker```: Tracks the states of the worker nodes
+    as to how many free slots do they have
+
+    **type** ```workerStateTracker```: StateTracker
+
+    **param** ```jobUpdateTracker```: Tracks the jobs assigned to the workers,
+    and their corresponding updates
+
+    **type** ```jobUpdateTracker```: JobUpdateTracker
+
+    **param** ```publicKeyObj```: Decrypts the private key of the worker
+
+    **type** ```publicKeyObj```: Fernet
+
+    **param** ```timeScale```: The time scale offered to the worker
+
+    **type** ```timeScale```: TimeScale
+
+    **param** ```offeredCodecs```: The codecs offered to the worker, as it
+    must not pick any other one
+
+    **type** ```offeredCodecs```: Sequence[str]
+
+    **param** ```offeredSecurityModes```: The security modes offered to the
+    worker, as it must not pick any other one
+
+    **type** ```offeredSecurityModes```: Sequence[str]
+    """
+    # Get the worker number from the newly connected worker
+    _frame_reader = FrameReader()
+    _frame = _frame_reader.readFrame(workerSocket, BUFFER_SIZE)
+    if _frame is None:
+        workerSocket.close()
+        return
+    response_msg = json.loads(_frame.decode())
+    response_msg["enc_pri_key"] = response_msg["enc_pri_key"].encode()
+    WORKER_ID: str = response_msg["worker_id"]
+    _worker_key = publicKeyObj.decrypt(response_msg["enc_pri_key"])
+    # Workers which do not take part in the codec handshake use JSON. A
+    # codec which was not offered is refused.
+    _worker_codec_name = response_msg.get("codec", "json")
+    if _worker_codec_name not in offeredCodecs:
+        refuseWorker(workerSocket, workerStateTracker, int(WORKER_ID),
+                     (f"it chose the codec {_worker_codec_name!r}, which "
+                      f"was not offered: {list(offeredCodecs)}"))
+        return
+    _worker_codec = CODECS[_worker_codec_name]
+    # The worker's session is created only once, and used for every
+    # frame sent to and received from the worker. Workers which do
+    # not take part in the security mode handshake use Fernet. A mode
+    # which was not offered is refused, as the worker could otherwise
+    # downgrade the encryption of the frames.
+    _worker_security_mode = response_msg.get("security_mode", "fernet")
+    if _worker_security_mode not in offeredSecurityModes:
+        refuseWorker(workerSocket, workerStateTracker, int(WORKER_ID),
+                     (f"it chose the security mode "
+                      f"{_worker_security_mode!r}, which was not offered: "
+                      f"{list(offeredSecurityModes)}"))
+        return
+    _worker_session = SESSIONS[_worker_security_mode](_worker_key)
+    # Workers which do not take part in the time scale handshake run
+    # in real time
+    _worker_time_scale = response_msg.get("time_scale", 1.0)
+
+    workerStateTracker.LOCK.acquire()
+    workerStateTracker.workerState[int(WORKER_ID)]["pri_key"] = _worker_key
+    workerStateTracker.workerState[int(WORKER_ID)]["codec"] = _worker_codec
+    workerStateTracker.workerState[int(WORKER_ID)]["session"] = \
+        _worker_session
+    # The tasks are sent to the worker from its own sender thread
+    workerStateTracker.startWorkerSender(int(WORKER_ID))
+    workerStateTracker.markWorkerReady(int(WORKER_ID))
+    _readyWorkerCount = workerStateTracker.readyWorkerCount
+    workerStateTracker.LOCK.release()
+
+    # Printing connection updates
+    master.PRINT_LOCK.acquire()
+    print(info_text(f"Connected to worker ID: {WORKER_ID} at address:"))
+    print(f"IP Address: {workerAddress[0]}")
+    print(f"Socket: {workerAddress[1]}")
+    print(f"Private Key: {_worker_key}")
+    print(f"Codec: {_worker_codec.NAME}")
+    print(f"Security mode: {_worker_session.NAME}")
+    print(f"Time scale: {_worker_time_scale}")
+    if _worker_time_scale != timeScale.factor:
+        print(error_text((f"Worker {WORKER_ID} runs at "
+                          f"{_worker_time_scale}x real time instead "
+                          f"of {timeScale.factor}x, so the times "
+                          "of its tasks are not comparable!")))
+    print(f"Ready workers: {_readyWorkerCount}")
+    master.PRINT_LOCK.release()
+
+    workerUpdates(workerSocket, workerStateTracker, jobUpdateTracker,
+                  _worker_session, _frame_reader, _worker_codec)
 
 
 if __name__ == "__main__":
     # Make sure the required command line arguments are passed in
-    PATH_TO_CONFIG_FILE: Optional[str] = None
-    TYPE_OF_SCHEDULING: Optional[str] = None
+    parser = argparse.ArgumentParser(description=("The master of the YACS "
+                                                  "cluster"))
+    parser.add_argument("PATH_TO_CONFIG_FILE",
+                        help="Path to the worker configuration file")
+    parser.add_argument("TYPE_OF_SCHEDULING", choices=["LL", "RR", "RANDOM"],
+                        help="Scheduling algorithm used to dispatch tasks")
+    parser.add_argument("--codec", choices=list(CODECS), default="json",
+                        help=("Encoding of the task messages to offer to the "
+                              "workers first. The workers fall back to "
+                              "\"json\" if they do not support it. "
+                              "(default: json)"))
+    parser.add_argument("--security",
+                        choices=[name for name in SESSIONS
+                                 if name != PlainSession.NAME],
+                        default="aead",
+                        help=("Encryption of the frames to offer to the "
+                              "workers first. The workers fall back to "
+                              "\"fernet\" if they do not support it. "
+                              "(default: aead)"))
+    parser.add_argument("--no-encrypt", action="store_true",
+                        help=("Send the frames to and from the workers "
+                              "without encrypting them. Only use this on a "
+                              "trusted local cluster"))
+    parser.add_argument("--asyncio", action="store_true",
+                        help=("Run the master on a single asyncio event "
+                              "loop, instead of a few threads per "
+                              "worker"))
+    parser.add_argument("--log-flush-interval", type=float, default=1.0,
+                        help=("Maximum number of seconds before the rows "
+                              "of the log files are flushed. (default: 1)"))
+    parser.add_argument("--log-flush-rows", type=int, default=1000,
+                        help=("Number of rows of the log files after which "
+                              "they are flushed right away. (default: "
+                              "1000)"))
+    parser.add_argument("--columnar", action="store_true",
+                        help=("Also write the logs as typed NumPy columns, "
+                              "which the analytics can memory-map. Needs "
+                              "NumPy"))
+    parser.add_argument("--columnar-chunk-rows", type=int, default=1 << 16,
+                        help=("Number of rows of a table written to each "
+                              "segment of the columnar logs, i.e. the most "
+                              "rows held in memory per table. (default: "
+                              "65536)"))
+    parser.add_argument("--time-scale", type=float, default=1.0,
+                        metavar="FACTOR",
+                        help=("Have the workers run the tasks FACTOR times "
+                              "faster than real time. The times in the log "
+                              "files are in simulated seconds, so that they "
+                              "stay comparable to a run in real time. "
+                              "(default: 1)"))
+    parser.add_argument("--quorum", type=int,
+                        help=("Start accepting job requests once this many "
+                              "workers are ready. The other workers are "
+                              "sent tasks as soon as they connect back. "
+                              "(default: all the workers)"))
+    parser.add_argument("--connect-timeout", type=float,
+                        default=StateTracker.CONNECT_TIMEOUT,
+                        help=("Seconds to keep retrying the connections to "
+                              "the workers for, and to wait for the quorum "
+                              "of workers to be ready. (default: "
+                              f"{StateTracker.CONNECT_TIMEOUT:g})"))
+    cmdArgs = parser.parse_args()
+    if cmdArgs.time_scale <= 0:
+        parser.error("--time-scale must be positive")
+    if cmdArgs.columnar_chunk_rows <= 0:
+        parser.error("--columnar-chunk-rows must be positive")
+
+    PATH_TO_CONFIG_FILE: str = cmdArgs.PATH_TO_CONFIG_FILE
+    TYPE_OF_SCHEDULING: str = cmdArgs.TYPE_OF_SCHEDULING
+
+    # The codecs to offer to the workers, in order of preference
+    OFFERED_CODECS: List[str] = [cmdArgs.codec] + \
+        [name for name in CODECS if name != cmdArgs.codec]
+
+    # The security modes to offer to the workers, in order of preference.
+    # The frames are only sent unencrypted when asked for explicitly.
+    if cmdArgs.no_encrypt:
+        OFFERED_SECURITY_MODES: List[str] = [PlainSession.NAME]
+    else:
+        OFFERED_SECURITY_MODES: List[str] = [cmdArgs.security] + \
+            [name for name in SESSIONS
+             if name not in (cmdArgs.security, PlainSession.NAME)]
 
-    try:
-        PATH_TO_CONFIG_FILE = sys.argv[1]
-        TYPE_OF_SCHEDULING = sys.argv[2]
-    except IndexError as e:
-        print(f"{TC.attr(1)+TC.attr(5)+TC.fg('red')}ERROR:{attr(0)} "
-              "Missing command line arguments: "
-              f"{TC.attr(1)+TC.attr(4)}PATH_TO_CONFIG_FILE{TC.attr(0)}"
-              f" or {TC.attr(1)+TC.attr(4)}TYPE_OF_SCHEDULING{TC.attr(0)}"
-              f" or {TC.attr(1)}both!{TC.attr(0)}")
-        print(e)
-        sys.exit(MISSING_CMD_LINE_ARGS)
-
-    if TYPE_OF_SCHEDULING not in ["LL", "RR", "RANDOM"]:
-        raise ValueError((f"{TC.attr(1)}TYPE_OF_SCHEDULING{TC.attr(0)} is not "
-                          f"of type: {TC.attr(1)}\"RANDOM\"{TC.attr(0)} or "
-                          f"{TC.attr(1)}\"RR\"{TC.attr(0)} "
-                          f"or {TC.attr(1)}\"LL\"{TC.attr(0)}!")
-                         )
+    # The simulated time of the master and the workers starts now
+    TIME_SCALE: TimeScale = TimeScale(cmdArgs.time_scale)
 
     # Making sure that the configuration file can be opened
     try:
@@ -351,17 +524,19 @@ if __name__ == "__main__":
     # Get the number of workers to interact with
     WORKER_COUNT: int = len(workerConf['workers'])
 
-    _ans = 'n'
-    while str.lower(_ans) in ['n', 'no']:
-        _ans = input((f"{'Have' if WORKER_COUNT > 1 else 'Has'} the "
-                      f"{WORKER_COUNT} "
-                      f"{GE.plural_noun('worker', WORKER_COUNT)}"
-                      " been started, yet? [y/n] ")).strip().lower()
+    # The number of workers which have to be ready before the job requests
+    # are accepted
+    QUORUM: int = WORKER_COUNT if cmdArgs.quorum is None else cmdArgs.quorum
+    if not 1 <= QUORUM <= WORKER_COUNT:
+        parser.error(f"--quorum must be between 1 and {WORKER_COUNT}")
 
     """ Creating the thread-shared objects.
     """
     # Worker State Tracker Object
-    obj_workerStateTracker: StateTracker = StateTracker(workerConf)
+    # The workers are connected to once everything is set up, and are only
+    # sent tasks once they have connected back
+    obj_workerStateTracker: StateTracker = \
+        StateTracker(workerConf, connect=False, ready=False)
 
     _converter = {
         "RR": "Round-Robin",
@@ -372,12 +547,42 @@ if __name__ == "__main__":
     # Worker updates handler object
     print("JobUpdateTracker Initialized")
     obj_jobUpdatesTracker: JobUpdateTracker = \
-        JobUpdateTracker(_converter[TYPE_OF_SCHEDULING])
+        JobUpdateTracker(_converter[TYPE_OF_SCHEDULING],
+                         cmdArgs.log_flush_interval, cmdArgs.log_flush_rows,
+                         cmdArgs.columnar, clock=TIME_SCALE.clock,
+                         columnarChunkRows=cmdArgs.columnar_chunk_rows)
+
+    # Exit normally when terminated, so that the log files are written out
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
 
     # Job Request Handler Object
     obj_jobRequestHandler: JobRequestHandler = \
         JobRequestHandler(obj_jobUpdatesTracker)
 
+    # Report the dispatch and the completion of every job as they happen
+    obj_jobRequestHandler.events.subscribe(
+        JobRequestHandler.TASKS_DISPATCHED, onTasksDispatched)
+    obj_jobUpdatesTracker.events.subscribe(
+        JobUpdateTracker.JOB_COMPLETE, onJobComplete)
+
+    if cmdArgs.asyncio:
+        master.PRINT_LOCK.acquire()
+        print(info_text((f"Selected scheduling algorithm: {attr(1)}"
+                         f"{_converter[TYPE_OF_SCHEDULING]}{attr(0)}, "
+                         "running on an asyncio event loop")))
+        master.PRINT_LOCK.release()
+
+        _isQuorumReady = asyncio.run(AsyncMaster(obj_workerStateTracker,
+                                                 obj_jobUpdatesTracker,
+                                                 obj_jobRequestHandler,
+                                                 TYPE_OF_SCHEDULING,
+                                                 OFFERED_CODECS,
+                                                 OFFERED_SECURITY_MODES,
+                                                 TIME_SCALE, QUORUM,
+                                                 cmdArgs.connect_timeout)
+                                     .run())
+        sys.exit(0 if _isQuorumReady else WORKERS_NOT_READY)
+
     # ---
     # After this points we create the threads for the master
     # After this point any print statements need to acquire the
@@ -391,14 +596,6 @@ if __name__ == "__main__":
      - Daemon threads are those threads which are killed when the main
      program exits.
     """
-    jobRequestThread = threading.Thread(name=("Listen for Incoming Job"
-                                              "Requests"),
-                                        target=listenForJobRequests,
-                                        args=(obj_jobRequestHandler,
-                                              obj_jobUpdatesTracker))
-    jobRequestThread.daemon = True
-    jobRequestThread.start()
-
     taskDispatchThread = None
     if TYPE_OF_SCHEDULING == "RANDOM":
         taskDispatchThread = threading.Thread(name=("Job Dispatcher -"
@@ -440,14 +637,56 @@ if __name__ == "__main__":
     PUBLIC_KEY = Fernet.generate_key()
     PUBLIC_KEY_OBJ = Fernet(PUBLIC_KEY)
 
-    obj_workerStateTracker.LOCK.acquire()
-    obj_workerStateTracker.connectBackRequest(PUBLIC_KEY)
-    obj_workerStateTracker.LOCK.release()
-
     WORKER_UPDATES_PORT: int = 5001
     WORKER_UPDATES_ADDR: Tuple[str, int] = \
         (socket.gethostname(), WORKER_UPDATES_PORT)
 
+    # List to hold the threads listening to updates from the workers
+    workerUpdateThreads: List[threading.Thread] = []
+
+    def acceptWorkers(worker_updates_socket: socket.socket) -> None:
+        """Starts a thread for every worker which connects back."""
+        # Loop until all the workers connect to the master
+        for _ in range(WORKER_COUNT):
+            # Establish connection with the requesting worker
+            workerSocket, workerAddress = worker_updates_socket.accept()
+
+            # Start a new thread and return its thread object
+            _temp = threading.Thread(target=workerConnectBack,
+                                     name=(f"Worker-{workerAddress[1]} "
+                                           "Update Listener"),
+                                     args=(workerSocket, workerAddress,
+                                           obj_workerStateTracker,
+                                           obj_jobUpdatesTracker,
+                                           PUBLIC_KEY_OBJ,
+                                           TIME_SCALE,
+                                           OFFERED_CODECS,
+                                           OFFERED_SECURITY_MODES))
+            _temp.daemon = True
+            _temp.start()
+
+            # Store the thread object in a list
+            workerUpdateThreads.append(_temp)
+
+        master.PRINT_LOCK.acquire()
+        print(f"{workerUpdateThreads=}")
+        master.PRINT_LOCK.release()
+
+    def connectToWorkers() -> None:
+        """Connects to all the workers, sending each one its connect back
+        request as soon as it is connected to.
+        """
+        _failed_workerIDs = obj_workerStateTracker.connectToWorkers(
+            cmdArgs.connect_timeout,
+            dict(obj_workerStateTracker.createConnectBackFrames(
+                PUBLIC_KEY, OFFERED_CODECS, OFFERED_SECURITY_MODES,
+                TIME_SCALE.factor, TIME_SCALE.epoch)))
+        if _failed_workerIDs:
+            master.PRINT_LOCK.acquire()
+            print(error_text(("Unable to connect to the workers: "
+                              f"{_failed_workerIDs}")))
+            master.PRINT_LOCK.release()
+
     with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as \
          worker_updates_socket:
         worker_updates_socket.setsockopt(socket.SOL_SOCKET,
@@ -455,60 +694,55 @@ if __name__ == "__main__":
         # Bind the socket to the address tuple
         worker_updates_socket.bind(WORKER_UPDATES_ADDR)
 
-        # Put the socket into listening mode
+        # Put the socket into listening mode, before the workers are asked
+        # to connect back
         worker_updates_socket.listen(WORKER_COUNT)
         master.PRINT_LOCK.acquire()
         print(info_text(("Listening to updates from the workers on port: "
                          f"{WORKER_UPDATES_PORT}")))
         master.PRINT_LOCK.release()
 
-        # List to hold the threads listening to updates from the workers
-        workerUpdateThreads: List[threading.Thread] = []
-
-        # Loop until all the workers connect to the master
-        for _ in range(WORKER_COUNT):
-            # Establish connection with the requesting worker
-            workerSocket, workerAddress = worker_updates_socket.accept()
-
-            # Get the worker number from the newly connected worker
-            response_msg = json.loads(workerSocket.recv(BUFFER_SIZE).decode())
-            response_msg["enc_pri_key"] = response_msg["enc_pri_key"].encode()
-            WORKER_ID: str = response_msg["worker_id"]
-            _worker_key = PUBLIC_KEY_OBJ.decrypt(response_msg["enc_pri_key"])
+        workerAcceptThread = threading.Thread(name="Accept Workers",
+                                              target=acceptWorkers,
+                                              args=(worker_updates_socket,))
+        workerAcceptThread.daemon = True
+        workerAcceptThread.start()
 
-            obj_workerStateTracker.LOCK.acquire()
-            obj_workerStateTracker.workerState[int(WORKER_ID)]["pri_key"] = \
-                _worker_key
-            obj_workerStateTracker.LOCK.release()
+        workerConnectThread = threading.Thread(name="Connect to Workers",
+                                               target=connectToWorkers)
+        workerConnectThread.daemon = True
+        workerConnectThread.start()
 
-            # Printing connection updates
+        # Only accept job requests once the quorum of workers is ready
+        if not obj_workerStateTracker.waitForReadyWorkers(
+                QUORUM, cmdArgs.connect_timeout):
             master.PRINT_LOCK.acquire()
-            print(
-                  info_text(f"Connected to worker ID: {WORKER_ID} at address:")
-                  )
-            print(f"IP Address: {workerAddress[0]}")
-            print(f"Socket: {workerAddress[1]}")
-            print(f"Private Key: {_worker_key}")
+            print(error_text((f"Only {obj_workerStateTracker.readyWorkerCount}"
+                              f" of the {QUORUM} workers needed are ready "
+                              f"after {cmdArgs.connect_timeout:g}s")))
             master.PRINT_LOCK.release()
-
-            # Start a new thread and return its thread object
-            _temp = threading.Thread(target=workerUpdates,
-                                     name=(f"Worker-{WORKER_ID} Update "
-                                           "Listener"),
-                                     args=(workerSocket,
-                                           obj_workerStateTracker,
-                                           obj_jobUpdatesTracker,
-                                           _worker_key))
-            _temp.daemon = True
-            _temp.start()
-
-            # Store the thread object in a list
-            workerUpdateThreads.append(_temp)
+            sys.exit(WORKERS_NOT_READY)
 
         master.PRINT_LOCK.acquire()
-        print(f"{workerUpdateThreads=}")
+        print(info_text((f"{obj_workerStateTracker.readyWorkerCount} of "
+                         f"{WORKER_COUNT} "
+                         f"{GE.plural_noun('worker', WORKER_COUNT)} ready, "
+                         "accepting job requests")))
         master.PRINT_LOCK.release()
 
+        jobRequestThread = threading.Thread(name=("Listen for Incoming Job"
+                                                  "Requests"),
+                                            target=listenForJobRequests,
+                                            args=(obj_jobRequestHandler,
+                                                  obj_jobUpdatesTracker,
+                                                  cmdArgs.codec ==
+                                                  BinaryCodec.NAME))
+        jobRequestThread.daemon = True
+        jobRequestThread.start()
+
+        # Wait for all the workers to connect back
+        workerAcceptThread.join()
+
     master.PRINT_LOCK.acquire()
     print("You have reached the bottom of the '__main__'")
     print(threading.enumerate())
@@ -1,11 +1,16 @@
+import argparse
+import asyncio
 import socket
-import sys
 import threading
 from WorkerSim.WorkerSimulation import Worker
+from WorkerSim.WorkerHost import WorkerHost
 import json
 from cryptography.fernet import Fernet
 import time
-from Communication.protocol import YACS_Protocol
+from Communication.codec import chooseCodec
+from Communication.protocol import FrameReader, YACS_Protocol
+from Communication.security import chooseSession
+from Communication.timescale import TimeScale
 
 
 """
@@ -22,13 +27,34 @@ MESSAGE_BUFFER_SIZE = 4096
 
 def getCMDLineArgs():
     """```getCMDLineArgs``` returns the command line arguments
-    in order of ```port number``` and ```worker ID```
+    in order of ```port number```, ```worker ID```, ```batch window``` and
+    ```worker count```
 
-    ```return```: Tuple containing ```port number``` and ```worker ID```
+    ```return```: Tuple containing ```port number```, ```worker ID```,
+    ```batch window``` and ```worker count```, which is None unless the
+    workers are to be run by a ```WorkerHost```
 
-    ```rtype```: Tuple[int, int]
+    ```rtype```: Tuple[int, int, float, Optional[int]]
     """
-    return int(sys.argv[1]), int(sys.argv[2])
+    parser = argparse.ArgumentParser(description="A worker of the YACS "
+                                                 "cluster")
+    parser.add_argument("PORT", type=int,
+                        help="Port to listen for tasks from the master on")
+    parser.add_argument("WORKER_ID", type=int, help="ID of the worker")
+    parser.add_argument("--batch-window", type=float, default=0,
+                        help=("Seconds to wait after a task completes for "
+                              "more tasks to complete, so that their updates "
+                              "are sent to the master together "
+                              "(default: 0)"))
+    parser.add_argument("--count", type=int,
+                        help=("Run this many workers in this process, on "
+                              "one asyncio event loop, with the IDs from "
+                              "WORKER_ID and the ports from PORT onwards"))
+    cmdArgs = parser.parse_args()
+    if cmdArgs.count is not None and cmdArgs.count < 1:
+        parser.error("--count must be at least 1")
+    return (cmdArgs.PORT, cmdArgs.WORKER_ID, cmdArgs.batch_window,
+            cmdArgs.count)
 
 
 def createWorkerSocket(task_request_addr):
@@ -72,7 +98,15 @@ def createMasterSocket(task_complete_addr):
 
 if __name__ == "__main__":
     # The CLI to the program will be python worker.py port id
-    port_number, worker_id = getCMDLineArgs()
+    port_number, worker_id, batch_window, worker_count = getCMDLineArgs()
+
+    if worker_count is not None:
+        # The workers worker_id, worker_id + 1, ... listen on the ports
+        # port_number, port_number + 1, ...
+        asyncio.run(WorkerHost({worker_id + i: port_number + i
+                                for i in range(worker_count)},
+                               batch_window).run())
+        raise SystemExit(0)
 
     # Creating the socket tuple for the worker where
     # it will listen to task requests from the master
@@ -85,11 +119,34 @@ if __name__ == "__main__":
     # recv data, address bound to the socket on the other end of the connection
     # ---
 
-    connBackDetails = json.loads(masterConn.recv(MESSAGE_BUFFER_SIZE).decode())
+    # The same frame reader is used by the thread listening for tasks, as
+    # it may already hold the first tasks sent by the master
+    taskFrameReader = FrameReader()
+    connBackDetails = json.loads(taskFrameReader
+                                 .readFrame(masterConn, MESSAGE_BUFFER_SIZE)
+                                 .decode())
     connBackDetails["public_key"] = connBackDetails["public_key"].encode()
-    # Generate the worker's private key
-    WORKER_KEY = Fernet.generate_key()
+    # Pick the codec for the task messages, from the ones offered by the
+    # master
+    worker_instance.codec = chooseCodec(connBackDetails.get("codecs",
+                                                            ["json"]))
+    print(f"{worker_id} chose the codec {worker_instance.codec.NAME}")
+    # Pick the security mode for the frames, from the ones offered by the
+    # master
+    workerSession = chooseSession(connBackDetails.get("security_modes",
+                                                      ["fernet"]))
+    print(f"{worker_id} chose the security mode {workerSession.NAME}")
+    # Run as many times faster than real time as the master asks for
+    worker_instance.timeScale = TimeScale(
+        connBackDetails.get("time_scale", 1.0),
+        connBackDetails.get("time_epoch"))
+    print(f"{worker_id} runs at {worker_instance.timeScale.factor}x real "
+          "time")
+    # Generate the worker's private key, and create the session once for
+    # all the frames to and from the master
+    WORKER_KEY = workerSession.generateKey()
     print(f"{worker_id} generated the key {WORKER_KEY}")
+    workerSession = workerSession(WORKER_KEY)
     print(f"Sleeping for {connBackDetails['back_off_time']}s")
     time.sleep(connBackDetails["back_off_time"])
 
@@ -98,16 +155,19 @@ if __name__ == "__main__":
     workerToMasterCompletionSocket = \
         createMasterSocket(_TASK_COMPLETION_RESPONSE_ADDR)
     # workerToMasterCompletionSocket.sendall(str(worker_id).encode())
-    workerToMasterCompletionSocket.sendall(YACS_Protocol.connectBackResponse(
-        str(worker_id), Fernet(connBackDetails["public_key"])
-        .encrypt(WORKER_KEY))
-        .encode())
+    workerToMasterCompletionSocket.sendall(YACS_Protocol.createFrame(
+        YACS_Protocol.connectBackResponse(
+            str(worker_id), Fernet(connBackDetails["public_key"])
+            .encrypt(WORKER_KEY), worker_instance.codec.NAME,
+            workerSession.NAME, worker_instance.timeScale.factor)
+        .encode()))
 
     # Creating all the threads
     json_receive_master = threading.Thread(name="Sending Task To Exec Pool",
                                            target=worker_instance.
                                            listenForTaskRequest,
-                                           args=(masterConn, WORKER_KEY))
+                                           args=(masterConn, workerSession,
+                                                 taskFrameReader))
     json_receive_master.daemon = True
     json_receive_master.start()
 
@@ -121,7 +181,8 @@ if __name__ == "__main__":
         .Thread(name=("Sending Task Completion "
                       "From Worker To Master"),
                 target=worker_instance.taskComplete,
-                args=(workerToMasterCompletionSocket, WORKER_KEY))
+                args=(workerToMasterCompletionSocket, workerSession,
+                      batch_window))
     json_reply_master.daemon = True
     json_reply_master.start()
 